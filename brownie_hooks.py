@@ -1,3 +1,64 @@
+import importlib.util
+import os
+from pathlib import Path
+
 from dotenv import load_dotenv
 
 load_dotenv()
+
+FORK_NETWORK = "mainnet-fork"
+
+
+def _start_fork_cache_proxy(block: int):
+    """
+    Pins fork network to `block` and forks through the on-disk RPC cache, see tests/README.md.
+    Brownie imports hooks while loading the project, before the local node is launched.
+    """
+
+    from brownie._config import CONFIG
+
+    spec = importlib.util.spec_from_file_location(
+        "rpc_cache", Path(__file__).parent / "tests" / "brownie" / "sdk" / "rpc_cache.py"
+    )
+    rpc_cache = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(rpc_cache)
+
+    network = CONFIG.networks[FORK_NETWORK]
+    fork = network["cmd_settings"]["fork"]
+    if fork in CONFIG.networks:
+        forked_network = CONFIG.networks[fork]
+        network["chainid"] = forked_network["chainid"]
+        network["cmd_settings"].setdefault("chain_id", int(forked_network["chainid"]))
+        if "explorer" in forked_network:
+            network["explorer"] = forked_network["explorer"]
+        fork = forked_network["host"]
+
+    upstream = None if os.environ.get("AJNA_FORK_OFFLINE") else os.path.expandvars(fork)
+    cache_path = os.environ.get("AJNA_FORK_CACHE", rpc_cache.DEFAULT_CACHE_PATH)
+
+    proxy = rpc_cache.ForkCacheProxy(upstream, block, rpc_cache.RpcCache(cache_path)).start()
+    network["cmd_settings"]["fork"] = proxy.fork_url
+    return proxy
+
+
+def _set_local_node_port(port: int) -> None:
+    """
+    Launches local nodes on `port` instead of the configured one, so parallel sweep workers (`sdk/sweep.py`)
+    each run their own node.
+    """
+
+    from brownie._config import CONFIG
+
+    for network in CONFIG.networks.values():
+        if "cmd_settings" in network:
+            network["cmd_settings"]["port"] = port
+
+
+if os.environ.get("AJNA_NODE_PORT"):
+    _set_local_node_port(int(os.environ["AJNA_NODE_PORT"]))
+
+fork_cache_proxy = (
+    _start_fork_cache_proxy(int(os.environ["AJNA_FORK_BLOCK"]))
+    if os.environ.get("AJNA_FORK_BLOCK")
+    else None
+)
@@ -1,9 +1,73 @@
 from brownie import *
+import hashlib
 import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests" / "brownie"))
+
+from sdk.state_cache import DEFAULT_STATE_CACHE_PATH, artifacts_hash, dump_node_state, load_node_state
+
+SETUP_CONFIG = "scripts/ajna-setup.json"
 
 
 def main():
+    """
+    Deploys Ajna contracts and funds accounts from ajna-setup.json.
+
+    With AJNA_STATE_CACHE=1 (Anvil only), resulting chain state is saved keyed by build artifacts and setup config,
+    and loaded instead of deploying and funding again when none of them changed.
+    """
+
+    if os.environ.get("AJNA_STATE_CACHE", "0") == "1":
+        key = _state_key()
+        state_file = DEFAULT_STATE_CACHE_PATH / f"setup-{key}.state"
+        contracts_file = DEFAULT_STATE_CACHE_PATH / f"setup-{key}.json"
+
+        if state_file.exists() and contracts_file.exists():
+            print(f"=== Loading saved setup state {key} ===")
+            load_node_state(state_file.read_text())
+            return _attach(json.loads(contracts_file.read_text()))
+
+        result = _deploy_and_fund()
+
+        DEFAULT_STATE_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        state_file.write_text(dump_node_state())
+        contracts_file.write_text(json.dumps({
+            "erc20_pool_factory": result[0].address,
+            "erc721_pool_factory": result[1].address,
+            "pool_utils": result[4].address,
+            "comp": result[2].address,
+            "dai": result[3].address,
+        }, indent=2))
+        return result[:4]
+
+    return _deploy_and_fund()[:4]
+
+
+def _state_key():
+    digest = hashlib.sha256()
+    digest.update(artifacts_hash().encode())
+    digest.update(Path(SETUP_CONFIG).read_bytes())
+    return digest.hexdigest()
 
+
+def _attach(contracts):
+    erc20_pool_factory = ERC20PoolFactory.at(contracts["erc20_pool_factory"])
+    erc721_pool_factory = ERC721PoolFactory.at(contracts["erc721_pool_factory"])
+    pool_utils = PoolInfoUtils.at(contracts["pool_utils"])
+    _write_env(erc20_pool_factory, erc721_pool_factory, pool_utils)
+
+    return (
+        erc20_pool_factory,
+        erc721_pool_factory,
+        Contract(contracts["comp"]),
+        Contract(contracts["dai"]),
+    )
+
+
+def _deploy_and_fund():
     ajna_address = "0x9a96ec9B57Fb64FbC60B423d1f4da7691Bd35079"
 
     # deploy Ajna pool factories and dump them in json config file
@@ -12,27 +76,17 @@ def main():
     LenderActions.deploy({"from": accounts[0]})
     LPActions.deploy({"from": accounts[0]})
     BorrowerActions.deploy({"from": accounts[0]})
-    KickerActions.deploy({"from": accounts[0]}})
-    TakerActions.deploy({"from": accounts[0]}})
-    SettlerActions.deploy({"from": accounts[0]}})
+    KickerActions.deploy({"from": accounts[0]})
+    TakerActions.deploy({"from": accounts[0]})
+    SettlerActions.deploy({"from": accounts[0]})
     erc20_pool_factory = ERC20PoolFactory.deploy(ajna_address, {"from": accounts[0]})
     erc721_pool_factory = ERC721PoolFactory.deploy(ajna_address, {"from": accounts[0]})
     pool_utils = PoolInfoUtils.deploy({"from": accounts[0]})
 
-    with open("scripts/.env", "w") as outfile:
-        outfile.write("ETH_RPC_URL=http://localhost:8545/")
-        outfile.write("\nERC20_FACTORY="+erc20_pool_factory.address)
-        outfile.write("\nERC721_FACTORY="+erc721_pool_factory.address)
-        outfile.write("\nPOOL_UTILS="+pool_utils.address)
-        outfile.write("\nLENDER_ADDRESS=0x5E9badd492c5bF5824b45E834B1A5b4a41B273f3")
-        outfile.write("\nLENDER_PRIVATE_KEY=0xacd5fc4b1c3141f67b35f09210379295c34f7e5c33d6bf1755a65c3c07a9e854")
-        outfile.write("\nBORROWER_ADDRESS=0x92620c1bCdC5D16a3661285C1f86D7992df26b1c")
-        outfile.write("\nBORROWER_PRIVATE_KEY=ed864439e1385640568cc328592c505eb294c95f93a71923713a74f54d62d94b")
-        outfile.write("\nCOLLATERAL_ADDRESS=0xc00e94Cb662C3520282E6f5717214004A7f26888")
-        outfile.write("\nQUOTE_ADDRESS=0x6B175474E89094C44Da98b954EedeAC495271d0F")
+    _write_env(erc20_pool_factory, erc721_pool_factory, pool_utils)
 
     # read config and fund accounts
-    with open('scripts/ajna-setup.json', 'r') as setupfile:
+    with open(SETUP_CONFIG, 'r') as setupfile:
         ajna_config = json.load(setupfile)
 
     dai_config = ajna_config.get('tokens').get('DAI')
@@ -76,6 +130,19 @@ def main():
         erc721_pool_factory,
         comp_contract,
         dai_contract,
+        pool_utils,
     )
 
 
+def _write_env(erc20_pool_factory, erc721_pool_factory, pool_utils):
+    with open("scripts/.env", "w") as outfile:
+        outfile.write("ETH_RPC_URL=http://localhost:8545/")
+        outfile.write("\nERC20_FACTORY="+erc20_pool_factory.address)
+        outfile.write("\nERC721_FACTORY="+erc721_pool_factory.address)
+        outfile.write("\nPOOL_UTILS="+pool_utils.address)
+        outfile.write("\nLENDER_ADDRESS=0x5E9badd492c5bF5824b45E834B1A5b4a41B273f3")
+        outfile.write("\nLENDER_PRIVATE_KEY=0xacd5fc4b1c3141f67b35f09210379295c34f7e5c33d6bf1755a65c3c07a9e854")
+        outfile.write("\nBORROWER_ADDRESS=0x92620c1bCdC5D16a3661285C1f86D7992df26b1c")
+        outfile.write("\nBORROWER_PRIVATE_KEY=ed864439e1385640568cc328592c505eb294c95f93a71923713a74f54d62d94b")
+        outfile.write("\nCOLLATERAL_ADDRESS=0xc00e94Cb662C3520282E6f5717214004A7f26888")
+        outfile.write("\nQUOTE_ADDRESS=0x6B175474E89094C44Da98b954EedeAC495271d0F")
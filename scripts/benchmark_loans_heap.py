@@ -0,0 +1,67 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests" / "brownie"))
+
+from sdk.loans import Loans
+
+
+def _timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>9} ops {elapsed:>9.3f}s {elapsed / count * 1e6:>9.2f}us/op")
+    return result
+
+
+def main(loans_count: int = 100_000, updates_count: int = 100_000, seed: int = 0):
+    """
+    Benchmarks Python mirror of Loans heap: bulk heapify, incremental inserts, updates and removals.
+
+    Usage:
+        brownie run scripts/benchmark_loans_heap.py main 100000
+    """
+
+    loans_count = int(loans_count)
+    updates_count = int(updates_count)
+    rng = random.Random(seed)
+
+    snapshot = [(f"0x{i:040x}", rng.randint(1, 10**9) * 10**9) for i in range(loans_count)]
+    borrowers = [borrower for borrower, _ in snapshot]
+
+    _timed("heapify", loans_count, lambda: Loans.heapify(snapshot))
+
+    def insert_all():
+        heap = Loans()
+        for borrower, t0_debt_to_collateral in snapshot:
+            heap.upsert(borrower, t0_debt_to_collateral)
+        return heap
+
+    loans = _timed("upsert (insert)", loans_count, insert_all)
+
+    def update_random():
+        for _ in range(updates_count):
+            loans.upsert(rng.choice(borrowers), rng.randint(1, 10**9) * 10**9)
+
+    _timed("upsert (update)", updates_count, update_random)
+
+    def copy_and_predict_max():
+        # keeper flow: apply a hypothetical action on a copy and read the new max borrower
+        predicted = loans.copy()
+        predicted.remove(predicted.get_max()[0])
+        return predicted.get_max()
+
+    _timed("copy + remove max", 1, copy_and_predict_max)
+
+    def remove_all():
+        rng.shuffle(borrowers)
+        for borrower in borrowers:
+            loans.remove(borrower)
+
+    _timed("remove", loans_count, remove_all)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
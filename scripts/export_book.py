@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests" / "brownie"))
+
+from brownie import PoolInfoUtils
+from sdk.book import DEFAULT_PAGE_SIZE, export_book
+
+
+def main(pool_info_utils, pool, path="book.csv", page_size=DEFAULT_PAGE_SIZE):
+    """
+    Exports every non empty bucket of `pool` to a CSV file, or an Arrow file if `path` ends with `.arrow`.
+
+    brownie run scripts/export_book.py main <pool info utils address> <pool address> book.arrow
+    """
+
+    rows = export_book(PoolInfoUtils.at(pool_info_utils), pool, path, page_size=int(page_size))
+    print(f"exported {rows} buckets to {path}")
@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests" / "brownie"))
+
+from sdk.sweep import DEFAULT_BASE_PORT, SweepResults, run_sweep
+
+# arguments of the sweep itself, anything else is a parameter of the grid
+OPTIONS = ("seeds", "workers", "test", "base_port", "network")
+
+
+def _parse_value(value: str):
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def _parse_seeds(value: str):
+    if ":" in value:
+        start, stop = value.split(":")
+        return range(int(start), int(stop))
+    return [int(seed) for seed in value.split(",")]
+
+
+def main(results="sweep.sqlite", *args):
+    """
+    Runs the stable / volatile pool simulation for every combination of parameters and seed, one process
+    and local node per core, and stores metrics of every run in `results`.
+
+    python scripts/sweep.py sweep.sqlite seeds=0:8 NUM_LENDERS=25,50 GOAL_UTILIZATION=0.4,0.5 network=anvil-fork
+    """
+
+    options = {"seeds": "0:1", "workers": None, "test": "tests/brownie/test_stable_volatile.py", "base_port": None}
+    grid = {}
+    for arg in args:
+        name, values = arg.split("=", 1)
+        if name in OPTIONS:
+            options[name] = values
+        else:
+            grid[name] = [_parse_value(value) for value in values.split(",")]
+
+    brownie_args = ("--network", options["network"]) if options.get("network") else ()
+    counts = run_sweep(
+        grid,
+        _parse_seeds(options["seeds"]),
+        results,
+        test=options["test"],
+        workers=int(options["workers"]) if options["workers"] else None,
+        base_port=int(options["base_port"]) if options["base_port"] else DEFAULT_BASE_PORT,
+        brownie_args=brownie_args,
+    )
+    print(f"runs: {counts}")
+
+    store = SweepResults(results)
+    for run_id, step, message in store.failures():
+        print(f"run {run_id} invariant failure at {step}: {message}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
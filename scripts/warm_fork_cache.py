@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests" / "brownie"))
+
+import brownie_hooks
+from sdk import *
+
+# definitions used by brownie tests and SDK helpers
+DEFINITIONS = {
+    "default": InitialProtocolState.DEFAULT,
+    "tests": lambda: (
+        InitialProtocolStateBuilder()
+        .add_token(MKR_ADDRESS, MKR_RESERVE_ADDRESS)
+        .add_token(WETH_ADDRESS, WETH_RESERVE_ADDRESS)
+        .add_token(DAI_ADDRESS, DAI_RESERVE_ADDRESS)
+        .build()
+    ),
+    "all": lambda: (
+        InitialProtocolStateBuilder()
+        .add_token(DAI_ADDRESS, DAI_RESERVE_ADDRESS)
+        .add_token(MKR_ADDRESS, MKR_RESERVE_ADDRESS)
+        .add_token(COMP_ADDRESS, COMP_RESERVE_ADDRESS)
+        .add_token(USDC_ADDRESS, USDC_RESERVE_ADDRESS)
+        .add_token(USDT_ADDRESS, USDT_RESERVE_ADDRESS)
+        .add_token(WETH_ADDRESS, WETH_RESERVE_ADDRESS)
+        .build()
+    ),
+}
+
+
+def main(definition="tests"):
+    """
+    Pre-warms the on-disk fork cache with state used by given protocol definition.
+
+    AJNA_FORK_BLOCK=16295000 brownie run scripts/warm_fork_cache.py main tests
+    """
+
+    proxy = brownie_hooks.fork_cache_proxy
+    if proxy is None:
+        raise Exception("Set AJNA_FORK_BLOCK to the fork block to warm the cache for")
+
+    warm_fork_cache(DEFINITIONS[definition]())
+
+    print(
+        f"Fork cache for block {proxy.block}: {proxy.cache.size(proxy.block)} entries, "
+        f"{proxy.cache.hits} hits, {proxy.cache.misses} misses"
+    )
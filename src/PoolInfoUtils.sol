@@ -47,6 +47,40 @@ contract PoolInfoUtils is Multicall {
         uint256 poolDebt;
     }
 
+    /**
+     * @notice Bucket details returned by `bucketsInfo`, same values as `bucketInfo`.
+     * @param index        Bucket index.
+     * @param price        Bucket's price (`WAD`).
+     * @param quoteTokens  Amount of quote token in bucket, `deposit + interest` (`WAD`).
+     * @param collateral   Unencumbered collateral in bucket (`WAD`).
+     * @param bucketLP     Outstanding `LP` balance in bucket (`WAD`).
+     * @param scale        Lender interest multiplier (`WAD`).
+     * @param exchangeRate The exchange rate of the bucket, in `WAD` units.
+     */
+    struct BucketInfo {
+        uint256 index;
+        uint256 price;
+        uint256 quoteTokens;
+        uint256 collateral;
+        uint256 bucketLP;
+        uint256 scale;
+        uint256 exchangeRate;
+    }
+
+    /**
+     * @notice Loan details returned by `loansHeapInfo`.
+     * @param index              Index of the loan in pool loans heap.
+     * @param borrower           Borrower address.
+     * @param t0DebtToCollateral Borrower t0 debt to collateral, the heap key (`WAD`).
+     * @param thresholdPrice     Borrower `Threshold Price` at pending inflator (`WAD`).
+     */
+    struct HeapLoanInfo {
+        uint256 index;
+        address borrower;
+        uint256 t0DebtToCollateral;
+        uint256 thresholdPrice;
+    }
+
     /**
      *  @notice Exposes status of a liquidation auction.
      *  @param  ajnaPool_         Address of `Ajna` pool.
@@ -157,13 +191,53 @@ contract PoolInfoUtils is Multicall {
 
         uint256 pendingInflator = PoolCommons.pendingInflator(inflator, lastInflatorUpdate, interestRate);
 
-        uint256 t0Debt;
-        uint256 npTpRatio;
-        (t0Debt, collateral_, npTpRatio)  = pool.borrowerInfo(borrower_);
+        (debt_, collateral_, t0Np_, thresholdPrice_) = _borrowerInfo(pool, borrower_, pendingInflator);
+    }
 
-        t0Np_ = collateral_ == 0 ? 0 : Math.mulDiv(Maths.wmul(t0Debt, COLLATERALIZATION_FACTOR), npTpRatio, collateral_);
-        debt_ = Maths.ceilWmul(t0Debt, pendingInflator);
-        thresholdPrice_ = collateral_ == 0 ? 0 : Maths.wmul(Maths.wdiv(debt_, collateral_), COLLATERALIZATION_FACTOR);
+    /**
+     *  @notice Retrieves info of many borrowers in a given `Ajna` pool, in a single call.
+     *  @dev    Same values as `borrowerInfo`, pending inflator is computed once for all borrowers.
+     *  @param  ajnaPool_        Address of `Ajna` pool.
+     *  @param  borrowers_       Borrowers' addresses.
+     *  @return debts_           Current debt owed by each borrower (`WAD`).
+     *  @return collaterals_     Pledged collateral of each borrower, including encumbered (`WAD`).
+     *  @return t0Nps_           `Neutral price` of each borrower (`WAD`).
+     *  @return thresholdPrices_ `Threshold Price` of each borrower (`WAD`).
+     */
+    function borrowersInfo(address ajnaPool_, address[] calldata borrowers_)
+        external
+        view
+        returns (
+            uint256[] memory debts_,
+            uint256[] memory collaterals_,
+            uint256[] memory t0Nps_,
+            uint256[] memory thresholdPrices_
+        )
+    {
+        (
+            uint256 inflator,
+            uint256 lastInflatorUpdate
+        ) = IPool(ajnaPool_).inflatorInfo();
+
+        (uint256 interestRate,) = IPool(ajnaPool_).interestRateInfo();
+
+        uint256 pendingInflator = PoolCommons.pendingInflator(inflator, lastInflatorUpdate, interestRate);
+
+        debts_           = new uint256[](borrowers_.length);
+        collaterals_     = new uint256[](borrowers_.length);
+        t0Nps_           = new uint256[](borrowers_.length);
+        thresholdPrices_ = new uint256[](borrowers_.length);
+
+        for (uint256 i = 0; i < borrowers_.length; ) {
+            (
+                debts_[i],
+                collaterals_[i],
+                t0Nps_[i],
+                thresholdPrices_[i]
+            ) = _borrowerInfo(IPool(ajnaPool_), borrowers_[i], pendingInflator);
+
+            unchecked { ++i; }
+        }
     }
 
     /**
@@ -197,6 +271,46 @@ contract PoolInfoUtils is Multicall {
         exchangeRate_ = Buckets.getExchangeRate(collateral_, bucketLP_, quoteTokens_, price_);
     }
 
+    /**
+     *  @notice Get bucket structs for a range of indexes, one page at a time.
+     *  @dev    Returns at most `limit_` buckets from `fromIndex_` to `toIndex_` (included, capped at `MAX_FENWICK_INDEX`),
+     *  @dev    so a full book can be read in a few calls while each one stays within the node gas cap.
+     *  @param  ajnaPool_  Address of `Ajna` pool.
+     *  @param  fromIndex_ Index of the first bucket to retrieve.
+     *  @param  toIndex_   Index of the last bucket to retrieve.
+     *  @param  limit_     Maximum number of buckets to retrieve.
+     *  @return buckets_   Buckets from `fromIndex_`, in ascending index (descending price) order.
+     *  @return nextIndex_ Index to pass as `fromIndex_` to retrieve the next page, greater than `toIndex_` once the range is exhausted.
+     */
+    function bucketsInfo(address ajnaPool_, uint256 fromIndex_, uint256 toIndex_, uint256 limit_)
+        external
+        view
+        returns (
+            BucketInfo[] memory buckets_,
+            uint256 nextIndex_
+        )
+    {
+        if (toIndex_ > MAX_FENWICK_INDEX) toIndex_ = MAX_FENWICK_INDEX;
+
+        uint256 count = fromIndex_ > toIndex_ ? 0 : Maths.min(toIndex_ - fromIndex_ + 1, limit_);
+        buckets_ = new BucketInfo[](count);
+
+        IPool pool = IPool(ajnaPool_);
+        for (uint256 i = 0; i < count; ) {
+            BucketInfo memory bucket = buckets_[i];
+
+            bucket.index = fromIndex_ + i;
+            bucket.price = _priceAt(bucket.index);
+
+            (bucket.bucketLP, bucket.collateral, , bucket.quoteTokens, bucket.scale) = pool.bucketInfo(bucket.index);
+            bucket.exchangeRate = Buckets.getExchangeRate(bucket.collateral, bucket.bucketLP, bucket.quoteTokens, bucket.price);
+
+            unchecked { ++i; }
+        }
+
+        nextIndex_ = fromIndex_ + count;
+    }
+
     /**
      *  @notice Returns info related to pool loans.
      *  @param  ajnaPool_              Address of `Ajna` pool.
@@ -233,6 +347,90 @@ contract PoolInfoUtils is Multicall {
         pendingInterestFactor_ = PoolCommons.pendingInterestFactor(interestRate, block.timestamp - inflatorUpdate);
     }
 
+    /**
+     *  @notice Get `LP` and quote token value of many lenders in many buckets, in a single call.
+     *  @dev    Matrices are packed row by row, position of lender `i` in bucket `j` is `i * indexes_.length + j`.
+     *  @dev    Each bucket is read once for all lenders.
+     *  @param  ajnaPool_    Address of `Ajna` pool.
+     *  @param  lenders_     Lenders' addresses (rows).
+     *  @param  indexes_     Bucket indexes (columns).
+     *  @return lps_         `LP` balance of each lender in each bucket (`WAD`).
+     *  @return quoteTokens_ Quote token amount each lender can exchange its `LP` for, as `lpToQuoteTokens` (`WAD`).
+     */
+    function lendersInfo(address ajnaPool_, address[] calldata lenders_, uint256[] calldata indexes_)
+        external
+        view
+        returns (
+            uint256[] memory lps_,
+            uint256[] memory quoteTokens_
+        )
+    {
+        lps_         = new uint256[](lenders_.length * indexes_.length);
+        quoteTokens_ = new uint256[](lenders_.length * indexes_.length);
+
+        BucketInfo memory bucket;
+        for (uint256 j = 0; j < indexes_.length; ) {
+            bucket.index = indexes_[j];
+            bucket.price = _priceAt(bucket.index);
+            (bucket.bucketLP, bucket.collateral, , bucket.quoteTokens, ) = IPool(ajnaPool_).bucketInfo(bucket.index);
+
+            _lendersInBucket(IPool(ajnaPool_), lenders_, bucket, j, indexes_.length, lps_, quoteTokens_);
+
+            unchecked { ++j; }
+        }
+    }
+
+    /**
+     *  @notice Get loans of the pool loans heap for a range of heap indexes, one page at a time.
+     *  @dev    Loans are returned in heap order (root at index `1`), not sorted by threshold price, but every loan has a threshold price
+     *  @dev    lower than or equal to its parent at index `index / 2`.
+     *  @param  ajnaPool_  Address of `Ajna` pool.
+     *  @param  fromIndex_ Heap index of the first loan to retrieve, starting at `1`.
+     *  @param  limit_     Maximum number of loans to retrieve.
+     *  @return loans_     Loans from `fromIndex_`, in heap order.
+     *  @return nextIndex_ Index to pass as `fromIndex_` to retrieve the next page, greater than `loansCount` once the heap is exhausted.
+     */
+    function loansHeapInfo(address ajnaPool_, uint256 fromIndex_, uint256 limit_)
+        external
+        view
+        returns (
+            HeapLoanInfo[] memory loans_,
+            uint256 nextIndex_
+        )
+    {
+        IPool pool = IPool(ajnaPool_);
+
+        if (fromIndex_ == 0) fromIndex_ = 1;
+
+        (, , uint256 loansCount) = pool.loansInfo();
+        uint256 count = fromIndex_ > loansCount ? 0 : Maths.min(loansCount - fromIndex_ + 1, limit_);
+        loans_ = new HeapLoanInfo[](count);
+
+        uint256 pendingInflator;
+        {
+            (
+                uint256 inflator,
+                uint256 inflatorUpdate
+            ) = pool.inflatorInfo();
+
+            (uint256 interestRate, ) = pool.interestRateInfo();
+
+            pendingInflator = PoolCommons.pendingInflator(inflator, inflatorUpdate, interestRate);
+        }
+
+        for (uint256 i = 0; i < count; ) {
+            HeapLoanInfo memory loan = loans_[i];
+
+            loan.index = fromIndex_ + i;
+            (loan.borrower, loan.t0DebtToCollateral) = pool.loanInfo(loan.index);
+            loan.thresholdPrice = _htp(loan.t0DebtToCollateral, pendingInflator);
+
+            unchecked { ++i; }
+        }
+
+        nextIndex_ = fromIndex_ + count;
+    }
+
     /**
      *  @notice Returns info related to pool prices.
      *  @param  ajnaPool_ Address of `Ajna` pool.
@@ -564,6 +762,68 @@ contract PoolInfoUtils is Multicall {
     /*** Pool Utilities ***/
     /**********************/
 
+    /**
+     *  @notice Fills a column of `PoolInfoUtils.lendersInfo` matrices with `LP` balance and quote token value of each lender in a bucket.
+     *  @param  pool_        `Ajna` pool.
+     *  @param  lenders_     Lenders' addresses (rows).
+     *  @param  bucket_      Bucket `LP`, collateral, deposit and price.
+     *  @param  column_      Column of the bucket.
+     *  @param  columns_     Number of columns.
+     *  @param  lps_         `LP` matrix, packed row by row.
+     *  @param  quoteTokens_ Quote token value matrix, packed row by row.
+     */
+    function _lendersInBucket(
+        IPool pool_,
+        address[] calldata lenders_,
+        PoolInfoUtils.BucketInfo memory bucket_,
+        uint256 column_,
+        uint256 columns_,
+        uint256[] memory lps_,
+        uint256[] memory quoteTokens_
+    ) view {
+        for (uint256 i = 0; i < lenders_.length; ) {
+            uint256 cell = i * columns_ + column_;
+
+            (lps_[cell], ) = pool_.lenderInfo(bucket_.index, lenders_[i]);
+
+            if (lps_[cell] != 0) {
+                quoteTokens_[cell] = _lpToQuoteToken(
+                    bucket_.bucketLP,
+                    bucket_.collateral,
+                    bucket_.quoteTokens,
+                    lps_[cell],
+                    bucket_.price
+                );
+            }
+
+            unchecked { ++i; }
+        }
+    }
+
+    /**
+     *  @notice Calculates borrower info as returned by `PoolInfoUtils.borrowerInfo`, for a given pending inflator.
+     *  @param  pool_            `Ajna` pool.
+     *  @param  borrower_        Borrower's address.
+     *  @param  pendingInflator_ Pool inflator at current block.
+     *  @return debt_            Current debt owed by borrower (`WAD`).
+     *  @return collateral_      Pledged collateral, including encumbered (`WAD`).
+     *  @return t0Np_            `Neutral price` (`WAD`).
+     *  @return thresholdPrice_  Borrower's `Threshold Price` (`WAD`).
+     */
+    function _borrowerInfo(
+        IPool pool_,
+        address borrower_,
+        uint256 pendingInflator_
+    ) view returns (uint256 debt_, uint256 collateral_, uint256 t0Np_, uint256 thresholdPrice_) {
+        uint256 t0Debt;
+        uint256 npTpRatio;
+        (t0Debt, collateral_, npTpRatio)  = pool_.borrowerInfo(borrower_);
+
+        t0Np_ = collateral_ == 0 ? 0 : Math.mulDiv(Maths.wmul(t0Debt, COLLATERALIZATION_FACTOR), npTpRatio, collateral_);
+        debt_ = Maths.ceilWmul(t0Debt, pendingInflator_);
+        thresholdPrice_ = collateral_ == 0 ? 0 : Maths.wmul(Maths.wdiv(debt_, collateral_), COLLATERALIZATION_FACTOR);
+    }
+
     /**
      *  @notice Calculates encumberance for a debt amount at a given price.
      *  @param  debt_         The debt amount to calculate encumberance for.
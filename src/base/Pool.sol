@@ -826,6 +826,11 @@ abstract contract Pool is Clone, ReentrancyGuard, Multicall, IPool {
     function depositUpToIndex(uint256 index_) external view override returns (uint256) {
         return Deposits.prefixSum(deposits, index_);
     }
+
+    /// @inheritdoc IPoolDerivedState
+    function depositUpToIndexes(uint256[] calldata indexes_) external view override returns (uint256[] memory) {
+        return PoolCommons.depositUpToIndexes(deposits, indexes_);
+    }
     
     /// @inheritdoc IPoolDerivedState
     function depositIndex(uint256 debt_) external view override returns (uint256) {
@@ -25,6 +25,16 @@ interface IPoolDerivedState {
         uint256 index_
     ) external view returns (uint256);
 
+    /**
+     *  @notice Returns the prefix sums of given buckets, the deposit depth curve above each bucket price.
+     *  @dev    Tree traversal is shared between indexes, listing them in ascending order is cheapest.
+     *  @param  indexes_ The bucket indexes.
+     *  @return The deposit up to each given index (`WAD` precision).
+     */
+    function depositUpToIndexes(
+        uint256[] calldata indexes_
+    ) external view returns (uint256[] memory);
+
     /**
      *  @notice Returns the bucket index for a given debt amount.
      *  @param  debt_  The debt amount to calculate bucket index for (`WAD` precision).
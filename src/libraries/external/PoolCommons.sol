@@ -524,4 +524,15 @@ library PoolCommons {
     ) external view returns (uint256 utilization_) {
         return _utilization(emaParams_.debtEma, emaParams_.depositEma);
     }
+
+    /**
+     *  @notice Calculates deposit prefix sums of many indexes in a single tree traversal.
+     *  @dev Wrapper of the internal function.
+     */
+    function depositUpToIndexes(
+        DepositsState storage deposits_,
+        uint256[] calldata indexes_
+    ) external view returns (uint256[] memory) {
+        return Deposits.prefixSums(deposits_, indexes_);
+    }
 }
@@ -299,6 +299,94 @@ library Deposits {
         }
     }
 
+    /**
+     *  @notice Get prefix sums of many indexes, sharing tree traversal between consecutive indexes.
+     *  @dev    Same result as `prefixSum` for each index. Traversal state is kept for every tree level, so each index only traverses
+     *  @dev    levels below the highest bit in which it differs from the previous index. Sharing is highest for ascending indexes.
+     *  @dev    Indexes above tree size return the whole tree sum.
+     *  @param  deposits_   Deposits state struct.
+     *  @param  sumIndexes_ The indexes to receive the prefix sum.
+     *  @return sums_       The prefix sum of each index.
+     */
+    function prefixSums(
+        DepositsState storage deposits_,
+        uint256[] memory sumIndexes_
+    ) internal view returns (uint256[] memory sums_) {
+        sums_ = new uint256[](sumIndexes_.length);
+
+        // traversal state before each level, level `l` considers node bit `SIZE >> l`
+        uint256[15] memory indexes; // index built bit by bit
+        uint256[15] memory sums;    // prefix sum of nodes included so far
+        uint256[15] memory scales;  // running scale
+        scales[0] = Maths.WAD;
+
+        uint256 prevSumIndex;
+        uint256 lastLevel;          // deepest level with a state valid for `prevSumIndex`
+
+        for (uint256 i = 0; i < sumIndexes_.length; ) {
+            // price buckets are indexed starting at 0, Fenwick bit logic is more elegant starting at 1
+            uint256 sumIndex = Maths.min(sumIndexes_[i], SIZE - 1) + 1;
+
+            // state of levels down to the highest bit differing from previous index is shared
+            uint256 level;
+            for (uint256 bit = SIZE; bit > (sumIndex ^ prevSumIndex) && level < lastLevel; bit = bit >> 1) ++level;
+
+            lastLevel    = _prefixSumFromLevel(deposits_, sumIndex, level, indexes, sums, scales);
+            sums_[i]     = sums[lastLevel];
+            prevSumIndex = sumIndex;
+
+            unchecked { ++i; }
+        }
+    }
+
+    /**
+     *  @notice Resumes a prefix sum traversal from a given tree level, storing the state reached after each level.
+     *  @dev    Same node inclusion and scaling logic as `prefixSum`, used by `prefixSums`.
+     *  @param  deposits_ Deposits state struct.
+     *  @param  sumIndex_ The index to receive the prefix sum, starting at `1`.
+     *  @param  level_    The level to resume from, its state must be valid for `sumIndex_`.
+     *  @param  indexes_  Index built bit by bit, before each level.
+     *  @param  sums_     Prefix sum, before each level.
+     *  @param  scales_   Running scale, before each level.
+     *  @return The level after the last one traversed, holding the prefix sum of `sumIndex_`.
+     */
+    function _prefixSumFromLevel(
+        DepositsState storage deposits_,
+        uint256 sumIndex_,
+        uint256 level_,
+        uint256[15] memory indexes_,
+        uint256[15] memory sums_,
+        uint256[15] memory scales_
+    ) private view returns (uint256) {
+        // We don't need to consider final 0 bits of sumIndex_
+        uint256 indexLSB = lsb(sumIndex_);
+
+        for (uint256 j = SIZE >> level_; j >= indexLSB; j = j >> 1) {
+            uint256 curIndex = indexes_[level_] + j;
+            uint256 scaled   = deposits_.scaling[curIndex];
+
+            if (sumIndex_ & j != 0) {
+                // node index + j of tree is included in sum, recall that scaled==0 means that the scale factor is actually 1
+                indexes_[level_ + 1] = curIndex;
+                sums_[level_ + 1]    = sums_[level_] + (scaled != 0 ? Math.mulDiv(
+                    scales_[level_] * scaled,
+                    deposits_.values[curIndex],
+                    1e36
+                ) : Maths.wmul(scales_[level_], deposits_.values[curIndex]));
+                scales_[level_ + 1]  = scales_[level_];
+            } else {
+                // node is not included in sum, but its scale needs to be included for subsequent sums
+                indexes_[level_ + 1] = indexes_[level_];
+                sums_[level_ + 1]    = sums_[level_];
+                scales_[level_ + 1]  = scaled != 0 ? Maths.floorWmul(scales_[level_], scaled) : scales_[level_];
+            }
+
+            ++level_;
+        }
+
+        return level_;
+    }
+
     /**
      *  @notice Decrease a node in the `FenwickTree` at an index.
      *  @dev    Starts at leaf/target and moved up towards root.
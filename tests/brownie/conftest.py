@@ -1,7 +1,13 @@
-import math
+import os
+import numpy as np
 import pytest
 from sdk import *
-from brownie import test, network, Contract, ERC20PoolFactory, ERC20Pool, PoolInfoUtils
+from sdk.book import BucketInfo, DEFAULT_PAGE_SIZE, DEPTH_PAGE_SIZE, depth_curve, lender_positions
+from sdk.gas_profile import GasProfile, load_baseline
+from sdk.heap_orders import iter_threshold_prices
+from sdk.metrics import PoolMetrics, format_metrics
+from sdk.prices import MAX_FENWICK_INDEX, index_of, price_at, price_to_index_safe
+from brownie import test, chain, network, Contract, ERC20PoolFactory, ERC20Pool, PoolInfoUtils
 from brownie.exceptions import VirtualMachineError
 from brownie.network.state import TxHistory
 from brownie.utils import color
@@ -10,6 +16,10 @@ AJNA_ADDRESS = "0x9a96ec9B57Fb64FbC60B423d1f4da7691Bd35079"
 MIN_PRICE = 99836282890
 MAX_PRICE = 1_004_968_987606512354182109771
 ZRO_ADD = '0x0000000000000000000000000000000000000000'
+# set AJNA_PROTOCOL_SNAPSHOTS=0 to redeploy the protocol for every test
+PROTOCOL_SNAPSHOTS = os.environ.get("AJNA_PROTOCOL_SNAPSHOTS", "1") != "0"
+# set AJNA_STATE_CACHE=1 to load prepared protocol from a chain state saved by previous runs (Anvil only)
+STATE_CACHE = os.environ.get("AJNA_STATE_CACHE", "0") == "1"
 
 @pytest.fixture(autouse=True)
 def get_capsys(capsys):
@@ -17,8 +27,13 @@ def get_capsys(capsys):
         TestUtils.capsys = capsys
 
 
+@pytest.fixture(scope="session")
+def ajna_protocol_snapshots() -> AjnaProtocolSnapshots:
+    return AjnaProtocolSnapshots(AJNA_ADDRESS, ProtocolStateCache() if STATE_CACHE else None)
+
+
 @pytest.fixture()
-def ajna_protocol() -> AjnaProtocol:
+def ajna_protocol(ajna_protocol_snapshots) -> AjnaProtocol:
     protocol_definition = (
         InitialProtocolStateBuilder()
         .add_token(MKR_ADDRESS, MKR_RESERVE_ADDRESS)
@@ -26,6 +41,10 @@ def ajna_protocol() -> AjnaProtocol:
         .add_token(DAI_ADDRESS, DAI_RESERVE_ADDRESS)
     )
 
+    if PROTOCOL_SNAPSHOTS:
+        # deployed once per session, every test starts from the snapshot taken after setup
+        return ajna_protocol_snapshots.get(protocol_definition.build())
+
     ajna_protocol = AjnaProtocol(AJNA_ADDRESS)
     ajna_protocol.get_runner().prepare_protocol_to_state_by_definition(
         protocol_definition.build()
@@ -105,67 +124,117 @@ class PoolHelper:
         self.loans = ajna_protocol.loans
         self.pool = pool
         self.pool_info_utils = ajna_protocol.pool_info_utils
+        self.pool_info_utils_multicall = ajna_protocol.pool_info_utils_multicall
+        self.quote_token_address = pool.quoteTokenAddress()
+        self.collateral_address = pool.collateralAddress()
+        # view results are reused until a transaction is sent or chain time moves
+        self.read_cache = ReadCache()
 
     def availableLiquidity(self):
-        quoteBalance = self.quoteToken().balanceOf(self.pool.address)
-        reserves = quoteBalance + self.debt() - self.pool.depositSize()
-        return quoteBalance - reserves;
+        return self.snapshot().available_liquidity
 
     def borrowerInfo(self, borrower_address):
         # returns (debt, collateral, t0NeutralPrice, thresholdPrice)
-        return self.pool_info_utils.borrowerInfo(self.pool.address, borrower_address)
+        return self._pool_info("borrowerInfo", borrower_address)
+
+    def borrowersInfo(self, borrowers):
+        # returns (debts, collaterals, t0NeutralPrices, thresholdPrices) as NumPy arrays indexed like borrowers, in a single call
+        addresses = tuple(getattr(borrower, "address", borrower) for borrower in borrowers)
+        return tuple(np.array(values, dtype=object) for values in self._pool_info("borrowersInfo", addresses))
 
     def bucketInfo(self, index):
-        # returns (index, price, quoteTokens, collateral, bucketLPs, scale, exchangeRate)
-        return self.pool_info_utils.bucketInfo(self.pool.address, index)
+        # returns (price, quoteTokens, collateral, bucketLPs, scale, exchangeRate)
+        return self._pool_info("bucketInfo", index)
+
+    def bucketsInfo(self, from_index, to_index):
+        # returns BucketInfo of buckets from_index..to_index in a single call, page ranges longer than DEFAULT_PAGE_SIZE
+        (buckets, _) = self._pool_info("bucketsInfo", from_index, to_index, to_index - from_index + 1)
+        return [BucketInfo(*bucket) for bucket in buckets]
 
     def collateralToken(self):
-        return Contract(self.pool.collateralAddress())
+        return Contract(self.collateral_address)
 
     def debt(self):
-        (debt, accruedDebt, debtInAuction, t0Debt2ToCollateral) = self.pool.debtInfo()
-        return debt
+        return self.snapshot().balances.debt
+
+    def depthCurve(self, from_index=0, to_index=MAX_FENWICK_INDEX, stride=1):
+        # returns (indexes, depositUpToIndex of each index) NumPy arrays, reused until chain state changes
+        return depth_curve(self.pool, from_index, to_index, stride, self.read_cache)
 
     def hpb(self):
-        (hpb, hpbIndex, htp, htpIndex, lup, lupIndex) = self.pool_info_utils.poolPricesInfo(self.pool.address)
-        return hpb
-    
+        return self.snapshot().prices.hpb
+
     def hpbIndex(self):
-        (hpb, hpbIndex, htp, htpIndex, lup, lupIndex) = self.pool_info_utils.poolPricesInfo(self.pool.address)
-        return hpbIndex
+        return self.snapshot().prices.hpb_index
 
     def htp(self):
-        (hpb, hpbIndex, htp, htpIndex, lup, lupIndex) = self.pool_info_utils.poolPricesInfo(self.pool.address)
-        return htp
+        return self.snapshot().prices.htp
 
     def indexToPrice(self, price_index: int):
-        return self.pool_info_utils.indexToPrice(price_index)
+        # same as PoolInfoUtils.indexToPrice, without RPC call
+        return price_at(price_index)
 
     def lenderInfo(self, index, lender_address):
         # returns (lpBalance, lastQuoteDeposit)
-        return self.pool.lenderInfo(index, lender_address)
+        return self._pool_view("lenderInfo", index, lender_address)
+
+    def lendersInfo(self, lenders, indexes):
+        # returns (LP balances, quote token values) as (lenders x indexes) NumPy arrays
+        return lender_positions(self.pool_info_utils, self.pool, lenders, indexes, self.read_cache)
 
     def loansInfo(self):
         # returns (poolSize, loansCount, maxBorrower, pendingInflator, pendingInterestFactor)
         # Not to be confused with pool.loansInfo which returns (maxBorrower, maxT0DebtToCollateral, noOfLoans)
-        return self.pool_info_utils.poolLoansInfo(self.pool.address)
+        return self.snapshot().loans
 
     def lup(self):
-        (hpb, hpbIndex, htp, htpIndex, lup, lupIndex) = self.pool_info_utils.poolPricesInfo(self.pool.address)
-        return lup
+        return self.snapshot().prices.lup
 
     def lupIndex(self):
-        (hpb, hpbIndex, htp, htpIndex, lup, lupIndex) = self.pool_info_utils.poolPricesInfo(self.pool.address)
-        return lupIndex
+        return self.snapshot().prices.lup_index
 
     def priceToIndex(self, price):
-        return self.pool_info_utils.priceToIndex(price)
+        # same as PoolInfoUtils.priceToIndex, without RPC call
+        return index_of(price)
 
     def quoteToken(self):
-        return Contract(self.pool.quoteTokenAddress())
+        return Contract(self.quote_token_address)
+
+    def snapshot(self) -> PoolSnapshot:
+        # pool details, prices and balances of current chain state, loaded in three RPC calls
+        return self.read_cache.get(
+            (self.pool.address, "snapshot"),
+            lambda: PoolSnapshot.load(
+                self.pool_info_utils_multicall, self.pool, self.quote_token_address, self.collateral_address
+            ),
+        )
 
     def utilizationInfo(self):
-        return self.pool_info_utils.poolUtilizationInfo(self.pool.address)
+        return self.snapshot().utilization
+
+    def _pool_info(self, method, *args):
+        return self.read_cache.call(self.pool_info_utils, method, self.pool.address, *args)
+
+    def _pool_view(self, method, *args):
+        return self.read_cache.call(self.pool, method, *args)
+
+    def gasContext(self, block_identifier):
+        # pool state at the end of a block: loans count, LUP index and number of funded buckets, read at that block
+        call = {"block_identifier": block_identifier}
+        (_, _, loans_count) = self.pool.loansInfo(**call)
+        lup_index = self.pool_info_utils.lupIndex(self.pool.address, **call)
+        hpb_index = self.pool_info_utils.hpbIndex(self.pool.address, **call)
+
+        # a bucket is funded where deposit up to its index grows, no bucket above HPB is
+        bucket_count = 0
+        previous_sum = 0
+        for start in range(hpb_index, MAX_FENWICK_INDEX + 1, DEPTH_PAGE_SIZE):
+            page = tuple(range(start, min(start + DEPTH_PAGE_SIZE, MAX_FENWICK_INDEX + 1)))
+            sums = self.pool.depositUpToIndexes(page, **call)
+            bucket_count += int(np.count_nonzero(np.diff(np.array([previous_sum, *sums], dtype=object)) > 0))
+            previous_sum = sums[-1]
+
+        return {"loans_count": loans_count, "lup_index": lup_index, "bucket_count": bucket_count}
 
     def get_origination_fee(self, amount):
         (interest_rate, _) = self.pool.interestRateInfo()
@@ -175,52 +244,21 @@ class PoolHelper:
         return fee_rate * amount / 10**18
 
     def price_to_index_safe(self, price):
-        if price < MIN_PRICE:
-            return self.pool_info_utils.priceToIndex(MIN_PRICE)
-        elif price > MAX_PRICE:
-            return self.pool_info_utils.priceToIndex(MAX_PRICE)
-        else:
-            return self.pool_info_utils.priceToIndex(price)
+        return price_to_index_safe(price)
 
 
 class LoansHeapUtils:
+    """
+    Threshold prices drawing the loans heap in the worst case of a `Loans` library function, see `sdk.heap_orders`.
+    """
+
     @staticmethod
-    def _worst_case(a, root, level, offset):
+    def threshold_prices(n, case="remove", scale=1, offset=0):
         """
-        Args:
-            a:      pre-allocated list in which we build up the values to insert in order
-            root:   index 0, max node, head
-            level:  depth of the tree being created
-            offset: value by which all elements will be offset
-
-        Returns:
-            mutated list
+        Streams threshold prices `offset + rank * scale` of `n` loans, ranks `1..n` in the insertion order of
+        the worst case of `case`: `bubble_up`, `bubble_down` or `remove`.
         """
-        if level == 0:
-            a[root] = offset
-            return offset + 1
-        else:
-            offset = LoansHeapUtils._worst_case(a, 2 * root + 1, level - 1, offset)
-            offset = LoansHeapUtils._worst_case(a, 2 * root + 2, level - 1, offset)
-            a[root] = offset
-            return offset + 1
-
-    @staticmethod
-    def _find_next_power_of_two(n):
-        return 2 ** (int(math.log(n - 1, 2)) + 1)
-
-    @staticmethod
-    def worst_case_heap_orientation(n, scale=1):
-        # build a larger tree which can hold all required nodes
-        tree_size = LoansHeapUtils._find_next_power_of_two(n)
-        a = [0] * tree_size
-        max_depth = int(math.log(tree_size, 2) - 1)
-        # populate the tree
-        LoansHeapUtils._worst_case(a, 0, max_depth, 0)
-        # scale the tree
-        a = list(map(lambda i: i * scale, a))
-        # return the first n elements
-        return a[:n]
+        return iter_threshold_prices(n, case, scale, offset)
 
 
 class TestUtils:
@@ -233,18 +271,41 @@ class TestUtils:
         return f"Gas amount: {gas}, Gas in ETH: {in_eth}, Gas price: ${in_fiat}"
 
     class GasWatcher(object):
+        """
+        Prints gas statistics of transactions sent inside the `with` block, per contract function.
+
+        Besides brownie averages, keeps the gas of every call in `profile` (a `GasProfile`) and prints p50 / p90 / p99.
+        With `context` (e.g. `pool_helper.gasContext`) each call is tagged with the pool state it ran against.
+        With `baseline`, percentiles are compared against the JSON baseline at that path and regressions above
+        `thresholds` fail the test; a missing baseline (or `update_baseline=True`) is written instead.
+        """
+
         _cache = {}
 
-        def __init__(self, method_names=None):
+        def __init__(self, method_names=None, context=None, baseline=None, thresholds=None, update_baseline=False):
             self._method_names = method_names
+            self._context = context
+            self._baseline = baseline
+            self._thresholds = thresholds
+            self._update_baseline = update_baseline
+            self._first_tx = 0
+            self.profile = None
+            self.regressions = []
 
         def __enter__(self):
+            self._first_tx = len(TxHistory())
             self._start_profiling()
-            return TestUtils.GasWatcher
+            return self
 
         def __exit__(self, exc_type, exc_value, exc_traceback):
+            self.profile = GasProfile.from_transactions(
+                list(TxHistory())[self._first_tx:], self._method_names, self._context
+            )
+            self._check_baseline()
             self._print()
             self._end_profiling()
+            if self.regressions and exc_type is None:
+                raise AssertionError("gas regressions: " + ", ".join(str(regression) for regression in self.regressions))
 
         # @notice print the gas statistics of the txs collected since last cleared
         def _print(self):
@@ -252,8 +313,21 @@ class TestUtils:
                 for line in self._build_cust_output():
                     print(line)
 
+                for line in self.profile.format():
+                    print(line)
+                for regression in self.regressions:
+                    print(f"{color('bright red')}gas regression{color} {regression}")
+
                 print("==================================")
 
+        def _check_baseline(self):
+            if self._baseline is None:
+                return
+            if os.path.exists(self._baseline) and not self._update_baseline:
+                self.regressions = self.profile.compare(load_baseline(self._baseline), self._thresholds)
+            else:
+                self.profile.save_baseline(self._baseline)
+
         def _filter_methods(self, gas):
             def by_methods(x):
                 contract, function = x[0].split(".", 1)
@@ -356,13 +430,12 @@ class TestUtils:
 
     @staticmethod
     def validate_pool(pool_helper, borrowers):
-        pool = pool_helper.pool
         poolDebt = pool_helper.debt()
 
         # if pool is collateralized...
         if pool_helper.lupIndex() > pool_helper.price_to_index_safe(pool_helper.htp()):
             # ...ensure debt is less than the size of the pool
-            assert poolDebt <= pool.depositSize()
+            assert poolDebt <= pool_helper.snapshot().balances.deposit_size
 
         # if there are no borrowers in the pool, ensure there is no debt
         (_, loansCount, _, inflator, interestFactor) = pool_helper.loansInfo()
@@ -373,24 +446,18 @@ class TestUtils:
         if loansCount > 0:
             assert poolDebt > 0
 
-        borrowers_with_debt = 0
-        for borrower in borrowers:
-            (debt, _, _, _) = pool_helper.borrowerInfo(borrower.address)
-            if debt > 0:
-                borrowers_with_debt += 1
+        (debts, _, _, _) = pool_helper.borrowersInfo(borrowers)
+        borrowers_with_debt = np.count_nonzero(debts > 0)
         assert borrowers_with_debt == loansCount
 
     @staticmethod
     def dump_book(pool_helper, with_headers=True, csv=False) -> str:
         """
         :param pool_helper:      simplifies interaction with pool contracts
-        :param min_bucket_index: highest-priced bucket from which to iterate downward in price
-        :param max_bucket_index: lowest-priced bucket
         :param with_headers:     print column headings
         :param csv:              export as CSV for importing into a spreadsheet
         :return:                 multi-line string
         """
-        pool = pool_helper.pool
 
         # formatting shortcuts
         w = 15
@@ -404,9 +471,7 @@ class TestUtils:
         lup_index = pool_helper.lupIndex()
         htp_index = pool_helper.price_to_index_safe(pool_helper.htp())
 
-        pledged_collateral = pool.pledgedCollateral()
-
-        min_bucket_index = max(0, pool_helper.priceToIndex(pool_helper.hpb()) - 3)  # HPB
+        min_bucket_index = max(0, pool_helper.hpbIndex() - 3)  # HPB
         max_bucket_index = min(7388, max(lup_index, htp_index) + 3) if htp_index < 7388 else max(7388, lup_index + 42)
         assert min_bucket_index < max_bucket_index
 
@@ -417,61 +482,53 @@ class TestUtils:
             else:
                 lines.append(j('Index') + j('Price') + j('Pointer') + j('Quote') + j('Collateral')
                              + j('LP Outstanding') + j('Scale'))
-        for i in range(min_bucket_index, max_bucket_index):
+        for i, bucket in TestUtils._iter_book(pool_helper, min_bucket_index, max_bucket_index - 1):
             price = pool_helper.indexToPrice(i)
             pointer = ""
             if i == lup_index:
                 pointer += "LUP"
             if i == htp_index:
                 pointer += "HTP"
-            try:
-                (
-                    _,
-                    bucket_quote,
-                    bucket_collateral,
-                    bucket_lpAccumulator,
-                    bucket_scale,
-                    _
-                ) = pool_helper.bucketInfo(i)
-            except VirtualMachineError as ex:
+            if bucket is None:
                 lines.append(f"ERROR retrieving bucket {i} at price {price} ({price / 1e18})")
                 continue
             if csv:
-                lines.append(','.join([j(str(i)), nw(price), pointer, nw(bucket_quote), nw(bucket_collateral),
-                                       nw(bucket_lpAccumulator), nw(bucket_scale)]))
+                lines.append(','.join([str(i), str(nw(price)), pointer, str(nw(bucket.quote_tokens)),
+                                       str(nw(bucket.collateral)), str(nw(bucket.bucket_lp)), str(nw(bucket.scale))]))
             else:
-                lines.append(''.join([j(str(i)), fw(price), j(pointer), fw(bucket_quote), fw(bucket_collateral),
-                                      fw(bucket_lpAccumulator), f"{nw(bucket_scale):>{w}.9f}"]))
+                lines.append(''.join([j(str(i)), fw(price), j(pointer), fw(bucket.quote_tokens), fw(bucket.collateral),
+                                      fw(bucket.bucket_lp), f"{nw(bucket.scale):>{w}.9f}"]))
         return '\n'.join(lines)
 
     @staticmethod
-    def summarize_pool(pool_helper):
-        pool = pool_helper.pool
-        poolDebt = pool_helper.debt()
+    def _iter_book(pool_helper, min_bucket_index, max_bucket_index):
+        # yields (index, BucketInfo) from min_bucket_index to max_bucket_index, BucketInfo is None for buckets which revert
+        for page_start in range(min_bucket_index, max_bucket_index + 1, DEFAULT_PAGE_SIZE):
+            page_end = min(page_start + DEFAULT_PAGE_SIZE - 1, max_bucket_index)
+            try:
+                for bucket in pool_helper.bucketsInfo(page_start, page_end):
+                    yield bucket.index, bucket
+            except VirtualMachineError:
+                # read the page bucket by bucket to find which ones revert
+                for i in range(page_start, page_end + 1):
+                    try:
+                        yield i, BucketInfo(i, *pool_helper.bucketInfo(i))
+                    except VirtualMachineError:
+                        yield i, None
+
+    @staticmethod
+    def summarize_pool(pool_helper, metrics: MetricsRecorder = None) -> PoolMetrics:
+        """
+        Records current pool state as a `PoolMetrics` row to `metrics`, prints it if no recorder is given.
+        """
+
+        snapshot = pool_helper.snapshot()
+        if metrics is not None:
+            return metrics.record_pool(snapshot, chain.time(), chain.height)
 
-        (_, poolCollateralization, poolActualUtilization, poolTargetUtilization) = pool_helper.utilizationInfo()
-        (_, loansCount, _, _, _) = pool_helper.loansInfo()
-        print(f"actual utlzn:   {poolActualUtilization/1e18:>12.1%}  "
-              f"target utlzn:   {poolTargetUtilization/1e18:>12.1%}  "
-              f"collateralization: {poolCollateralization/1e18:>9.1%}  "
-              f"borrowerDebt:   {poolDebt/1e18:>12.1f}  "
-              f"loan count:     {loansCount:>8}")
-
-        contract_quote_balance = pool_helper.quoteToken().balanceOf(pool)
-        reserves = contract_quote_balance + poolDebt - pool.depositSize()
-        pledged_collateral = pool.pledgedCollateral()
-        (interest_rate, _) = pool.interestRateInfo()
-        print(f"contract q bal: {contract_quote_balance/1e18:>12.1f}  "
-              f"deposit:        {pool.depositSize()/1e18:>12.1f}  "
-              f"reserves:       {reserves/1e18:>12.1f}  "
-              f"pledged:        {pool.pledgedCollateral()/1e18:>12.1f}  "
-              f"rate:           {interest_rate/1e18:>8.4%}")
-
-        lup = pool_helper.lup()
-        htp = pool_helper.htp()
-        poolCollateral = pool.pledgedCollateral()
-        print(f"lup:            {lup/1e18:>12.3f}  "
-              f"htp:            {htp/1e18:>12.3f}")
+        row = PoolMetrics.from_snapshot(snapshot, chain.time(), chain.height)
+        print(format_metrics(row))
+        return row
 
 
 @pytest.fixture
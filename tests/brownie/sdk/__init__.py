@@ -1,6 +1,21 @@
 from brownie import *
 from .ajna_protocol import *
+from .book import depth_curve, export_book, iter_buckets, lender_positions
+from .deposits import Deposits
+from .gas_profile import GasProfile, load_baseline
+from .gas_scaling import ScalingCurves, fit_complexity
+from .heap_orders import heap_order, iter_threshold_prices
+from .loans import Loans, iter_loans
+from .metrics import ConsoleSink, MetricsRecorder, metrics_sink
+from .pool_model import PoolModel, replay
+from .pool_snapshot import PoolSnapshot
 from .protocol_definition import *
+from .protocol_snapshots import AjnaProtocolSnapshots
+from .read_cache import ReadCache
+from .scheduler import ActorScheduler
+from .state_cache import ProtocolStateCache
+from .sweep import RunRecorder, SweepResults, run_sweep
+from .tx_pipeline import TransactionPipeline
 
 
 def create_empty_sdk():
@@ -135,3 +150,72 @@ def create_sdk_for_comp_dai_pool(number_of_lenders=10, number_of_borrowers=10):
         number_of_lenders,
         number_of_borrowers,
     )
+
+
+def create_sdk_for_mock_tokens_pool(
+    collateral_decimals=18,
+    quote_decimals=18,
+    number_of_lenders=10,
+    number_of_borrowers=10,
+):
+    """
+    Creates AjnaProtocol and deploys pool with locally deployed mock COLL/QUOTE tokens.
+    Does not need a mainnet fork, can be used with `--network development`.
+
+    Each lender starts with 10,000 QUOTE and each borrower starts with 10 COLL.
+    """
+
+    collateral = MockToken("COLL", collateral_decimals)
+    quote = MockToken("QUOTE", quote_decimals)
+
+    protocol_definition = (
+        InitialProtocolStateBuilder()
+        .add_token(collateral)
+        .add_token(quote)
+        .deploy_pool(collateral.symbol, quote.symbol)
+    )
+
+    (
+        protocol_definition.with_borrowers(number_of_borrowers)
+        .with_token(collateral.symbol, 10 * 10**collateral_decimals, approve_max=True)
+        .with_token(quote.symbol, 0, approve_max=True)
+        .add()
+    )
+
+    (
+        protocol_definition.with_lenders(number_of_lenders)
+        .with_token(quote.symbol, 10_000 * 10**quote_decimals, approve_max=True)
+        .add()
+    )
+
+    sdk = AjnaProtocol(AJNA_ADDRESS)
+    sdk.get_runner().prepare_protocol_to_state_by_definition(
+        protocol_definition.build()
+    )
+
+    return sdk
+
+
+def warm_fork_cache(protocol_definition: InitialProtocolState) -> AjnaProtocol:
+    """
+    Prepares AjnaProtocol by given definition and exercises every token once
+    (top up, approve and transfer), so the forked state needed by tests gets fetched.
+    Run against a pinned fork (AJNA_FORK_BLOCK) to persist it in the on-disk RPC cache.
+    """
+
+    sdk = AjnaProtocol(AJNA_ADDRESS)
+    sdk.get_runner().prepare_protocol_to_state_by_definition(protocol_definition)
+
+    sender = sdk.add_lender()
+    receiver = sdk.add_borrower()
+    for token_options in protocol_definition.tokens:
+        if isinstance(token_options, MockToken):
+            continue
+
+        token = sdk.get_token(token_options.token_address)
+        token.top_up(sender, 1)
+        token.approve_max(receiver, sender)
+        token.transfer(sender, receiver, 1)
+        token.balance(receiver)
+
+    return sdk
@@ -16,12 +16,14 @@ from brownie import (
     Maths,
     Loans,
     PoolInfoUtils,
+    PoolInfoUtilsMulticall,
 )
 from brownie.network.account import Accounts, LocalAccount
 
 from .protocol_definition import *
-from .erc20_token_client import ERC20TokenClient, DaiTokenClient
+from .erc20_token_client import ERC20TokenClient, DaiTokenClient, MockERC20TokenClient
 from .ajna_protocol_runner import AjnaProtocolRunner
+from .tx_pipeline import active_pipeline, deploy_all, transact
 
 
 class AjnaProtocol:
@@ -29,30 +31,142 @@ class AjnaProtocol:
     # keccak256("ERC20_NON_SUBSET_HASH")
     ERC20_POOL_HASH = "2263c4378b4920f0bef611a3ff22c506afa4745b3319c50b6d704a874990b8b2"
 
-    def __init__(self, ajna) -> None:
+    def __init__(self, ajna, *, manifest: dict = None) -> None:
+        """
+        Deploys Ajna libraries, PoolInfoUtils, PoolInfoUtilsMulticall and ERC20PoolFactory.
+
+        Args:
+            ajna: address of AJNA token
+            manifest: protocol already deployed on chain, as returned by `to_manifest`.
+            If set, nothing is deployed and SDK objects are attached to existing contracts and accounts.
+        """
+
         self._accounts = Accounts()
         self._tokens = {}
         self.deployer = self._accounts[0]
-
-        self.deposits = Deposits.deploy({"from": self.deployer})
-        self.pool_logic = PoolCommons.deploy({"from": self.deployer})
-        self.maths = Maths.deploy({"from": self.deployer})
-        self.loans = Loans.deploy({"from": self.deployer})
-        self.lender_actions = LenderActions.deploy({"from": self.deployer})
-        self.transfer_actions = LPActions.deploy({"from": self.deployer})
-        self.borrower_actions = BorrowerActions.deploy({"from": self.deployer})
-        self.kicker_actions = KickerActions.deploy({"from": self.deployer})
-        self.taker_auctions = TakerActions.deploy({"from": self.deployer})
-        self.settler_auctions = SettlerActions.deploy({"from": self.deployer})
-        self.pool_info_utils = PoolInfoUtils.deploy({"from": self.deployer})
-
-        self.ajna_factory = ERC20PoolFactory.deploy(ajna, {"from": self.deployer})
+        self.ajna_address = ajna
 
         self.pools: List[ERC20Pool] = []
         self.lenders = []
         self.borrowers = []
 
         self.protocol_runner = AjnaProtocolRunner(self)
+        self._snapshot = None
+
+        if manifest is not None:
+            self._attach(manifest)
+            return
+
+        # libraries have to be deployed before contracts linking them
+        libraries = deploy_all(
+            {
+                "deposits": (Deposits,),
+                "pool_logic": (PoolCommons,),
+                "maths": (Maths,),
+                "loans": (Loans,),
+                "lender_actions": (LenderActions,),
+                "transfer_actions": (LPActions,),
+                "borrower_actions": (BorrowerActions,),
+                "kicker_actions": (KickerActions,),
+                "taker_auctions": (TakerActions,),
+                "settler_auctions": (SettlerActions,),
+            },
+            self.deployer,
+        )
+        contracts = deploy_all(
+            {
+                "pool_info_utils": (PoolInfoUtils,),
+                "ajna_factory": (ERC20PoolFactory, ajna),
+            },
+            self.deployer,
+        )
+
+        contracts.update(
+            deploy_all(
+                {"pool_info_utils_multicall": (PoolInfoUtilsMulticall, contracts["pool_info_utils"])},
+                self.deployer,
+            )
+        )
+
+        for name, contract in {**libraries, **contracts}.items():
+            setattr(self, name, contract)
+
+    @staticmethod
+    def _deployed_contracts() -> dict:
+        """
+        Returns contract containers of contracts deployed by AjnaProtocol, by attribute name.
+        """
+
+        return {
+            "deposits": Deposits,
+            "pool_logic": PoolCommons,
+            "maths": Maths,
+            "loans": Loans,
+            "lender_actions": LenderActions,
+            "transfer_actions": LPActions,
+            "borrower_actions": BorrowerActions,
+            "kicker_actions": KickerActions,
+            "taker_auctions": TakerActions,
+            "settler_auctions": SettlerActions,
+            "pool_info_utils": PoolInfoUtils,
+            "pool_info_utils_multicall": PoolInfoUtilsMulticall,
+            "ajna_factory": ERC20PoolFactory,
+        }
+
+    def to_manifest(self) -> dict:
+        """
+        Returns JSON serializable description of protocol deployed on chain:
+        contract addresses, pools, token clients and private keys of lenders and borrowers.
+        Used together with a chain state dump to restore AjnaProtocol without deploying it again.
+        """
+
+        tokens = []
+        for key, token in self._tokens.items():
+            tokens.append(
+                {
+                    "key": key,
+                    "address": token.token_address,
+                    "reserve": token.reserve_address,
+                    "client": type(token).__name__,
+                    "symbol": getattr(token, "symbol", None),
+                    "decimals": getattr(token, "decimals", None),
+                }
+            )
+
+        return {
+            "ajna": self.ajna_address,
+            "contracts": {
+                name: getattr(self, name).address
+                for name in self._deployed_contracts()
+            },
+            "pools": [pool.address for pool in self.pools],
+            "tokens": tokens,
+            "lenders": [lender.private_key for lender in self.lenders],
+            "borrowers": [borrower.private_key for borrower in self.borrowers],
+        }
+
+    def _attach(self, manifest: dict) -> None:
+        for name, container in self._deployed_contracts().items():
+            setattr(self, name, container.at(manifest["contracts"][name]))
+
+        self.pools = [ERC20Pool.at(address) for address in manifest["pools"]]
+
+        clients = {}
+        for token in manifest["tokens"]:
+            address = token["address"]
+            if address not in clients:
+                if token["client"] == MockERC20TokenClient.__name__:
+                    clients[address] = MockERC20TokenClient(
+                        token["symbol"], token["decimals"], self.deployer, address=address
+                    )
+                elif token["client"] == DaiTokenClient.__name__:
+                    clients[address] = DaiTokenClient(address, token["reserve"])
+                else:
+                    clients[address] = ERC20TokenClient(address, token["reserve"])
+            self._tokens[token["key"]] = clients[address]
+
+        self.lenders = [self._accounts.add(key) for key in manifest["lenders"]]
+        self.borrowers = [self._accounts.add(key) for key in manifest["borrowers"]]
 
     def get_runner(self) -> AjnaProtocolRunner:
         """
@@ -60,6 +174,48 @@ class AjnaProtocol:
         """
         return self.protocol_runner
 
+    def snapshot(self) -> int:
+        """
+        Takes a chain snapshot of the current protocol state.
+        Pools, token clients, lenders and borrowers known at this point are restored by `revert`.
+
+        Returns:
+            snapshot id
+        """
+
+        snapshot_id = rpc.snapshot()
+        self._snapshot = (
+            snapshot_id,
+            list(self.pools),
+            dict(self._tokens),
+            list(self.lenders),
+            list(self.borrowers),
+        )
+        return snapshot_id
+
+    def revert(self) -> int:
+        """
+        Reverts chain to the snapshot taken by `snapshot` and forgets pools, token clients,
+        lenders and borrowers added since. The snapshot is retaken so `revert` can be called again.
+
+        Returns:
+            new snapshot id
+        """
+
+        if self._snapshot is None:
+            raise Exception("No snapshot taken. Call `snapshot` first")
+
+        (snapshot_id, pools, tokens, lenders, borrowers) = self._snapshot
+        snapshot_id = chain._revert(snapshot_id)
+
+        self.pools = list(pools)
+        self._tokens = dict(tokens)
+        self.lenders = list(lenders)
+        self.borrowers = list(borrowers)
+
+        self._snapshot = (snapshot_id, pools, tokens, lenders, borrowers)
+        return snapshot_id
+
     def deploy_erc20_pool(
         self, collateral_address, quote_token_address, interest_rate=0.05 * 1e18
     ) -> ERC20Pool:
@@ -76,16 +232,20 @@ class AjnaProtocol:
             Pool
         """
 
-        deploy_tx = self.ajna_factory.deployPool(
+        collateral_address = self.get_token_address(collateral_address)
+        quote_token_address = self.get_token_address(quote_token_address)
+
+        transact(
+            self.ajna_factory.deployPool,
             collateral_address,
             quote_token_address,
             interest_rate,
-            {"from": self.deployer},
+            sender=self.deployer,
+            failure_message=f"Failed to deploy pool collateral {collateral_address} - quote {quote_token_address}",
         )
-        if bool(deploy_tx.revert_msg):
-            raise Exception(
-                f"Failed to deploy pool collateral {collateral_address} - quote {quote_token_address}. Revert reason: {deploy_tx.revert_msg}"
-            )
+        if active_pipeline() is not None:
+            # pool address is needed right away
+            active_pipeline().barrier()
 
         pool_address = self.ajna_factory.deployedPools(
             self.ERC20_POOL_HASH,
@@ -114,6 +274,32 @@ class AjnaProtocol:
                 token_address, reserve_address
             )
 
+    def add_mock_token(self, symbol: str, decimals: int = 18) -> MockERC20TokenClient:
+        """
+        Deploys local mintable ERC20 token and adds it to AjnaProtocol as an ERC20 token client.
+        Token can be retrieved later by its symbol or its address.
+
+        Args:
+            symbol: symbol of the token
+            decimals: number of token decimals
+        """
+
+        token = MockERC20TokenClient(symbol, decimals, self.deployer)
+        self._tokens[token.token_address.lower()] = token
+        self._tokens[symbol.lower()] = token
+        return token
+
+    def get_token_address(self, token: str) -> str:
+        """
+        Returns address of the token referenced by address or by mock token symbol.
+
+        Args:
+            token: ERC20 token address or symbol of token added with `add_mock_token`
+        """
+
+        token_client = self._tokens.get(token.lower())
+        return token_client.token_address if token_client else token
+
     def add_borrower(self, *, borrower: LocalAccount = None) -> LocalAccount:
         """
         Adds borrower to AjnaProtocol.
@@ -156,6 +342,9 @@ class AjnaProtocol:
             Pool
         """
 
+        collateral_address = self.get_token_address(collateral_address)
+        quote_token_address = self.get_token_address(quote_token_address)
+
         pool_address = self.ajna_factory.deployedPools(
             self.ERC20_POOL_HASH,
             collateral_address,
@@ -205,10 +394,10 @@ class AjnaProtocol:
     def get_token(self, token_address: str) -> ERC20TokenClient:
         """
         Returns ERC20 token client for given token address.
-        It has to be added to AjnaProtocol first using `add_token` method.
+        It has to be added to AjnaProtocol first using `add_token` or `add_mock_token` method.
 
         Args:
-            token_address: ERC20 token address
+            token_address: ERC20 token address, or symbol of mock token
 
         Returns:
             ERC20TokenClient
@@ -5,7 +5,9 @@ from brownie import (
     Contract,
 )
 
+from .prices import price_at
 from .protocol_definition import *
+from .tx_pipeline import TransactionPipeline, active_pipeline
 
 
 class AjnaProtocolRunner:
@@ -34,17 +36,21 @@ class AjnaProtocolRunner:
             else InitialProtocolState.DEFAULT()
         )
 
-        self.deploy_pools_according_by_definition(options)
+        if options.pipelined_transactions and active_pipeline() is None:
+            with TransactionPipeline():
+                self._prepare_protocol(options)
+        else:
+            self._prepare_protocol(options)
+
+    def _prepare_protocol(self, options: InitialProtocolState):
+        # mock tokens have to be deployed before pools using them
         self.create_erc20_token_clients_by_definition(options)
-        self.prepare_lenders_by_definition(protocol_definition)
-        self.prepare_borrowers_by_definition(protocol_definition)
+        self.deploy_pools_according_by_definition(options)
+        self.prepare_lenders_by_definition(options)
+        self.prepare_borrowers_by_definition(options)
 
-        self.perform_lenders_initial_pool_interactions_by_definition(
-            protocol_definition
-        )
-        self.perform_borrowers_initial_pool_interactions_by_definition(
-            protocol_definition
-        )
+        self.perform_lenders_initial_pool_interactions_by_definition(options)
+        self.perform_borrowers_initial_pool_interactions_by_definition(options)
 
     def create_erc20_token_clients_by_definition(
         self, protocol_definition: InitialProtocolState
@@ -53,11 +59,17 @@ class AjnaProtocolRunner:
         Creates ERC20TokenClient for each tokens defined in protocol_definition.
         Token clients are used to simplify interaction with standard ERC20 tokens.
         Token clients define reserve account that can be used to top up token balance for any Ajna user.
+        Mock tokens are deployed locally and topped up by minting.
         """
         for token_options in protocol_definition.tokens:
-            self.protocol.add_token(
-                token_options.token_address, token_options.reserve_address
-            )
+            if isinstance(token_options, MockToken):
+                self.protocol.add_mock_token(
+                    token_options.symbol, token_options.decimals
+                )
+            else:
+                self.protocol.add_token(
+                    token_options.token_address, token_options.reserve_address
+                )
 
     def deploy_pools_according_by_definition(
         self, protocol_definition: InitialProtocolState
@@ -82,14 +94,9 @@ class AjnaProtocolRunner:
 
         for borrower_options in protocol_definition.borrowers:
             borrower = self.protocol.add_borrower()
-
-            for token_options in borrower_options.token_balances:
-                token = self.protocol.get_token(token_options.token_address)
-                token.top_up(borrower, token_options.amount)
-
-                if token_options.approve_max:
-                    for pool in self.protocol.pools:
-                        token.approve_max(pool.get_contract(), borrower)
+            self._fund_user(
+                borrower, borrower_options, protocol_definition.storage_funding
+            )
 
     def prepare_lenders_by_definition(self, protocol_definition: InitialProtocolState):
         """
@@ -102,14 +109,27 @@ class AjnaProtocolRunner:
 
         for lender_options in protocol_definition.lenders:
             lender = self.protocol.add_lender()
+            self._fund_user(lender, lender_options, protocol_definition.storage_funding)
+
+    def _fund_user(self, user, user_options: AjnaUser, storage_funding: bool):
+        """
+        Tops up user token balances and approves pools as defined in user_options.
+        Writes balances and allowances to token storage if storage_funding is set, otherwise sends transactions from token reserve.
+        """
+        for token_options in user_options.token_balances:
+            token = self.protocol.get_token(token_options.token_address)
 
-            for token_options in lender_options.token_balances:
-                token = self.protocol.get_token(token_options.token_address)
-                token.top_up(lender, token_options.amount)
+            if storage_funding:
+                token.top_up_in_storage(user, token_options.amount)
+            else:
+                token.top_up(user, token_options.amount)
 
-                if token_options.approve_max:
-                    for pool in self.protocol.pools:
-                        token.approve_max(pool.get_contract(), lender)
+            if token_options.approve_max:
+                for pool in self.protocol.pools:
+                    if storage_funding:
+                        token.approve_max_in_storage(pool.get_contract(), user)
+                    else:
+                        token.approve_max(pool.get_contract(), user)
 
     def perform_lenders_initial_pool_interactions_by_definition(
         self, protocol_definition: InitialProtocolState
@@ -154,7 +174,7 @@ class AjnaProtocolRunner:
                 min_price_index = quote_deposits_definition.min_deposit_price_index
                 max_price_index = quote_deposits_definition.max_deposit_price_index
                 price_index = random.randrange(min_price_index, max_price_index)
-                price = self.protocol.bucket_math.indexToPrice(price_index)
+                price = price_at(price_index)
 
                 pool.deposit_quote_token(amount, price, lender_index)
 
@@ -0,0 +1,224 @@
+"""
+Reads pool buckets in pages with `PoolInfoUtils.bucketsInfo`, one `eth_call` per page instead of one per bucket,
+and exports them as CSV or Arrow. Reads deposit depth curves with `Pool.depositUpToIndexes` and lender
+positions with `PoolInfoUtils.lendersInfo`.
+"""
+
+import csv
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from .prices import MAX_FENWICK_INDEX
+
+# ~20k gas per bucket, a page stays well within default `eth_call` gas caps
+DEFAULT_PAGE_SIZE = 500
+# prefix sums per `depositUpToIndexes` call, a page of ascending indexes touches at most a few thousand tree nodes
+DEPTH_PAGE_SIZE = 1_024
+# lender x bucket cells per `lendersInfo` call, ~5k gas per cell
+POSITIONS_PAGE_SIZE = 2_000
+
+
+class BucketInfo(NamedTuple):
+    index: int
+    price: int
+    quote_tokens: int
+    collateral: int
+    bucket_lp: int
+    scale: int
+    exchange_rate: int
+
+
+def iter_bucket_pages(
+    pool_info_utils,
+    pool,
+    from_index: int = 0,
+    to_index: int = MAX_FENWICK_INDEX,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[list]:
+    """
+    Yields buckets from `from_index` to `to_index` (included), a list of `BucketInfo` per `bucketsInfo` call.
+
+    Args:
+        pool_info_utils: deployed PoolInfoUtils
+        pool: address of the pool or pool contract
+        page_size: buckets read per call
+    """
+
+    if page_size <= 0:
+        raise ValueError(f"page_size must be positive: {page_size}")
+
+    pool_address = getattr(pool, "address", pool)
+    next_index = from_index
+    while next_index <= min(to_index, MAX_FENWICK_INDEX):
+        buckets, next_index = pool_info_utils.bucketsInfo(pool_address, next_index, to_index, page_size)
+        yield [BucketInfo(*bucket) for bucket in buckets]
+
+
+def iter_buckets(
+    pool_info_utils,
+    pool,
+    from_index: int = 0,
+    to_index: int = MAX_FENWICK_INDEX,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[BucketInfo]:
+    """
+    Yields `BucketInfo` of each bucket from `from_index` to `to_index` (included), reading them page by page.
+    """
+
+    for page in iter_bucket_pages(pool_info_utils, pool, from_index, to_index, page_size):
+        yield from page
+
+
+def depth_curve(
+    pool,
+    from_index: int = 0,
+    to_index: int = MAX_FENWICK_INDEX,
+    stride: int = 1,
+    read_cache=None,
+    page_size: int = DEPTH_PAGE_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns cumulative deposit above each price: `depositUpToIndex` of every `stride`-th index from `from_index`
+    to `to_index`, read with `pool.depositUpToIndexes` in ascending pages that share tree traversal.
+
+    Args:
+        pool: pool contract
+        read_cache: `ReadCache` reusing pages already read in current chain state, e.g. `PoolHelper.read_cache`
+
+    Returns:
+        indexes (int64 array) and deposit up to each index (object array of WAD ints)
+    """
+
+    indexes = np.arange(from_index, min(to_index, MAX_FENWICK_INDEX) + 1, stride, dtype=np.int64)
+    sums = np.empty(len(indexes), dtype=object)
+
+    for start in range(0, len(indexes), page_size):
+        page = tuple(int(index) for index in indexes[start : start + page_size])
+        if read_cache is not None:
+            sums[start : start + len(page)] = read_cache.call(pool, "depositUpToIndexes", page)
+        else:
+            sums[start : start + len(page)] = pool.depositUpToIndexes(page)
+
+    return indexes, sums
+
+
+def lender_positions(
+    pool_info_utils,
+    pool,
+    lenders: Sequence,
+    indexes: Sequence[int],
+    read_cache=None,
+    page_size: int = POSITIONS_PAGE_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns `LP` balance and quote token value (`lpToQuoteTokens`) of every lender in every bucket,
+    read with `PoolInfoUtils.lendersInfo` a few lenders at a time.
+
+    Args:
+        pool: address of the pool or pool contract
+        lenders: accounts or addresses (rows)
+        indexes: bucket indexes (columns)
+        read_cache: `ReadCache` reusing pages already read in current chain state
+        page_size: matrix cells read per call
+
+    Returns:
+        two (lenders x buckets) object arrays of WAD ints: LP balances and their quote token value
+    """
+
+    pool_address = getattr(pool, "address", pool)
+    lenders = tuple(getattr(lender, "address", lender) for lender in lenders)
+    indexes = tuple(int(index) for index in indexes)
+
+    lps = np.zeros((len(lenders), len(indexes)), dtype=object)
+    quote_tokens = np.zeros((len(lenders), len(indexes)), dtype=object)
+    if not indexes:
+        return lps, quote_tokens
+
+    rows = max(1, page_size // len(indexes))
+    for start in range(0, len(lenders), rows):
+        page = lenders[start : start + rows]
+        args = (pool_address, page, indexes)
+        if read_cache is not None:
+            page_lps, page_quote_tokens = read_cache.call(pool_info_utils, "lendersInfo", *args)
+        else:
+            page_lps, page_quote_tokens = pool_info_utils.lendersInfo(*args)
+
+        lps[start : start + len(page)] = np.array(page_lps, dtype=object).reshape(len(page), len(indexes))
+        quote_tokens[start : start + len(page)] = np.array(page_quote_tokens, dtype=object).reshape(len(page), len(indexes))
+
+    return lps, quote_tokens
+
+
+def export_book(
+    pool_info_utils,
+    pool,
+    path,
+    from_index: int = 0,
+    to_index: int = MAX_FENWICK_INDEX,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    skip_empty: bool = True,
+) -> int:
+    """
+    Writes buckets of `pool` to `path`, page by page, so the full book is never held in memory.
+    Format follows the file extension: `.arrow` writes an Arrow IPC file (needs `pyarrow`), anything else CSV.
+    Values are exact WAD integers.
+
+    Args:
+        skip_empty: leave out buckets without quote tokens, collateral nor LP
+
+    Returns:
+        number of rows written
+    """
+
+    pages = iter_bucket_pages(pool_info_utils, pool, from_index, to_index, page_size)
+    if skip_empty:
+        pages = ([bucket for bucket in page if _has_liquidity(bucket)] for page in pages)
+
+    path = Path(path)
+    if path.suffix == ".arrow":
+        return _write_arrow(path, pages)
+    return _write_csv(path, pages)
+
+
+def _has_liquidity(bucket: BucketInfo) -> bool:
+    return bucket.quote_tokens != 0 or bucket.collateral != 0 or bucket.bucket_lp != 0
+
+
+def _write_csv(path: Path, pages: Iterable[list]) -> int:
+    rows = 0
+    with path.open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(BucketInfo._fields)
+        for page in pages:
+            writer.writerows(page)
+            rows += len(page)
+    return rows
+
+
+def _write_arrow(path: Path, pages: Iterable[list]) -> int:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Arrow export needs pyarrow, install it or export to CSV") from e
+
+    # WAD values overflow int64, decimal keeps them exact
+    value_type = pa.decimal256(76, 0)
+    schema = pa.schema(
+        [pa.field("index", pa.int32())]
+        + [pa.field(name, value_type) for name in BucketInfo._fields[1:]]
+    )
+
+    rows = 0
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for page in pages:
+            if not page:
+                continue
+            indexes, *values = zip(*page)
+            arrays = [pa.array(indexes, type=pa.int32())]
+            arrays += [pa.array([Decimal(value) for value in column], type=value_type) for column in values]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            rows += len(page)
+    return rows
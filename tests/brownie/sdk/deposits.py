@@ -0,0 +1,475 @@
+"""
+Python mirror of `src/libraries/internal/Deposits.sol`, the scaled Fenwick tree holding pool deposits.
+
+Tree is backed by NumPy arrays of Python ints, so every operation is bit exact with the on-chain library,
+rounding included. Besides the one-index-at-a-time operations of the library, `Deposits` answers for many
+indices or sums at once (`prefix_sums`, `values_at`, `find_indexes_of_sums`, `get_lups`) and ingests many
+deposits at once (`bulk_add`), walking the tree one level at a time for all of them.
+"""
+
+from typing import Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .maths import WAD, floor_wmul, mul_div, wdiv, wmul
+from .prices import MAX_FENWICK_INDEX, price_at
+
+# max index supported in the Fenwick tree
+SIZE = 8192
+# most significant bit of indexes in the tree
+MSB = 4096
+
+
+class InvalidAmount(Exception):
+    """
+    Raised where `Deposits` library reverts with `InvalidAmount()`.
+    """
+
+
+class Deposits:
+    """
+    Deposits Fenwick tree, `values` and `scaling` arrays are laid out as in `DepositsState` storage.
+
+    Indexes passed to methods are deposit (bucket) indexes, starting at 0 as in the pool contracts.
+    """
+
+    def __init__(self) -> None:
+        self.values = np.zeros(SIZE + 1, dtype=object)
+        self.scaling = np.zeros(SIZE + 1, dtype=object)
+
+    @classmethod
+    def from_deposits(cls, deposits: Mapping[int, int]) -> "Deposits":
+        """
+        Returns tree holding given deposits, as if each was added to an empty tree.
+
+        Tree built from per bucket deposits read from a pool (e.g. `PoolInfoUtils.bucketInfo`) holds
+        the same values, but can round differently than the pool tree once interest was scaled in.
+
+        Args:
+            deposits: deposit amount by bucket index
+        """
+
+        tree = cls()
+        deposits = {index: amount for index, amount in deposits.items() if amount != 0}
+        if deposits:
+            tree.bulk_add(list(deposits.keys()), list(deposits.values()))
+        return tree
+
+    def copy(self) -> "Deposits":
+        tree = Deposits()
+        tree.values = self.values.copy()
+        tree.scaling = self.scaling.copy()
+        return tree
+
+    # ------------------------------------------------------------------
+    # Library functions
+    # ------------------------------------------------------------------
+
+    def unscaled_add(self, index: int, unscaled_add_amount: int) -> None:
+        if unscaled_add_amount == 0:
+            raise InvalidAmount()
+
+        index += 1
+        while index <= SIZE:
+            value = self.values[index]
+            scaling = self.scaling[index]
+            new_value = value + unscaled_add_amount
+
+            if scaling != 0:
+                unscaled_add_amount = wmul(new_value, scaling) - wmul(value, scaling)
+
+            self.values[index] = new_value
+            index += lsb(index)
+
+    def unscaled_remove(self, index: int, unscaled_remove_amount: int) -> None:
+        if unscaled_remove_amount == 0:
+            raise InvalidAmount()
+
+        index += 1
+        # new values are checked before any is written, on-chain underflow reverts the whole call
+        updates = []
+        while index <= SIZE:
+            value = self.values[index] - unscaled_remove_amount
+            if value < 0:
+                raise ArithmeticError(f"Deposits underflow at node {index}")
+
+            scaling = self.scaling[index]
+            if scaling != 0:
+                unscaled_remove_amount = wmul(value + unscaled_remove_amount, scaling) - wmul(value, scaling)
+
+            updates.append((index, value))
+            index += lsb(index)
+
+        for index, value in updates:
+            self.values[index] = value
+
+    def mult(self, index: int, factor: int) -> None:
+        index += 1
+
+        sum_ = 0
+        bit = lsb(index)
+        while bit <= SIZE:
+            if bit & index != 0:
+                value = self.values[index]
+                scaling = self.scaling[index]
+
+                if scaling != 0:
+                    scaled_factor = wmul(factor, scaling)
+                    sum_ += wmul(scaled_factor, value) - wmul(scaling, value)
+                    self.scaling[index] = scaled_factor
+                else:
+                    sum_ += wmul(factor, value) - value
+                    self.scaling[index] = factor
+
+                index -= bit
+            else:
+                super_range_index = index + bit
+
+                self.values[super_range_index] += sum_
+                value = self.values[super_range_index]
+                scaling = self.scaling[super_range_index]
+
+                if scaling != 0:
+                    sum_ = wmul(value, scaling) - wmul(value - sum_, scaling)
+
+            bit <<= 1
+
+    def scale(self, index: int) -> int:
+        index += 1
+
+        scaled = WAD
+        while index <= SIZE:
+            scaling = self.scaling[index]
+            if scaling != 0:
+                scaled = wmul(scaled, scaling)
+            index += lsb(index)
+
+        return scaled
+
+    def prefix_sum(self, sum_index: int) -> int:
+        if sum_index >= SIZE:
+            # on-chain loop never terminates for such index
+            raise IndexError(f"prefix sum index {sum_index} out of tree")
+
+        sum_index += 1
+
+        running_scale = WAD
+        j = SIZE
+        index = 0
+        index_lsb = lsb(sum_index)
+        sum_ = 0
+
+        while j >= index_lsb:
+            cur_index = index + j
+            scaled = self.scaling[cur_index]
+
+            if sum_index & j != 0:
+                value = self.values[cur_index]
+                sum_ += (
+                    mul_div(running_scale * scaled, value, 10**36)
+                    if scaled != 0
+                    else wmul(running_scale, value)
+                )
+
+                index = cur_index
+                if index == sum_index:
+                    break
+            elif scaled != 0:
+                running_scale = floor_wmul(running_scale, scaled)
+
+            j >>= 1
+
+        return sum_
+
+    def find_index_and_sum_of_sum(self, target_sum: int) -> Tuple[int, int, int]:
+        """
+        Returns index of the first bucket where prefix sum EXCEEDS `target_sum`,
+        along with sum and scale of the bucket preceding it.
+        """
+
+        i = MSB
+        running_scale = WAD
+
+        sum_index = 0
+        sum_index_sum = 0
+        sum_index_scale = 0
+        lower_index_sum = 0
+
+        while i > 0:
+            cur_index = sum_index + i
+            value = self.values[cur_index]
+            scaling = self.scaling[cur_index]
+
+            scaled_value = lower_index_sum + (
+                mul_div(running_scale * scaling, value, 10**36)
+                if scaling != 0
+                else wmul(running_scale, value)
+            )
+
+            if scaled_value < target_sum:
+                if cur_index <= MAX_FENWICK_INDEX:
+                    sum_index = cur_index
+                    lower_index_sum = scaled_value
+            else:
+                if scaling != 0:
+                    running_scale = floor_wmul(running_scale, scaling)
+
+                sum_index_sum = scaled_value
+                sum_index_scale = running_scale
+
+            i >>= 1
+
+        return sum_index, sum_index_sum, sum_index_scale
+
+    def find_index_of_sum(self, sum_: int) -> int:
+        return self.find_index_and_sum_of_sum(sum_)[0]
+
+    def tree_sum(self) -> int:
+        return self.values[SIZE]
+
+    def value_at(self, index: int) -> int:
+        return wmul(self.unscaled_value_at(index), self.scale(index))
+
+    def unscaled_value_at(self, index: int) -> int:
+        index += 1
+
+        j = 1
+        unscaled_deposit_value = self.values[index]
+        while j & index == 0:
+            cur_index = index - j
+            value = self.values[cur_index]
+            scaling = self.scaling[cur_index]
+
+            unscaled_deposit_value -= wmul(scaling, value) if scaling != 0 else value
+            j <<= 1
+
+        return unscaled_deposit_value
+
+    def get_lup(self, debt: int) -> int:
+        """
+        Returns LUP for given debt, i.e. price of the bucket where `debt` is covered by deposits above it.
+        """
+
+        return price_at(self.find_index_of_sum(debt))
+
+    # ------------------------------------------------------------------
+    # FenwickTreeInstance helpers, amounts are scaled
+    # ------------------------------------------------------------------
+
+    def add(self, index: int, amount: int) -> None:
+        self.unscaled_add(index, wdiv(amount, self.scale(index)))
+
+    def remove(self, index: int, amount: int) -> None:
+        self.unscaled_remove(index, wdiv(amount, self.scale(index)))
+
+    def obliterate(self, index: int) -> None:
+        self.unscaled_remove(index, self.unscaled_value_at(index))
+
+    # ------------------------------------------------------------------
+    # Bulk operations, exact same results as calling the library for each index
+    # ------------------------------------------------------------------
+
+    def scales(self, indexes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Returns `scale` of each given index, of every index in tree if not set.
+        """
+
+        nodes = _nodes(indexes)
+        scaled = np.full(len(nodes), WAD, dtype=object)
+
+        active = nodes <= SIZE
+        while active.any():
+            scaling = self.scaling[nodes[active]]
+            scaled[active] = np.where(
+                scaling != 0, wmul(scaled[active], scaling), scaled[active]
+            )
+            nodes[active] += lsb(nodes[active])
+            active = nodes <= SIZE
+
+        return scaled
+
+    def unscaled_values_at(self, indexes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Returns `unscaled_value_at` of each given index, of every index in tree if not set.
+        """
+
+        nodes = _nodes(indexes)
+        unscaled = self.values[nodes]
+
+        j = 1
+        active = (nodes & j) == 0
+        while active.any():
+            children = nodes[active] - j
+            value = self.values[children]
+            scaling = self.scaling[children]
+            unscaled[active] -= np.where(scaling != 0, wmul(scaling, value), value)
+
+            j <<= 1
+            active &= (nodes & j) == 0
+
+        return unscaled
+
+    def values_at(self, indexes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Returns `value_at` of each given index, of every index in tree if not set.
+        """
+
+        return wmul(self.unscaled_values_at(indexes), self.scales(indexes))
+
+    def prefix_sums(self, indexes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Returns `prefix_sum` of each given index, of every index in tree if not set.
+        """
+
+        sum_indexes = _nodes(indexes)
+        if (sum_indexes > SIZE).any():
+            raise IndexError("prefix sum index out of tree")
+
+        count = len(sum_indexes)
+        running_scale = np.full(count, WAD, dtype=object)
+        sums = np.zeros(count, dtype=object)
+        index = np.zeros(count, dtype=np.int64)
+        index_lsb = lsb(sum_indexes)
+
+        j = SIZE
+        while j >= 1:
+            active = j >= index_lsb
+            if not active.any():
+                break
+
+            # indexes already summed are kept in tree bounds, their values are not used
+            cur_index = np.minimum(index + j, SIZE)
+            scaled = self.scaling[cur_index]
+
+            included = active & ((sum_indexes & j) != 0)
+            if included.any():
+                value = self.values[cur_index[included]]
+                scale = running_scale[included]
+                scaling = scaled[included]
+                sums[included] += np.where(
+                    scaling != 0,
+                    mul_div(scale * scaling, value, 10**36),
+                    wmul(scale, value),
+                )
+                index[included] = cur_index[included]
+
+            excluded = active & ~included & (scaled != 0)
+            if excluded.any():
+                running_scale[excluded] = floor_wmul(running_scale[excluded], scaled[excluded])
+
+            j >>= 1
+
+        return sums
+
+    def find_indexes_of_sums(self, target_sums: Sequence[int]) -> np.ndarray:
+        """
+        Returns `find_index_of_sum` of each given sum.
+        """
+
+        target_sums = np.asarray(target_sums, dtype=object)
+        count = len(target_sums)
+
+        running_scale = np.full(count, WAD, dtype=object)
+        lower_index_sum = np.zeros(count, dtype=object)
+        sum_index = np.zeros(count, dtype=np.int64)
+
+        i = MSB
+        while i > 0:
+            cur_index = sum_index + i
+            value = self.values[cur_index]
+            scaling = self.scaling[cur_index]
+
+            scaled_value = lower_index_sum + np.where(
+                scaling != 0,
+                mul_div(running_scale * scaling, value, 10**36),
+                wmul(running_scale, value),
+            )
+
+            below = (scaled_value < target_sums).astype(bool)
+            step = below & (cur_index <= MAX_FENWICK_INDEX)
+            sum_index[step] = cur_index[step]
+            lower_index_sum[step] = scaled_value[step]
+
+            rescale = ~below & (scaling != 0)
+            running_scale[rescale] = floor_wmul(running_scale[rescale], scaling[rescale])
+
+            i >>= 1
+
+        return sum_index
+
+    def get_lups(self, debts: Sequence[int]) -> np.ndarray:
+        """
+        Returns `get_lup` of each given debt, e.g. to get the LUP curve of amounts that could be borrowed.
+        """
+
+        return np.array(
+            [price_at(index) for index in self.find_indexes_of_sums(debts)], dtype=object
+        )
+
+    def bulk_unscaled_add(self, indexes: Sequence[int], unscaled_add_amounts: Sequence[int]) -> None:
+        """
+        Adds unscaled amounts to given indexes, same tree as calling `unscaled_add` for each, in any order.
+        Amounts added to the same index are summed.
+
+        Each node is updated once: amounts reaching a node are summed, then the change of the node value
+        is propagated to its parent. Scaled changes telescope, so the propagated amount is the same
+        as the sum of those propagated by successive single adds.
+        """
+
+        indexes = np.asarray(indexes, dtype=np.int64)
+        amounts = np.asarray(unscaled_add_amounts, dtype=object)
+        if (amounts == 0).any():
+            raise InvalidAmount()
+
+        additions = np.zeros(SIZE + 1, dtype=object)
+        np.add.at(additions, indexes + 1, amounts)
+
+        bit = 1
+        while bit <= SIZE:
+            # nodes at this level of the tree, their lsb is `bit`
+            nodes = np.arange(bit, SIZE + 1, 2 * bit)
+            added = additions[nodes]
+            touched = added != 0
+            if touched.any():
+                nodes = nodes[touched]
+                added = added[touched]
+
+                value = self.values[nodes]
+                new_value = value + added
+                scaling = self.scaling[nodes]
+                propagated = np.where(
+                    scaling != 0, wmul(new_value, scaling) - wmul(value, scaling), added
+                )
+
+                self.values[nodes] = new_value
+
+                parents = nodes + bit
+                in_tree = parents <= SIZE
+                np.add.at(additions, parents[in_tree], propagated[in_tree])
+
+            bit <<= 1
+
+    def bulk_add(self, indexes: Sequence[int], amounts: Sequence[int]) -> None:
+        """
+        Adds scaled amounts to given indexes, same tree as calling `add` for each.
+        """
+
+        indexes = np.asarray(indexes, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=object)
+        scales = self.scales(indexes)
+
+        self.bulk_unscaled_add(indexes, (amounts * WAD + scales // 2) // scales)
+
+
+def lsb(i):
+    """
+    Least significant bit of an int or of each int in an array.
+    """
+
+    return i & -i
+
+
+def _nodes(indexes: Optional[Sequence[int]]) -> np.ndarray:
+    if indexes is None:
+        return np.arange(1, SIZE + 1, dtype=np.int64)
+    return np.asarray(indexes, dtype=np.int64) + 1
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Dict
+
+from brownie import web3
+from brownie.network.contract import Contract
+
+# highest storage slot probed when looking for balances and allowances mappings
+MAX_PROBED_SLOT = 100
+
+# holder and spender used while probing, they are not expected to hold any token
+_PROBE_HOLDER = "0x000000000000000000000000000000000000a7a5"
+_PROBE_SPENDER = "0x000000000000000000000000000000000000a7a6"
+# small enough to fit packed balances (e.g. uint96 in COMP)
+_PROBE_VALUE = 0x1337 * 10**18
+
+_layouts: Dict[str, "ERC20StorageLayout"] = {}
+
+
+@dataclass(frozen=True)
+class ERC20StorageLayout:
+    """
+    Storage slots of ERC20 balances and allowances mappings.
+
+    Attributes:
+        balances_slot: storage slot of `mapping(address => uint256)` balances
+        allowances_slot: storage slot of `mapping(address => mapping(address => uint256))` allowances
+        vyper: if True, mapping keys are hashed after the slot (Vyper layout) instead of before it (Solidity layout)
+    """
+
+    balances_slot: int
+    allowances_slot: int
+    vyper: bool = False
+
+    def balance_key(self, holder: str) -> int:
+        """
+        Returns storage key of `holder` balance.
+        """
+
+        return _mapping_key(self.balances_slot, holder, self.vyper)
+
+    def allowance_key(self, owner: str, spender: str) -> int:
+        """
+        Returns storage key of amount `spender` is allowed to spend from `owner`.
+        """
+
+        owner_key = _mapping_key(self.allowances_slot, owner, self.vyper)
+        return _mapping_key(owner_key, spender, self.vyper)
+
+
+def get_storage_layout(token: Contract) -> ERC20StorageLayout:
+    """
+    Returns storage layout of given ERC20 token.
+    Layout is found by probing storage slots on first call and cached per token afterwards.
+
+    Args:
+        token: ERC20 token contract
+    """
+
+    token_address = token.address.lower()
+    if token_address not in _layouts:
+        _layouts[token_address] = _find_storage_layout(token)
+
+    return _layouts[token_address]
+
+
+def set_storage_at(address: str, key: int, value: int) -> None:
+    """
+    Writes `value` at storage `key` of `address` using local node set-storage RPC.
+    Supports Ganache, Hardhat and Anvil.
+    """
+
+    client = web3.clientVersion.lower()
+    if "anvil" in client:
+        method = "anvil_setStorageAt"
+    elif "hardhat" in client:
+        method = "hardhat_setStorageAt"
+    elif "ganache" in client:
+        method = "evm_setAccountStorageAt"
+    else:
+        raise Exception(f"Setting storage is not supported by {web3.clientVersion}")
+
+    response = web3.provider.make_request(
+        method, [address, _to_word(key), _to_word(value)]
+    )
+    if "error" in response:
+        raise Exception(f"Failed to set storage of {address}: {response['error']}")
+
+
+def _find_storage_layout(token: Contract) -> ERC20StorageLayout:
+    balances = _find_mapping(
+        token,
+        lambda slot, vyper: _mapping_key(slot, _PROBE_HOLDER, vyper),
+        lambda: token.balanceOf(_PROBE_HOLDER),
+    )
+    if balances is None:
+        raise Exception(
+            f"Could not find balances slot of {token.address}. Use transfer based top up instead"
+        )
+
+    allowances = _find_mapping(
+        token,
+        lambda slot, vyper: _mapping_key(
+            _mapping_key(slot, _PROBE_HOLDER, vyper), _PROBE_SPENDER, vyper
+        ),
+        lambda: token.allowance(_PROBE_HOLDER, _PROBE_SPENDER),
+    )
+    if allowances is None or allowances[1] != balances[1]:
+        raise Exception(
+            f"Could not find allowances slot of {token.address}. Use transaction based approve instead"
+        )
+
+    return ERC20StorageLayout(balances[0], allowances[0], balances[1])
+
+
+def _find_mapping(token: Contract, key_of, read):
+    for slot in range(MAX_PROBED_SLOT):
+        for vyper in (False, True):
+            key = key_of(slot, vyper)
+            original = int.from_bytes(web3.eth.get_storage_at(token.address, key), "big")
+
+            set_storage_at(token.address, key, _PROBE_VALUE)
+            found = read() == _PROBE_VALUE
+            set_storage_at(token.address, key, original)
+
+            if found:
+                return (slot, vyper)
+
+    return None
+
+
+def _mapping_key(slot: int, address: str, vyper: bool) -> int:
+    address_word = int(address, 16).to_bytes(32, "big")
+    slot_word = slot.to_bytes(32, "big")
+    preimage = slot_word + address_word if vyper else address_word + slot_word
+    return int.from_bytes(web3.keccak(preimage), "big")
+
+
+def _to_word(value: int) -> str:
+    return "0x" + value.to_bytes(32, "big").hex()
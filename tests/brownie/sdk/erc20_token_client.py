@@ -1,10 +1,21 @@
+from pathlib import Path
+
 from brownie import *
 from brownie import (
     Contract,
+    compile_source,
 )
 from brownie.network.transaction import TransactionReceipt
 from brownie.network.account import Accounts, LocalAccount
 
+from .erc20_storage import get_storage_layout, set_storage_at
+from .tx_pipeline import TOKEN_TX_GAS_LIMIT, deploy_all, transact
+
+MAX_ALLOWANCE = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
+
+MOCK_ERC20_SOURCE = Path(__file__).parent / "contracts" / "MockERC20.sol"
+_mock_erc20_project = None
+
 
 class ERC20TokenClient:
     def __init__(self, token_address, reserve_address):
@@ -30,14 +41,14 @@ class ERC20TokenClient:
             amount: amount of tokens to top up
         """
 
-        tx = self._contract.transfer(to, amount, {"from": self._reserve})
-
-        if bool(tx.revert_msg):
-            raise Exception(
-                f"Failed to top up {self.token_address} to {to.address}. Revert message: {tx.revert_msg}"
-            )
-
-        return tx
+        return transact(
+            self._contract.transfer,
+            to,
+            amount,
+            sender=self._reserve,
+            failure_message=f"Failed to top up {self.token_address} to {to.address}",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
 
     def transfer(
         self, from_: LocalAccount, to: LocalAccount, amount: int
@@ -50,14 +61,14 @@ class ERC20TokenClient:
             to: account address to transfer to
             amount: amount of tokens to transfer
         """
-        tx = self._contract.transfer(to, amount, {"from": from_})
-
-        if bool(tx.revert_msg):
-            raise Exception(
-                f"Failed to transfer {amount} tokens from {from_.address} to {to.address}. Revert message: {tx.revert_msg}"
-            )
-
-        return tx
+        return transact(
+            self._contract.transfer,
+            to,
+            amount,
+            sender=from_,
+            failure_message=f"Failed to transfer {amount} tokens from {from_.address} to {to.address}",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
 
     def approve(
         self, spender: LocalAccount, amount: int, owner: LocalAccount
@@ -71,14 +82,14 @@ class ERC20TokenClient:
             owner: account address to approve from
         """
 
-        tx = self._contract.approve(spender, amount, {"from": owner})
-
-        if bool(tx.revert_msg):
-            raise Exception(
-                f"Failed to approve {amount} tokens to {spender.address}. Revert message: {tx.revert_msg}"
-            )
-
-        return tx
+        return transact(
+            self._contract.approve,
+            spender,
+            amount,
+            sender=owner,
+            failure_message=f"Failed to approve {amount} tokens to {spender.address}",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
 
     def balance(self, user: LocalAccount) -> int:
         """
@@ -100,18 +111,48 @@ class ERC20TokenClient:
             owner: account address to approve from
         """
 
-        tx = self._contract.approve(
+        return transact(
+            self._contract.approve,
             spender,
-            0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF,
-            {"from": owner},
+            MAX_ALLOWANCE,
+            sender=owner,
+            failure_message="Failed to approve max amount",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
+
+    def top_up_in_storage(self, to: LocalAccount, amount: int) -> None:
+        """
+        Adds `amount` tokens to `to` account balance by writing token storage directly.
+        No transaction is mined, reserve balance and total supply are left unchanged.
+
+        Args:
+            to: account address to top up
+            amount: amount of tokens to top up
+        """
+
+        layout = get_storage_layout(self._contract)
+        set_storage_at(
+            self._contract.address,
+            layout.balance_key(to.address),
+            self.balance(to) + amount,
         )
 
-        if bool(tx.revert_msg):
-            raise Exception(
-                f"Failed to approve max amount. Revert message: {tx.revert_msg}"
-            )
+    def approve_max_in_storage(self, spender: LocalAccount, owner: LocalAccount) -> None:
+        """
+        Approves `spender` to spend all tokens from `owner` account by writing token storage directly.
+        No transaction is mined and no Approval event is emitted.
+
+        Args:
+            spender: account address to approve
+            owner: account address to approve from
+        """
 
-        return tx
+        layout = get_storage_layout(self._contract)
+        set_storage_at(
+            self._contract.address,
+            layout.allowance_key(owner.address, spender.address),
+            MAX_ALLOWANCE,
+        )
 
 
 class DaiTokenClient(ERC20TokenClient):
@@ -124,11 +165,67 @@ class DaiTokenClient(ERC20TokenClient):
             amount: amount of tokens to top up
         """
 
-        tx = self._contract.mint(to, amount, {"from": self._reserve})
+        return transact(
+            self._contract.mint,
+            to,
+            amount,
+            sender=self._reserve,
+            failure_message=f"Failed to top up {self.token_address} to {to.address}",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
+
 
-        if bool(tx.revert_msg):
-            raise Exception(
-                f"Failed to top up {self.token_address} to {to.address}. Revert message: {tx.revert_msg}"
-            )
+class MockERC20TokenClient(ERC20TokenClient):
+    """
+    Client for a local mintable ERC20 token deployed by the client itself.
+    Does not need a mainnet fork nor contract sources from Etherscan.
+    """
+
+    def __init__(
+        self, symbol: str, decimals: int, deployer: LocalAccount, *, address: str = None
+    ):
+        if address is None:
+            self._contract = deploy_all(
+                {"token": (_mock_erc20_container(), f"Mock {symbol}", symbol, decimals)},
+                deployer,
+            )["token"]
+        else:
+            self._contract = _mock_erc20_container().at(address)
+        self._reserve = deployer
+
+        self.token_address = self._contract.address
+        self.reserve_address = deployer.address
+        self.symbol = symbol
+        self.decimals = decimals
+
+    def top_up(self, to: LocalAccount, amount: int) -> TransactionReceipt:
+        """
+        Mints `amount` tokens to `to` account.
+
+        Args:
+            to: account address to top up
+            amount: amount of tokens to top up
+        """
+
+        return transact(
+            self._contract.mint,
+            to,
+            amount,
+            sender=self._reserve,
+            failure_message=f"Failed to top up {self.symbol} to {to.address}",
+            gas_limit=TOKEN_TX_GAS_LIMIT,
+        )
+
+
+def _mock_erc20_container():
+    """
+    Compiles MockERC20 source once per session and returns its contract container.
+    """
+
+    global _mock_erc20_project
+    if _mock_erc20_project is None:
+        _mock_erc20_project = compile_source(
+            MOCK_ERC20_SOURCE.read_text(), solc_version="0.8.18"
+        )
 
-        return tx
+    return _mock_erc20_project.MockERC20
@@ -0,0 +1,201 @@
+"""
+Per call gas distributions of contract functions, with percentiles, histograms and JSON baselines.
+
+Brownie `gas_profile` keeps avg / low / high per function, which hides tail gas of calls such as `drawDebt` on a
+large loans heap. `GasProfile` keeps every sample, tagged with the pool state the call ran against
+(e.g. loan count, bucket count, LUP index), and compares its percentiles against a baseline saved by a previous run.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+# relative increase of a statistic over its baseline reported as a regression
+DEFAULT_THRESHOLDS = {"p50": 0.02, "p90": 0.05, "p99": 0.05}
+BASELINE_VERSION = 1
+
+
+class GasSample(NamedTuple):
+    gas_used: int
+    success: bool = True
+    block: Optional[int] = None
+    # pool state the call ran against, e.g. {"loans_count": 120, "bucket_count": 35, "lup_index": 2560}
+    context: Mapping[str, Any] = {}
+
+
+class GasStats(NamedTuple):
+    count: int
+    mean: int
+    low: int
+    high: int
+    p50: int
+    p90: int
+    p99: int
+
+
+class GasRegression(NamedTuple):
+    method: str
+    stat: str
+    baseline: int
+    current: int
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else math.inf
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.stat}: {self.baseline} -> {self.current} ({self.change:+.2%})"
+
+
+class GasProfile:
+    """
+    Gas used by every call of every method, keyed by `Contract.function` name.
+
+    Usage:
+        profile = GasProfile.from_transactions(history, context=pool_helper.gasContext)
+        print(profile.stats("ERC20Pool.drawDebt").p99)
+        print(profile.stats_by("ERC20Pool.drawDebt", "loans_count", bins=[0, 100, 1_000, 10_000]))
+    """
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[GasSample]] = {}
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable, method_names=None, context=None) -> "GasProfile":
+        """
+        Builds a profile of brownie transaction receipts.
+
+        Args:
+            method_names: profile only functions whose name contains one of them
+            context: `context(block)` returns pool state at the end of `block`, called once per block for the
+                state before the block of each transaction
+        """
+
+        profile = cls()
+        contexts: Dict[int, Mapping[str, Any]] = {}
+        for tx in transactions:
+            if tx.fn_name is None or tx.contract_name is None:
+                continue
+            if method_names and not any(method in tx.fn_name for method in method_names):
+                continue
+
+            tx_context: Mapping[str, Any] = {}
+            if context is not None:
+                if tx.block_number not in contexts:
+                    contexts[tx.block_number] = context(tx.block_number - 1)
+                tx_context = contexts[tx.block_number]
+
+            profile.add(f"{tx.contract_name}.{tx.fn_name}", tx.gas_used, tx.status == 1, tx.block_number, **tx_context)
+        return profile
+
+    def add(self, method: str, gas_used: int, success: bool = True, block: Optional[int] = None, **context) -> None:
+        self.samples.setdefault(method, []).append(GasSample(int(gas_used), success, block, context))
+
+    def methods(self) -> List[str]:
+        return sorted(self.samples)
+
+    def gas(self, method: str, success_only: bool = True) -> np.ndarray:
+        return np.array(
+            [sample.gas_used for sample in self.samples.get(method, ()) if sample.success or not success_only],
+            dtype=np.int64,
+        )
+
+    def stats(self, method: str, success_only: bool = True) -> Optional[GasStats]:
+        """
+        Returns count, mean, low, high and nearest rank percentiles of the gas used by `method`,
+        None if it was never called.
+        """
+
+        return _stats(self.gas(method, success_only))
+
+    def histogram(self, method: str, bins=20, success_only: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns counts and bin edges of the gas used by `method`, as `numpy.histogram`.
+        """
+
+        return np.histogram(self.gas(method, success_only), bins=bins)
+
+    def stats_by(self, method: str, key: str, bins: Optional[Iterable[int]] = None) -> Dict[Any, GasStats]:
+        """
+        Returns statistics of successful calls of `method` grouped by the `key` context value of each call,
+        or by the range of `bins` edges it falls in (keyed by the lower edge).
+        """
+
+        edges = np.array(sorted(bins), dtype=np.int64) if bins is not None else None
+        groups: Dict[Any, List[int]] = {}
+        for sample in self.samples.get(method, ()):
+            if not sample.success or key not in sample.context:
+                continue
+            value = sample.context[key]
+            if edges is not None:
+                position = int(np.searchsorted(edges, value, side="right")) - 1
+                value = int(edges[max(position, 0)])
+            groups.setdefault(value, []).append(sample.gas_used)
+        return {value: _stats(np.array(gas, dtype=np.int64)) for value, gas in sorted(groups.items())}
+
+    def to_baseline(self) -> Dict[str, Any]:
+        return {
+            "version": BASELINE_VERSION,
+            "methods": {method: self.stats(method)._asdict() for method in self.methods() if self.stats(method)},
+        }
+
+    def save_baseline(self, path) -> None:
+        Path(path).write_text(json.dumps(self.to_baseline(), indent=2, sort_keys=True) + "\n")
+
+    def compare(self, baseline: Mapping[str, Any], thresholds: Optional[Mapping[str, float]] = None) -> List[GasRegression]:
+        """
+        Returns statistics of methods in both profile and `baseline` which grew by more than their threshold.
+
+        Args:
+            baseline: baseline as saved by `save_baseline`
+            thresholds: relative increase allowed per statistic, e.g. `{"p99": 0.05}`, `DEFAULT_THRESHOLDS` if not given
+        """
+
+        thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+        regressions = []
+        for method, expected in baseline["methods"].items():
+            stats = self.stats(method)
+            if stats is None:
+                continue
+            for stat, threshold in thresholds.items():
+                if getattr(stats, stat) > expected[stat] * (1 + threshold):
+                    regressions.append(GasRegression(method, stat, expected[stat], getattr(stats, stat)))
+        return regressions
+
+    def format(self) -> List[str]:
+        """
+        Returns a line per method with its statistics, highest median first.
+        """
+
+        rows = [(method, self.stats(method)) for method in self.methods()]
+        rows = sorted((row for row in rows if row[1]), key=lambda row: row[1].p50, reverse=True)
+        if not rows:
+            return []
+
+        width = max(len(method) for method, _ in rows)
+        return [
+            f"{method.ljust(width)}  p50: {stats.p50:>9}  p90: {stats.p90:>9}  p99: {stats.p99:>9}"
+            f"  low: {stats.low:>9}  high: {stats.high:>9}  count: {stats.count:>6}"
+            for method, stats in rows
+        ]
+
+
+def load_baseline(path) -> Dict[str, Any]:
+    baseline = json.loads(Path(path).read_text())
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"unsupported gas baseline version in {path}: {baseline.get('version')}")
+    return baseline
+
+
+def _stats(gas: np.ndarray) -> Optional[GasStats]:
+    if gas.size == 0:
+        return None
+
+    gas = np.sort(gas)
+    # nearest rank percentiles are gas of an actual call
+    p50, p90, p99 = (int(gas[max(math.ceil(percentile / 100 * gas.size) - 1, 0)]) for percentile in PERCENTILES)
+    return GasStats(int(gas.size), int(gas.sum() // gas.size), int(gas[0]), int(gas[-1]), p50, p90, p99)
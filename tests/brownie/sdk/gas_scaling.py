@@ -0,0 +1,201 @@
+"""
+Gas scaling curves of pool methods over loans count and funded bucket layout, with fitted complexity coefficients.
+
+`ScalingCurves` collects the gas of each method measured at benchmark points (loans count, funded buckets and
+their spread), returns it as curves and fits `gas = intercept + slope * f(n)` for `f` in `COMPLEXITY_MODELS`,
+so capacity of large pools can be extrapolated from a few points. Each dimension is fitted with the others held
+at their base value, so slopes are not confounded by points where those vary too.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .prices import MAX_FENWICK_INDEX
+
+COMPLEXITY_MODELS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "constant": lambda n: np.zeros(len(n)),
+    "log": lambda n: np.log2(np.maximum(n, 1)),
+    "linear": lambda n: n,
+    "n_log": lambda n: n * np.log2(np.maximum(n, 1)),
+}
+
+
+# dimensions of a benchmark point gas is fitted over
+DIMENSIONS = ("loans", "buckets", "spread")
+
+
+class ScalingPoint(NamedTuple):
+    method: str
+    loans: int
+    buckets: int
+    # distance in indexes between the first and last funded bucket
+    spread: int
+    gas_used: int
+
+
+class ComplexityFit(NamedTuple):
+    model: str
+    intercept: float
+    slope: float
+    r_squared: float
+
+    def predict(self, n) -> np.ndarray:
+        return self.intercept + self.slope * COMPLEXITY_MODELS[self.model](np.asarray(n, dtype=float))
+
+    def __str__(self) -> str:
+        term = "" if self.model == "constant" else f" + {self.slope:.1f} * {self.model}(n)"
+        return f"{self.intercept:.0f}{term}  (R² {self.r_squared:.3f})"
+
+
+def bucket_layout(count: int, spread: int, first_index: int) -> List[int]:
+    """
+    Returns `count` bucket indexes evenly spread over `spread` indexes from `first_index`, capped at
+    `MAX_FENWICK_INDEX`.
+    """
+
+    if count <= 0:
+        raise ValueError(f"count must be positive: {count}")
+    last_index = min(first_index + max(spread, count - 1), MAX_FENWICK_INDEX)
+    if last_index - first_index + 1 < count:
+        raise ValueError(f"{count} buckets do not fit from index {first_index}")
+    return sorted({int(index) for index in np.linspace(first_index, last_index, count).round()})
+
+
+def fit_complexity(sizes: Sequence[int], gas: Sequence[int], models: Optional[Sequence[str]] = None) -> List[ComplexityFit]:
+    """
+    Least squares fits of `gas = intercept + slope * f(size)` for every model, best fit (highest R²) first.
+    Models with more terms than distinct sizes allow are left out.
+    """
+
+    sizes = np.asarray(sizes, dtype=float)
+    gas = np.asarray(gas, dtype=float)
+    if sizes.size == 0:
+        return []
+
+    fits = []
+    for model in models or COMPLEXITY_MODELS:
+        if model != "constant" and len(np.unique(sizes)) < 2:
+            continue
+        if model == "constant":
+            intercept, slope = float(gas.mean()), 0.0
+        else:
+            features = np.column_stack([np.ones(sizes.size), COMPLEXITY_MODELS[model](sizes)])
+            (intercept, slope), *_ = np.linalg.lstsq(features, gas, rcond=None)
+        fit = ComplexityFit(model, float(intercept), float(slope), 0.0)
+        fits.append(fit._replace(r_squared=_r_squared(gas, fit.predict(sizes))))
+
+    # ties (e.g. flat gas) go to the simplest model
+    order = list(COMPLEXITY_MODELS)
+    return sorted(fits, key=lambda fit: (-round(fit.r_squared, 6), order.index(fit.model)))
+
+
+class ScalingCurves:
+    """
+    Gas measured at benchmark points.
+
+    Usage:
+        curves = ScalingCurves()
+        curves.add("drawDebt", loans=1_000, buckets=10, spread=100, gas_used=tx.gas_used)
+        sizes, gas = curves.curve("drawDebt", "loans", buckets=10, spread=100)
+        print(curves.fit("drawDebt", "loans")[0])
+    """
+
+    def __init__(self) -> None:
+        self.points: List[ScalingPoint] = []
+
+    def add(self, method: str, loans: int, buckets: int, spread: int, gas_used: int) -> None:
+        self.points.append(ScalingPoint(method, loans, buckets, spread, int(gas_used)))
+
+    def methods(self) -> List[str]:
+        return sorted({point.method for point in self.points})
+
+    def curve(self, method: str, by: str, **fixed) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns sizes and median gas of `method` at each value of `by` (`loans`, `buckets` or `spread`),
+        over points selected as by `select`.
+        """
+
+        gas: Dict[int, List[int]] = {}
+        for point in self.select(method, by, **fixed):
+            gas.setdefault(getattr(point, by), []).append(point.gas_used)
+
+        sizes = np.array(sorted(gas), dtype=np.int64)
+        return sizes, np.array([int(np.median(gas[size])) for size in sizes], dtype=np.int64)
+
+    def fit(self, method: str, by: str, **fixed) -> List[ComplexityFit]:
+        """
+        Returns complexity fits of the gas of `method` over `by`, best fit first, over points selected as
+        by `select`.
+        """
+
+        points = self.select(method, by, **fixed)
+        return fit_complexity([getattr(point, by) for point in points], [point.gas_used for point in points])
+
+    def select(self, method: str, by: str, **fixed) -> List[ScalingPoint]:
+        """
+        Returns points of `method` varying along `by` only: points matching `fixed` values, with every other
+        dimension held at its base value, the smallest measured. Dimensions set by the value of `by` (e.g.
+        spread of bucket layouts, when each bucket count is measured with a single spread) move along with it.
+        """
+
+        points = [
+            point for point in self.points
+            if point.method == method and all(getattr(point, key) == value for key, value in fixed.items())
+        ]
+        for dimension in DIMENSIONS:
+            if not points or dimension == by or dimension in fixed or _depends_on(points, dimension, by):
+                continue
+            base = min(getattr(point, dimension) for point in points)
+            points = [point for point in points if getattr(point, dimension) == base]
+        return points
+
+    def summary(self, dimensions: Sequence[str] = DIMENSIONS) -> Dict[str, Dict[str, dict]]:
+        """
+        Returns best fit of every method over every dimension, others held at their base value, as plain values.
+        """
+
+        summary: Dict[str, Dict[str, dict]] = {}
+        for method in self.methods():
+            for dimension in dimensions:
+                fits = self.fit(method, dimension)
+                if fits:
+                    summary.setdefault(method, {})[dimension] = fits[0]._asdict()
+        return summary
+
+    def format(self) -> List[str]:
+        lines = []
+        for method, fits in self.summary().items():
+            for dimension, fit in fits.items():
+                lines.append(f"{method:<18} by {dimension:<8} {ComplexityFit(**fit)}")
+        return lines
+
+    def save(self, path) -> None:
+        """
+        Writes points to `path` as CSV and best fits next to it, as `<path>.fits.json`.
+        """
+
+        path = Path(path)
+        with path.open("w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(ScalingPoint._fields)
+            writer.writerows(self.points)
+        Path(f"{path}.fits.json").write_text(json.dumps(self.summary(), indent=2, sort_keys=True) + "\n")
+
+
+def _depends_on(points: Sequence[ScalingPoint], dimension: str, by: str) -> bool:
+    values: Dict[int, int] = {}
+    for point in points:
+        if values.setdefault(getattr(point, by), getattr(point, dimension)) != getattr(point, dimension):
+            return False
+    return True
+
+
+def _r_squared(actual: np.ndarray, predicted: np.ndarray) -> float:
+    total = float(((actual - actual.mean()) ** 2).sum())
+    if total == 0:
+        return 1.0 if np.allclose(actual, predicted) else 0.0
+    return 1 - float(((actual - predicted) ** 2).sum()) / total
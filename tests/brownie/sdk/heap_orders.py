@@ -0,0 +1,123 @@
+"""
+Adversarial orders of loans for the `src/libraries/internal/Loans.sol` max-heap.
+
+Each generator returns threshold price ranks `1..n` in the order loans should be drawn, so that inserting them one
+after the other (`Loans.upsert` of a new loan) builds a heap in which the targeted library function moves as many
+loans as it can. Orders are computed with array operations, 10^6 loans take well under a second, and
+`iter_threshold_prices` streams them in chunks to setups which draw loans one at a time.
+"""
+
+from typing import Callable, Dict, Iterator
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+
+def bubble_up_order(n: int) -> np.ndarray:
+    """
+    Worst case of `_bubbleUp`: ranks in ascending order, every new loan is the highest one and moves
+    from the tail to the root, `floor(log2(i))` moves for the i-th loan.
+    """
+
+    _check_size(n)
+    return np.arange(1, n + 1, dtype=np.int64)
+
+
+def bubble_down_order(n: int) -> np.ndarray:
+    """
+    Worst case of `_bubbleDown`: ranks in descending order, inserted without moves and laid out in heap order,
+    so the larger child of every loan is its left child. A loan whose threshold price drops below its subtree
+    sinks along the leftmost path, down to the deepest level of the heap.
+    """
+
+    _check_size(n)
+    return np.arange(n, 0, -1, dtype=np.int64)
+
+
+def remove_order(n: int) -> np.ndarray:
+    """
+    Worst case of `remove` of the max loan, as kicks do: inserted without moves, the lowest loan is the tail and
+    the larger child path from the root leads to the position before it. Removing the root moves the tail to the
+    root and sinks it back to the last position of the heap, at its deepest level, and the heap left is again
+    the worst case for `n - 1` loans: every removal until the heap is empty takes `floor(log2(count))` moves.
+
+    Layout is the heap built backward from a single loan, undoing one such removal at a time: values along the
+    path from the root to the tail move one level down, the new max takes the root and the lowest loan the new
+    tail. The value of every position is solved in closed form, walking up one level per step for all positions
+    at once.
+    """
+
+    _check_size(n)
+    order = np.ones(n, dtype=np.int64)
+    if n <= 1:
+        return order
+
+    # every position but the tail ends up at the root after as many steps as its depth,
+    # `size` is then the size of the heap whose new max it was
+    position = np.arange(1, n, dtype=np.int64)
+    size = np.full(n - 1, n, dtype=np.int64)
+    level = _bit_length(position)
+    for step in range(int(level[-1]) - 1):
+        # positions are sorted, the ones still below the root are a suffix
+        start = (1 << (step + 1)) - 1
+        node, node_size, node_level = position[start:], size[start:], level[start:]
+
+        # last heap size before `node_size` in which the tail was `node` or one of its descendants:
+        # deepest descendant level holding a position below `node_size`, capped by `node_size - 1`
+        last = node_size - 1
+        depth = _bit_length(last) - node_level
+        depth -= (node << depth) > last
+        np.minimum(((node + 1) << depth) - 1, last, out=node_size)
+
+        node >>= 1
+        node_level -= 1
+
+    order[:-1] = size
+    return order
+
+
+HEAP_ORDERS: Dict[str, Callable[[int], np.ndarray]] = {
+    "bubble_up": bubble_up_order,
+    "bubble_down": bubble_down_order,
+    "remove": remove_order,
+}
+
+
+def heap_order(n: int, case: str = "remove") -> np.ndarray:
+    """
+    Returns ranks `1..n` in the insertion order of the worst case of `case` (see `HEAP_ORDERS`).
+    """
+
+    if case not in HEAP_ORDERS:
+        raise ValueError(f"unknown heap case {case!r}, expected one of {sorted(HEAP_ORDERS)}")
+    return HEAP_ORDERS[case](n)
+
+
+def iter_threshold_prices(
+    n: int, case: str = "remove", scale=1, offset=0, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator:
+    """
+    Yields threshold prices `offset + rank * scale` of `n` loans in the insertion order of the worst case of `case`,
+    converted to Python numbers one chunk at a time.
+    """
+
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive: {chunk_size}")
+
+    return _iter_chunks(heap_order(n, case) * scale + offset, chunk_size)
+
+
+def _iter_chunks(values: np.ndarray, chunk_size: int) -> Iterator:
+    for start in range(0, len(values), chunk_size):
+        yield from values[start : start + chunk_size].tolist()
+
+
+def _check_size(n: int) -> None:
+    if n < 0:
+        raise ValueError(f"number of loans must not be negative: {n}")
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    # exact for positions below 2**53
+    return np.frexp(values.astype(np.float64))[1].astype(np.int64)
@@ -0,0 +1,275 @@
+"""
+Python mirror of the `src/libraries/internal/Loans.sol` max-heap of loans by t0 debt to collateral (t0 threshold price).
+
+Heap is stored as two flat lists, borrower addresses and t0 debt to collateral, with the dummy loan at index 0
+as on-chain. Operations move loans exactly as the library does, so node order matches `loanInfo(index)` of
+the pool as long as the mirror is loaded from the pool (`from_pool`) and then kept in sync with the same
+updates (`update`, `sync_events`).
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .maths import wdiv
+
+ROOT_INDEX = 1
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# ~8k gas per loan, a page stays well within default `eth_call` gas caps
+DEFAULT_PAGE_SIZE = 1_000
+
+# pool events after which `Loans.update` or `Loans.remove` ran for the event borrower
+HEAP_EVENTS = ("DrawDebt", "RepayDebt", "LoanStamped", "Take", "BucketTake", "Kick")
+
+
+class ZeroDebtToCollateral(Exception):
+    """
+    Raised where `Loans` library reverts with `ZeroDebtToCollateral()`.
+    """
+
+
+class HeapLoan(NamedTuple):
+    index: int
+    borrower: str
+    t0_debt_to_collateral: int
+    threshold_price: int
+
+
+def iter_loans(
+    pool_info_utils,
+    pool,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    min_threshold_price: Optional[int] = None,
+) -> Iterator[HeapLoan]:
+    """
+    Yields loans of `pool` heap in heap order, read page by page with `PoolInfoUtils.loansHeapInfo`.
+
+    Heap order is not threshold price order, but no loan has a threshold price above its parent (at `index // 2`).
+    With `min_threshold_price`, only loans at or above it are yielded and the walk stops as soon as the parent of the
+    next loan comes after the last loan yielded: every remaining loan then descends from a loan below the cutoff.
+
+    Args:
+        pool_info_utils: deployed PoolInfoUtils
+        pool: address of the pool or pool contract
+        page_size: loans read per call
+        min_threshold_price: threshold price cutoff (WAD)
+    """
+
+    if page_size <= 0:
+        raise ValueError(f"page_size must be positive: {page_size}")
+
+    pool_address = getattr(pool, "address", pool)
+    # heap index of the last loan at or above cutoff, 0 while none is
+    last_above_cutoff = 0
+    next_index = ROOT_INDEX
+    while True:
+        loans, next_index = pool_info_utils.loansHeapInfo(pool_address, next_index, page_size)
+        if len(loans) == 0:
+            return
+
+        for loan in loans:
+            loan = HeapLoan(*loan)
+            if min_threshold_price is None:
+                yield loan
+            elif loan.index // 2 > last_above_cutoff:
+                return
+            elif loan.threshold_price >= min_threshold_price:
+                last_above_cutoff = loan.index
+                yield loan
+
+
+class Loans:
+    """
+    Loans max-heap, `borrowers[i]` and `t0_debt_to_collateral[i]` hold the loan at heap index `i`.
+    """
+
+    __slots__ = ("borrowers", "t0_debt_to_collateral", "indices")
+
+    def __init__(self) -> None:
+        self.borrowers: List[str] = [ZERO_ADDRESS]
+        self.t0_debt_to_collateral: List[int] = [0]
+        # borrower address => heap index
+        self.indices = {}
+
+    @classmethod
+    def from_heap(cls, loans: Iterable[Tuple[str, int]]) -> "Loans":
+        """
+        Returns heap holding given loans at the same positions, e.g. read with `loanInfo(1..noOfLoans)`.
+
+        Args:
+            loans: (borrower, t0 debt to collateral) in heap order, starting at root
+        """
+
+        heap = cls()
+        for borrower, t0_debt_to_collateral in loans:
+            heap.indices[borrower] = len(heap.borrowers)
+            heap.borrowers.append(borrower)
+            heap.t0_debt_to_collateral.append(t0_debt_to_collateral)
+        return heap
+
+    @classmethod
+    def from_pool(cls, pool, pool_info_utils=None, page_size: int = DEFAULT_PAGE_SIZE) -> "Loans":
+        """
+        Returns heap with the node order of `pool` loans heap.
+
+        Loans are read in pages with `pool_info_utils.loansHeapInfo` if given, otherwise one `loanInfo` call per loan.
+        """
+
+        if pool_info_utils is not None:
+            loans = iter_loans(pool_info_utils, pool, page_size)
+            return cls.from_heap((loan.borrower, loan.t0_debt_to_collateral) for loan in loans)
+
+        _, _, no_of_loans = pool.loansInfo()
+        return cls.from_heap(pool.loanInfo(index) for index in range(ROOT_INDEX, no_of_loans + 1))
+
+    @classmethod
+    def heapify(cls, loans: Sequence[Tuple[str, int]]) -> "Loans":
+        """
+        Builds a heap from unordered loans in O(n), bubbling down every parent node from the last one to the root.
+
+        Result is a valid heap with the same max loan as any heap of these loans, but its node order
+        is the order of the pool heap only if pool loans were read in heap order (see `from_heap`).
+
+        Args:
+            loans: (borrower, t0 debt to collateral), e.g. from `borrowerInfo` of every borrower of a pool
+        """
+
+        heap = cls.from_heap(loans)
+        for index in range(heap.no_of_loans() // 2, ROOT_INDEX - 1, -1):
+            heap._bubble_down(heap.borrowers[index], heap.t0_debt_to_collateral[index], index)
+        return heap
+
+    def copy(self) -> "Loans":
+        heap = Loans()
+        heap.borrowers = self.borrowers.copy()
+        heap.t0_debt_to_collateral = self.t0_debt_to_collateral.copy()
+        heap.indices = self.indices.copy()
+        return heap
+
+    # ------------------------------------------------------------------
+    # Library functions
+    # ------------------------------------------------------------------
+
+    def update(self, borrower: str, t0_debt: int, collateral: int, in_auction: bool = False) -> None:
+        """
+        Updates heap after borrower t0 debt or collateral changed, as `Loans.update` does.
+        """
+
+        if in_auction:
+            return
+
+        active_borrower = t0_debt != 0 and collateral != 0
+        index = self.indices.get(borrower, 0)
+
+        if active_borrower:
+            t0_debt_to_collateral = wdiv(t0_debt, collateral)
+            if t0_debt_to_collateral == 0:
+                raise ZeroDebtToCollateral()
+
+            self.upsert(borrower, t0_debt_to_collateral, index)
+        elif index != 0:
+            self.remove(borrower, index)
+
+    def upsert(self, borrower: str, t0_debt_to_collateral: int, index: Optional[int] = None) -> None:
+        if index is None:
+            index = self.indices.get(borrower, 0)
+
+        if index != 0:
+            if self.t0_debt_to_collateral[index] > t0_debt_to_collateral:
+                self._bubble_down(borrower, t0_debt_to_collateral, index)
+            else:
+                self._bubble_up(borrower, t0_debt_to_collateral, index)
+        else:
+            self._bubble_up(borrower, t0_debt_to_collateral, len(self.borrowers))
+
+    def remove(self, borrower: str, index: Optional[int] = None) -> None:
+        if index is None:
+            index = self.indices[borrower]
+
+        del self.indices[borrower]
+        tail_index = len(self.borrowers) - 1
+        if index == tail_index:
+            self.borrowers.pop()
+            self.t0_debt_to_collateral.pop()
+        else:
+            tail_borrower = self.borrowers.pop()
+            tail_t0_debt_to_collateral = self.t0_debt_to_collateral.pop()
+            self._bubble_up(tail_borrower, tail_t0_debt_to_collateral, index)
+            self._bubble_down(self.borrowers[index], self.t0_debt_to_collateral[index], index)
+
+    def get_by_index(self, index: int) -> Tuple[str, int]:
+        if index < len(self.borrowers):
+            return self.borrowers[index], self.t0_debt_to_collateral[index]
+        return ZERO_ADDRESS, 0
+
+    def get_max(self) -> Tuple[str, int]:
+        return self.get_by_index(ROOT_INDEX)
+
+    def no_of_loans(self) -> int:
+        return len(self.borrowers) - 1
+
+    def __len__(self) -> int:
+        return self.no_of_loans()
+
+    # ------------------------------------------------------------------
+    # Sync with pool
+    # ------------------------------------------------------------------
+
+    def sync_events(self, pool, events) -> None:
+        """
+        Applies heap changes of a transaction given its events (`tx.events`), in emission order, reading borrower state from `pool`.
+        Borrower state is read once the transaction is mined, so each borrower is expected in one event of the transaction.
+        """
+
+        for event in events:
+            if event.name not in HEAP_EVENTS:
+                continue
+
+            borrower = event["borrower"]
+            if event.name == "Kick":
+                if borrower in self.indices:
+                    self.remove(borrower)
+                continue
+
+            t0_debt, collateral, _ = pool.borrowerInfo(borrower)
+            in_auction = pool.auctionInfo(borrower)[3] != 0
+            self.update(borrower, t0_debt, collateral, in_auction)
+
+    # ------------------------------------------------------------------
+    # Heap internals, iterative versions of the recursive library functions
+    # ------------------------------------------------------------------
+
+    def _bubble_up(self, borrower: str, t0_debt_to_collateral: int, index: int) -> None:
+        while index != ROOT_INDEX and t0_debt_to_collateral > self.t0_debt_to_collateral[index // 2]:
+            parent = index // 2
+            self._insert(self.borrowers[parent], self.t0_debt_to_collateral[parent], index)
+            index = parent
+
+        self._insert(borrower, t0_debt_to_collateral, index)
+
+    def _bubble_down(self, borrower: str, t0_debt_to_collateral: int, index: int) -> None:
+        count = len(self.borrowers)
+        while True:
+            child = index * 2
+            if count <= child:
+                break
+
+            if count > child + 1 and self.t0_debt_to_collateral[child + 1] > self.t0_debt_to_collateral[child]:
+                child += 1
+
+            if self.t0_debt_to_collateral[child] <= t0_debt_to_collateral:
+                break
+
+            self._insert(self.borrowers[child], self.t0_debt_to_collateral[child], index)
+            index = child
+
+        self._insert(borrower, t0_debt_to_collateral, index)
+
+    def _insert(self, borrower: str, t0_debt_to_collateral: int, index: int) -> None:
+        if index == len(self.borrowers):
+            self.borrowers.append(borrower)
+            self.t0_debt_to_collateral.append(t0_debt_to_collateral)
+        else:
+            self.borrowers[index] = borrower
+            self.t0_debt_to_collateral[index] = t0_debt_to_collateral
+
+        self.indices[borrower] = index
@@ -0,0 +1,62 @@
+"""
+Python mirror of `src/libraries/internal/Maths.sol` and of the OpenZeppelin `Math.mulDiv` used by pool libraries.
+
+Functions work on Python ints and on NumPy object arrays of Python ints alike, so results are bit exact
+with on-chain rounding either for a single value or for a whole array at once.
+"""
+
+WAD = 10**18
+RAY = 10**27
+
+
+def wmul(x, y):
+    return (x * y + WAD // 2) // WAD
+
+
+def floor_wmul(x, y):
+    return (x * y) // WAD
+
+
+def ceil_wmul(x, y):
+    return (x * y + WAD - 1) // WAD
+
+
+def wdiv(x, y):
+    return (x * WAD + y // 2) // y
+
+
+def floor_wdiv(x, y):
+    return (x * WAD) // y
+
+
+def ceil_wdiv(x, y):
+    return (x * WAD + y - 1) // y
+
+
+def ceil_div(x, y):
+    return (x + y - 1) // y
+
+
+def rmul(x, y):
+    return (x * y + RAY // 2) // RAY
+
+
+def rpow(x: int, n: int) -> int:
+    z = x if n % 2 != 0 else RAY
+
+    n //= 2
+    while n != 0:
+        x = rmul(x, x)
+        if n % 2 != 0:
+            z = rmul(z, x)
+        n //= 2
+
+    return z
+
+
+def mul_div(x, y, denominator):
+    """
+    OpenZeppelin `Math.mulDiv`, full precision `x * y / denominator` rounded down.
+    """
+
+    return (x * y) // denominator
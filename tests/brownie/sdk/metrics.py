@@ -0,0 +1,214 @@
+"""
+Time series of pool metrics, one row per simulation step, streamed to sinks instead of printed.
+
+`MetricsRecorder` sends every `PoolMetrics` row to its sinks: `CsvSink` and `ParquetSink` stream rows to columnar
+files in batches, so memory stays bounded however long a run is, and `ConsoleSink` prints rows as
+`TestUtils.summarize_pool` used to.
+"""
+
+import csv
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+# rows a Parquet sink holds before writing them as a row group
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class PoolMetrics(NamedTuple):
+    """
+    Pool state at the end of a step, WAD values converted to floats.
+    """
+
+    time: int
+    block: int
+    utilization: float
+    target_utilization: float
+    collateralization: float
+    rate: float
+    debt: float
+    deposit: float
+    reserves: float
+    pledged_collateral: float
+    quote_balance: float
+    lup: float
+    htp: float
+    loans_count: int
+    # transactions sent during the step and gas they used
+    tx_count: int = 0
+    gas_used: int = 0
+
+    @property
+    def gas_per_tx(self) -> float:
+        return self.gas_used / self.tx_count if self.tx_count else 0.0
+
+    @classmethod
+    def from_snapshot(cls, snapshot, time: int, block: int = 0, tx_count: int = 0, gas_used: int = 0) -> "PoolMetrics":
+        """
+        Builds a row from a `PoolSnapshot` read at `time` / `block`.
+        """
+
+        (_, collateralization, utilization, target_utilization) = snapshot.utilization
+        return cls(
+            time=time,
+            block=block,
+            utilization=utilization / 1e18,
+            target_utilization=target_utilization / 1e18,
+            collateralization=collateralization / 1e18,
+            rate=snapshot.interest_rate / 1e18,
+            debt=snapshot.balances.debt / 1e18,
+            deposit=snapshot.balances.deposit_size / 1e18,
+            reserves=snapshot.pool_reserves / 1e18,
+            pledged_collateral=snapshot.pledged_collateral / 1e18,
+            quote_balance=snapshot.balances.quote_token_balance / 1e18,
+            lup=snapshot.prices.lup / 1e18,
+            htp=snapshot.prices.htp / 1e18,
+            loans_count=snapshot.loans.loans_count,
+            tx_count=tx_count,
+            gas_used=gas_used,
+        )
+
+
+class ConsoleSink:
+    """
+    Prints every row in `summarize_pool` format.
+    """
+
+    def write(self, rows: Sequence[PoolMetrics]) -> None:
+        for row in rows:
+            print(format_metrics(row))
+
+    def close(self) -> None:
+        pass
+
+
+class CsvSink:
+    """
+    Streams rows to a CSV file, a header line then a line per row.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self._file = self.path.open("w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(PoolMetrics._fields)
+
+    def write(self, rows: Sequence[PoolMetrics]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Streams rows to a Parquet file, a row group per `batch_size` rows. Needs `pyarrow`.
+    """
+
+    def __init__(self, path, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet metrics need pyarrow, install it or write metrics to CSV") from e
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                pa.field(name, pa.int64() if PoolMetrics.__annotations__[name] is int else pa.float64())
+                for name in PoolMetrics._fields
+            ]
+        )
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+        self._rows: List[PoolMetrics] = []
+
+    def write(self, rows: Sequence[PoolMetrics]) -> None:
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        columns = [self._pa.array(column, type=field.type) for column, field in zip(zip(*self._rows), self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        self._rows = []
+
+
+def metrics_sink(path, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Returns a sink writing to `path`: Parquet if it ends with `.parquet`, CSV otherwise.
+    """
+
+    if Path(path).suffix == ".parquet":
+        return ParquetSink(path, batch_size)
+    return CsvSink(path)
+
+
+class MetricsRecorder:
+    """
+    Records a `PoolMetrics` row per step and sends it to every sink. Gas of transactions sent during a step
+    is accumulated with `record_tx` and reported in the next row.
+
+    Usage:
+        with MetricsRecorder([ConsoleSink(), metrics_sink("metrics.parquet")]) as metrics:
+            metrics.record_tx(tx.gas_used)
+            metrics.record_pool(pool_helper.snapshot(), chain.time(), chain.height)
+    """
+
+    def __init__(self, sinks: Optional[Sequence] = None) -> None:
+        self.sinks = list(sinks) if sinks is not None else [ConsoleSink()]
+        self.rows = 0
+        self._tx_count = 0
+        self._gas_used = 0
+
+    def __enter__(self) -> "MetricsRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.close()
+
+    def record_tx(self, gas_used: int) -> None:
+        self._tx_count += 1
+        self._gas_used += gas_used
+
+    def record_pool(self, snapshot, time: int, block: int = 0) -> PoolMetrics:
+        row = PoolMetrics.from_snapshot(snapshot, time, block, self._tx_count, self._gas_used)
+        self.record(row)
+        return row
+
+    def record(self, row: PoolMetrics) -> None:
+        for sink in self.sinks:
+            sink.write((row,))
+        self.rows += 1
+        self._tx_count = 0
+        self._gas_used = 0
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def format_metrics(row: PoolMetrics) -> str:
+    lines = [
+        f"actual utlzn:   {row.utilization:>12.1%}  "
+        f"target utlzn:   {row.target_utilization:>12.1%}  "
+        f"collateralization: {row.collateralization:>9.1%}  "
+        f"borrowerDebt:   {row.debt:>12.1f}  "
+        f"loan count:     {row.loans_count:>8}",
+        f"contract q bal: {row.quote_balance:>12.1f}  "
+        f"deposit:        {row.deposit:>12.1f}  "
+        f"reserves:       {row.reserves:>12.1f}  "
+        f"pledged:        {row.pledged_collateral:>12.1f}  "
+        f"rate:           {row.rate:>8.4%}",
+        f"lup:            {row.lup:>12.3f}  "
+        f"htp:            {row.htp:>12.3f}",
+    ]
+    if row.tx_count:
+        lines[-1] += f"  txs:            {row.tx_count:>8}  gas per tx:     {row.gas_per_tx:>12.0f}"
+    return "\n".join(lines)
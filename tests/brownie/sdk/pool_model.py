@@ -0,0 +1,1001 @@
+"""
+In-process model of an ERC20 pool, for simulations too long to run as transactions on a node.
+
+`PoolModel` mirrors `addQuoteToken`, `removeQuoteToken`, `drawDebt`, `repayDebt` and `updateInterest` of `ERC20Pool`,
+interest accrual (`PoolCommons.accrueInterest`) and interest rate and EMA updates (`PoolCommons.updateInterestState`)
+in exact WAD integer math, on top of the `Deposits` and `Loans` mirrors. Liquidations, collateral buckets and reserve
+auctions are not modeled: actions behave as in a pool where none of them ever happened.
+
+Every successful action is appended to `PoolModel.actions` with its block timestamp and on-chain arguments.
+`replay` sends the same actions to a pool deployed on chain and asserts the pool holds the model state at checkpoints.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .deposits import Deposits
+from .loans import ZERO_ADDRESS, Loans
+from .maths import WAD, ceil_div, ceil_wdiv, ceil_wmul, floor_wdiv, mul_div, wdiv, wmul
+from .prices import MAX_FENWICK_INDEX, MAX_PRICE, MIN_PRICE, index_of, prb_exp, prb_mul, prb_pow, prb_sqrt, price_at
+
+MAX_UINT256 = 2**256 - 1
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+COLLATERALIZATION_FACTOR = 1_040000000000000000
+
+CUBIC_ROOT_1000000 = 100 * WAD
+ONE_THIRD = 333333333333333334
+INCREASE_COEFFICIENT = 1_100000000000000000
+DECREASE_COEFFICIENT = 900000000000000000
+PERCENT_102 = 1_020000000000000000
+NEG_H_MAU_HOURS = -57762265046662105  # -ln(2)/12
+NEG_H_TU_HOURS = -8251752149523158  # -ln(2)/84
+
+# pool views compared per multicall at replay checkpoints
+REPLAY_PAGE_SIZE = 200
+
+
+class PoolRevert(Exception):
+    """
+    Raised where the pool reverts, with the name of the custom error, e.g. `PoolRevert("LUPBelowHTP")`.
+    Model state is left as it was before the action.
+    """
+
+
+class Borrower(NamedTuple):
+    t0_debt: int = 0
+    collateral: int = 0
+    np_tp_ratio: int = 0
+
+
+class Bucket(NamedTuple):
+    lps: int = 0
+    collateral: int = 0
+    bankruptcy_time: int = 0
+
+
+class Lender(NamedTuple):
+    lps: int = 0
+    deposit_time: int = 0
+
+
+class Action(NamedTuple):
+    """
+    Pool transaction applied to the model: `pool.<method>(*args, {"from": sender})` mined at `timestamp`.
+    """
+
+    timestamp: int
+    sender: str
+    method: str
+    args: tuple
+
+
+@dataclass
+class _PoolState:
+    # in memory `PoolState` struct of an action, see `Pool._accruePoolInterest`
+    t0_debt: int
+    collateral: int
+    inflator: int
+    rate: int
+    debt: int = 0
+    is_new_interest_accrued: bool = False
+
+
+class PoolModel:
+    """
+    ERC20 pool state and actions, at block timestamp `time`.
+
+    Usage:
+        model = PoolModel(interest_rate=5 * 10**16, time=chain.time())
+        model.add_quote_token(lender, 10_000 * 10**18, 2550)
+        model.warp(model.time + 14 * 3600)
+        model.draw_debt(borrower, borrower, 4_000 * 10**18, 7388, 10 * 10**18)
+        print(model.lup(), model.htp(), model.debt())
+    """
+
+    def __init__(
+        self,
+        interest_rate: int,
+        time: int,
+        quote_token_scale: int = 1,
+        collateral_scale: int = 1,
+        quote_token_balance: int = 0,
+    ) -> None:
+        """
+        Args:
+            interest_rate: rate the pool was initialized with
+            time: timestamp of pool initialization
+            quote_token_scale: `10**(18 - quote token decimals)`
+            quote_token_balance: quote token balance of the pool, normalized to WAD
+        """
+
+        self.time = time
+        self.quote_token_scale = quote_token_scale
+        self.collateral_scale = collateral_scale
+        self.quote_token_balance = quote_token_balance
+
+        self.inflator = WAD
+        self.inflator_update = time
+        self.interest_rate = interest_rate
+        self.interest_rate_update = time
+
+        self.debt_ema = 0
+        self.deposit_ema = 0
+        self.debt_col_ema = 0
+        self.lupt0_debt_ema = 0
+        self.ema_update = 0
+
+        # interest state cached at last update, input of next EMA update
+        self.interest_debt = 0
+        self.meaningful_deposit = 0
+        self.debt_col = 0
+        self.lupt0_debt = 0
+        self.t0_debt2_to_collateral = 0
+
+        self.t0_debt = 0
+        self.pledged_collateral = 0
+        self.total_interest_earned = 0
+
+        self.deposits = Deposits()
+        self.loans = Loans()
+        self.buckets: Dict[int, Bucket] = {}
+        self.borrowers: Dict[str, Borrower] = {}
+        # (bucket index, lender) => lender LP
+        self.lenders: Dict[Tuple[int, str], Lender] = {}
+
+        self.actions: List[Action] = []
+
+    @classmethod
+    def from_pool(cls, pool) -> "PoolModel":
+        """
+        Returns model of `pool`, which must not have been used yet: no deposit, debt nor collateral.
+        """
+
+        from brownie import Contract
+
+        if pool.depositSize() != 0 or pool.totalT0Debt() != 0 or pool.pledgedCollateral() != 0:
+            raise ValueError(f"pool {pool.address} already has deposits, debt or collateral")
+
+        quote_token_scale = pool.quoteTokenScale()
+        interest_rate, interest_rate_update = pool.interestRateInfo()
+        model = cls(
+            interest_rate,
+            interest_rate_update,
+            quote_token_scale,
+            pool.collateralScale(),
+            Contract(pool.quoteTokenAddress()).balanceOf(pool) * quote_token_scale,
+        )
+        model.inflator, model.inflator_update = pool.inflatorInfo()
+        return model
+
+    def warp(self, timestamp: int) -> None:
+        """
+        Moves block timestamp of next actions to `timestamp`.
+        """
+
+        if timestamp < self.time:
+            raise ValueError(f"cannot move time back from {self.time} to {timestamp}")
+        self.time = timestamp
+
+    def sleep(self, seconds: int) -> None:
+        self.warp(self.time + seconds)
+
+    # ------------------------------------------------------------------
+    # Pool actions, arguments as the pool methods with sender first
+    # ------------------------------------------------------------------
+
+    def add_quote_token(self, lender: str, amount: int, index: int, expiry: int = MAX_UINT256) -> Tuple[int, int]:
+        """
+        Returns:
+            LP awarded and amount added net of the deposit fee
+        """
+
+        lender = _address(lender)
+        with self._action(lender, "addQuoteToken", (amount, index, expiry)):
+            if self.time > expiry:
+                raise PoolRevert("TransactionExpired")
+
+            pool_state = self._accrue_pool_interest()
+            amount = _round_to_scale(amount, self.quote_token_scale)
+
+            if amount == 0:
+                raise PoolRevert("InvalidAmount")
+            if index == 0 or index > MAX_FENWICK_INDEX:
+                raise PoolRevert("InvalidIndex")
+
+            bucket = self.buckets.get(index, Bucket())
+            if bucket.bankruptcy_time == self.time:
+                raise PoolRevert("BucketBankruptcyBlock")
+
+            bucket_scale = self.deposits.scale(index)
+            bucket_deposit = wmul(bucket_scale, self.deposits.unscaled_value_at(index))
+
+            added_amount = wmul(amount, WAD - _deposit_fee_rate(pool_state.rate))
+            bucket_lp = _quote_tokens_to_lp(bucket, bucket_deposit, added_amount, price_at(index), round_up=False)
+            if bucket_lp == 0:
+                raise PoolRevert("InsufficientLP")
+
+            self.deposits.unscaled_add(index, wdiv(added_amount, bucket_scale))
+            self._add_lender_lp(index, bucket.bankruptcy_time, lender, bucket_lp)
+            self.buckets[index] = bucket._replace(lps=bucket.lps + bucket_lp)
+
+            self._update_interest_state(pool_state, self.deposits.get_lup(pool_state.debt))
+            self.quote_token_balance += ceil_div(amount, self.quote_token_scale) * self.quote_token_scale
+
+        return bucket_lp, added_amount
+
+    def remove_quote_token(self, lender: str, max_amount: int, index: int) -> Tuple[int, int]:
+        """
+        Returns:
+            amount removed and LP redeemed
+        """
+
+        lender = _address(lender)
+        with self._action(lender, "removeQuoteToken", (max_amount, index)):
+            pool_state = self._accrue_pool_interest()
+
+            max_amount = min(max_amount, self.quote_token_balance)
+            if max_amount == 0:
+                raise PoolRevert("InvalidAmount")
+
+            bucket = self.buckets.get(index, Bucket())
+            lender_lp = self.lenders.get((index, lender), Lender())
+            lp_constraint = lender_lp.lps if bucket.bankruptcy_time < lender_lp.deposit_time else 0
+            if lp_constraint == 0:
+                raise PoolRevert("NoClaim")
+
+            removed_amount, redeemed_lp, unscaled_remaining = self._remove_max_deposit(
+                bucket, index, max_amount, lp_constraint
+            )
+
+            lup = self.deposits.get_lup(pool_state.debt)
+            htp = _htp(self.loans.get_max()[1], pool_state.inflator)
+            if htp > lup or (pool_state.debt != 0 and pool_state.debt > self.deposits.tree_sum()):
+                raise PoolRevert("LUPBelowHTP")
+
+            lp_remaining = bucket.lps - redeemed_lp
+            if bucket.collateral == 0 and unscaled_remaining == 0 and lp_remaining != 0:
+                self.buckets[index] = bucket._replace(lps=0, bankruptcy_time=self.time)
+            else:
+                self.lenders[(index, lender)] = lender_lp._replace(lps=lender_lp.lps - redeemed_lp)
+                self.buckets[index] = bucket._replace(lps=lp_remaining)
+
+            self._update_interest_state(pool_state, lup)
+            self.quote_token_balance -= removed_amount // self.quote_token_scale * self.quote_token_scale
+
+        return removed_amount, redeemed_lp
+
+    def draw_debt(
+        self, sender: str, borrower: str, amount_to_borrow: int, limit_index: int, collateral_to_pledge: int
+    ) -> int:
+        """
+        Returns:
+            LUP after the action
+        """
+
+        sender = _address(sender)
+        borrower = _address(borrower)
+        with self._action(sender, "drawDebt", (borrower, amount_to_borrow, limit_index, collateral_to_pledge)):
+            pool_state = self._accrue_pool_interest()
+
+            amount_to_borrow = _round_to_scale(amount_to_borrow, self.quote_token_scale)
+            collateral_to_pledge = _round_to_scale(collateral_to_pledge, self.collateral_scale)
+
+            if amount_to_borrow > self.quote_token_balance:
+                raise PoolRevert("InsufficientLiquidity")
+            if collateral_to_pledge == 0 and amount_to_borrow == 0:
+                raise PoolRevert("InvalidAmount")
+
+            pre_action = self.borrowers.get(borrower, Borrower())
+            t0_debt, collateral, np_tp_ratio = pre_action
+            t0_pool_debt = pool_state.t0_debt
+            pool_debt = pool_state.debt
+            new_lup = 0
+
+            if collateral_to_pledge != 0:
+                collateral += collateral_to_pledge
+                new_lup = self.deposits.get_lup(pool_debt)
+
+            if amount_to_borrow != 0:
+                if borrower != sender:
+                    raise PoolRevert("BorrowerNotSender")
+
+                t0_borrow_amount = ceil_wdiv(amount_to_borrow, pool_state.inflator)
+                t0_debt_change = wmul(t0_borrow_amount, _borrow_fee_rate(pool_state.rate) + WAD)
+                t0_debt += t0_debt_change
+                borrower_debt = wmul(t0_debt, pool_state.inflator)
+
+                self._revert_on_min_debt(pool_debt, borrower_debt)
+
+                t0_pool_debt += t0_debt_change
+                pool_debt = wmul(t0_pool_debt, pool_state.inflator)
+                new_lup = self.deposits.get_lup(pool_debt)
+
+                _revert_if_price_dropped_below_limit(new_lup, limit_index)
+                if not _is_collateralized(borrower_debt, collateral, new_lup):
+                    raise PoolRevert("BorrowerUnderCollateralized")
+
+                np_tp_ratio = _np_tp_ratio(pool_state.rate)
+
+            self._update_loan(borrower, Borrower(t0_debt, collateral, np_tp_ratio))
+
+            pool_state.debt = pool_debt
+            pool_state.t0_debt = t0_pool_debt
+            pool_state.collateral += collateral_to_pledge
+            self._update_t0_debt2_to_collateral(pre_action.t0_debt, t0_debt, pre_action.collateral, collateral)
+            self._update_interest_state(pool_state, new_lup)
+
+            self.pledged_collateral = pool_state.collateral
+            self.t0_debt = pool_state.t0_debt
+            self.quote_token_balance -= amount_to_borrow // self.quote_token_scale * self.quote_token_scale
+
+        return new_lup
+
+    def repay_debt(
+        self,
+        sender: str,
+        borrower: str,
+        max_quote_token_amount_to_repay: int,
+        collateral_amount_to_pull: int,
+        collateral_receiver: str,
+        limit_index: int,
+    ) -> int:
+        """
+        Returns:
+            amount of quote token repaid
+        """
+
+        sender = _address(sender)
+        borrower = _address(borrower)
+        args = (
+            borrower,
+            max_quote_token_amount_to_repay,
+            collateral_amount_to_pull,
+            _address(collateral_receiver),
+            limit_index,
+        )
+        with self._action(sender, "repayDebt", args):
+            pool_state = self._accrue_pool_interest()
+
+            if max_quote_token_amount_to_repay != MAX_UINT256:
+                max_quote_token_amount_to_repay = _round_to_scale(
+                    max_quote_token_amount_to_repay, self.quote_token_scale
+                )
+            collateral_amount_to_pull = _round_to_scale(collateral_amount_to_pull, self.collateral_scale)
+
+            repay = max_quote_token_amount_to_repay != 0
+            pull = collateral_amount_to_pull != 0
+            if not repay and not pull:
+                raise PoolRevert("InvalidAmount")
+
+            pre_action = self.borrowers.get(borrower, Borrower())
+            t0_debt, collateral, np_tp_ratio = pre_action
+            borrower_debt = wmul(t0_debt, pool_state.inflator)
+            t0_pool_debt = pool_state.t0_debt
+            pool_debt = pool_state.debt
+            quote_token_to_repay = 0
+            new_lup = 0
+
+            if repay:
+                if t0_debt == 0:
+                    raise PoolRevert("NoDebt")
+
+                if max_quote_token_amount_to_repay == MAX_UINT256:
+                    t0_repaid_debt = t0_debt
+                else:
+                    t0_repaid_debt = min(t0_debt, floor_wdiv(max_quote_token_amount_to_repay, pool_state.inflator))
+
+                quote_token_to_repay = ceil_wmul(t0_repaid_debt, pool_state.inflator)
+                if quote_token_to_repay == 0:
+                    raise PoolRevert("InvalidAmount")
+
+                t0_pool_debt -= t0_repaid_debt
+                pool_debt = wmul(t0_pool_debt, pool_state.inflator)
+                borrower_debt = wmul(t0_debt - t0_repaid_debt, pool_state.inflator)
+
+                self._revert_on_min_debt(pool_debt, borrower_debt)
+
+                new_lup = self.deposits.get_lup(pool_debt)
+                t0_debt -= t0_repaid_debt
+
+            if pull:
+                if borrower != sender:
+                    raise PoolRevert("BorrowerNotSender")
+
+                if not repay:
+                    new_lup = self.deposits.get_lup(pool_debt)
+                if collateral_amount_to_pull > collateral:
+                    raise PoolRevert("InsufficientCollateral")
+
+                collateral -= collateral_amount_to_pull
+                if not _is_collateralized(borrower_debt, collateral, new_lup):
+                    raise PoolRevert("InsufficientCollateral")
+
+                np_tp_ratio = _np_tp_ratio(pool_state.rate)
+
+            _revert_if_price_dropped_below_limit(new_lup, limit_index)
+            self._update_loan(borrower, Borrower(t0_debt, collateral, np_tp_ratio))
+
+            pool_state.debt = pool_debt
+            pool_state.t0_debt = t0_pool_debt
+            pool_state.collateral -= collateral_amount_to_pull
+            self._update_t0_debt2_to_collateral(pre_action.t0_debt, t0_debt, pre_action.collateral, collateral)
+            self._update_interest_state(pool_state, new_lup)
+
+            self.pledged_collateral = pool_state.collateral
+            self.t0_debt = pool_state.t0_debt
+            self.quote_token_balance += ceil_div(quote_token_to_repay, self.quote_token_scale) * self.quote_token_scale
+
+        return quote_token_to_repay
+
+    def update_interest(self, sender: str = ZERO_ADDRESS) -> None:
+        with self._action(_address(sender), "updateInterest", ()):
+            pool_state = self._accrue_pool_interest()
+            self._update_interest_state(pool_state, self.deposits.get_lup(pool_state.debt))
+
+    def apply(self, action: Action):
+        """
+        Applies a logged action at current model time, e.g. an action of another model.
+        """
+
+        method = getattr(self, _ACTION_METHODS[action.method])
+        return method(action.sender, *action.args)
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def debt(self) -> int:
+        """
+        Pool debt with interest pending since last update, as first value of `pool.debtInfo()`.
+        """
+
+        return ceil_wmul(self.t0_debt, self.pending_inflator())
+
+    def pending_inflator(self) -> int:
+        return wmul(self.inflator, _pending_interest_factor(self.interest_rate, self.time - self.inflator_update))
+
+    def deposit_size(self) -> int:
+        return self.deposits.tree_sum()
+
+    def lup_index(self) -> int:
+        """
+        Index of the lowest utilized price with pending interest, as `PoolInfoUtils.poolPricesInfo`.
+        """
+
+        return self.deposits.find_index_of_sum(self.debt())
+
+    def lup(self) -> int:
+        return price_at(self.lup_index())
+
+    def htp(self) -> int:
+        """
+        Highest threshold price at pending inflator, as `PoolInfoUtils.htp`.
+        """
+
+        return _htp(self.loans.get_max()[1], self.pending_inflator())
+
+    def utilization(self) -> int:
+        return _utilization(self.debt_ema, self.deposit_ema)
+
+    def bucket_deposit(self, index: int) -> int:
+        return self.deposits.value_at(index)
+
+    def views(
+        self,
+        indexes: Optional[Iterable[int]] = None,
+        borrowers: Optional[Iterable[str]] = None,
+        lenders: Optional[Iterable[Tuple[int, str]]] = None,
+    ) -> Dict[tuple, tuple]:
+        """
+        Returns values the pool views should return in current model state, keyed by (view, *args).
+        Values depending on the timestamp of the block a view is called in are None.
+
+        Args:
+            indexes: buckets to return `bucketInfo` of, every bucket the model knows by default
+            borrowers: borrowers to return `borrowerInfo` of, every borrower the model knows by default
+            lenders: (index, lender) to return `lenderInfo` of, every lender position the model knows by default
+        """
+
+        views = {
+            ("inflatorInfo",): (self.inflator, self.inflator_update),
+            ("interestRateInfo",): (self.interest_rate, self.interest_rate_update),
+            ("emasInfo",): (self.debt_col_ema, self.lupt0_debt_ema, self.debt_ema, self.deposit_ema),
+            ("debtInfo",): (
+                None,
+                ceil_wmul(self.t0_debt, self.inflator),
+                0,
+                self.t0_debt2_to_collateral,
+            ),
+            ("totalT0Debt",): (self.t0_debt,),
+            ("pledgedCollateral",): (self.pledged_collateral,),
+            ("depositSize",): (self.deposit_size(),),
+            ("loansInfo",): (*self.loans.get_max(), self.loans.no_of_loans()),
+            ("reservesInfo",): (0, 0, 0, 0, self.total_interest_earned),
+        }
+
+        for index in self.buckets if indexes is None else indexes:
+            bucket = self.buckets.get(index, Bucket())
+            scale = self.deposits.scale(index)
+            deposit = wmul(scale, self.deposits.unscaled_value_at(index))
+            views[("bucketInfo", index)] = (bucket.lps, bucket.collateral, bucket.bankruptcy_time, deposit, scale)
+
+        for borrower in self.borrowers if borrowers is None else borrowers:
+            views[("borrowerInfo", borrower)] = tuple(self.borrowers.get(_address(borrower), Borrower()))
+
+        for index, lender in self.lenders if lenders is None else lenders:
+            lender_lp = self.lenders.get((index, _address(lender)), Lender())
+            bankruptcy_time = self.buckets.get(index, Bucket()).bankruptcy_time
+            lps = lender_lp.lps if bankruptcy_time < lender_lp.deposit_time else 0
+            views[("lenderInfo", index, lender)] = (lps, lender_lp.deposit_time)
+
+        return views
+
+    # ------------------------------------------------------------------
+    # Pool internals
+    # ------------------------------------------------------------------
+
+    def _action(self, sender: str, method: str, args: tuple) -> "_ModelTransaction":
+        return _ModelTransaction(self, Action(self.time, sender, method, args))
+
+    def _accrue_pool_interest(self) -> _PoolState:
+        pool_state = _PoolState(
+            t0_debt=self.t0_debt,
+            collateral=self.pledged_collateral,
+            inflator=self.inflator,
+            rate=self.interest_rate,
+        )
+
+        if pool_state.t0_debt != 0:
+            pool_state.debt = wmul(pool_state.t0_debt, pool_state.inflator)
+            elapsed = self.time - self.inflator_update
+            pool_state.is_new_interest_accrued = elapsed != 0
+
+            if pool_state.is_new_interest_accrued:
+                try:
+                    new_inflator, new_interest = self._accrue_interest(pool_state, self.loans.get_max()[1], elapsed)
+                except ValueError:
+                    # pool catches `accrueInterest` reverts, emitting `InterestUpdateFailure`
+                    pool_state.is_new_interest_accrued = False
+                else:
+                    pool_state.inflator = new_inflator
+                    pool_state.debt = wmul(pool_state.t0_debt, pool_state.inflator)
+                    self.total_interest_earned += new_interest
+
+        return pool_state
+
+    def _accrue_interest(self, pool_state: _PoolState, max_t0_debt_to_collateral: int, elapsed: int) -> Tuple[int, int]:
+        pending_factor = _pending_interest_factor(pool_state.rate, elapsed)
+
+        new_inflator = wmul(pool_state.inflator, pending_factor)
+        htp = _htp(max_t0_debt_to_collateral, pool_state.inflator)
+
+        if htp > MAX_PRICE:
+            accrual_index = 1
+        elif htp < MIN_PRICE:
+            accrual_index = MAX_FENWICK_INDEX
+        else:
+            accrual_index = index_of(htp)
+
+        lup_index = self.deposits.find_index_of_sum(pool_state.debt)
+        accrual_index = max(accrual_index, lup_index)
+
+        interest_earning_deposit = self.deposits.prefix_sum(accrual_index)
+
+        new_interest = 0
+        if interest_earning_deposit != 0:
+            new_interest = wmul(
+                _lender_interest_margin(_utilization(self.debt_ema, self.deposit_ema)),
+                wmul(pending_factor - WAD, pool_state.debt),
+            )
+            lender_factor = min(
+                floor_wdiv(new_interest, interest_earning_deposit),
+                wmul(pending_factor - WAD, 10 * WAD),
+            ) + WAD
+            self.deposits.mult(accrual_index, lender_factor)
+
+        return new_inflator, new_interest
+
+    def _update_interest_state(self, pool_state: _PoolState, lup: int) -> None:
+        # pool catches `updateInterestState` reverts, emitting `InterestUpdateFailure`
+        try:
+            updated = self._interest_state_update(pool_state, lup)
+        except ValueError:
+            pass
+        else:
+            for name, value in updated.items():
+                setattr(self, name, value)
+
+        if pool_state.is_new_interest_accrued:
+            self.inflator = pool_state.inflator
+            self.inflator_update = self.time
+        elif pool_state.debt == 0:
+            self.inflator = WAD
+            self.inflator_update = self.time
+        elif self.inflator == WAD and self.inflator_update != self.time:
+            self.inflator_update = self.time
+
+    def _interest_state_update(self, pool_state: _PoolState, lup: int) -> Dict[str, int]:
+        # state written by `PoolCommons.updateInterestState`, applied only if it completes
+        debt_ema = self.debt_ema
+        deposit_ema = self.deposit_ema
+        debt_col_ema = self.debt_col_ema
+        lupt0_debt_ema = self.lupt0_debt_ema
+        updated = {}
+
+        # no debt in auction: t0 debt in auction is 0 and non auctioned t0 debt is pool t0 debt
+        non_auctioned_t0_debt = pool_state.t0_debt
+        new_debt = wmul(non_auctioned_t0_debt, pool_state.inflator)
+        new_meaningful_deposit = max(
+            self._meaningful_deposit(non_auctioned_t0_debt, pool_state.inflator), new_debt
+        )
+        new_debt_col = wmul(pool_state.inflator, self.t0_debt2_to_collateral)
+        new_lupt0_debt = wmul(lup, non_auctioned_t0_debt)
+
+        if self.ema_update != self.time:
+            if self.ema_update == 0:
+                debt_ema = new_debt
+                deposit_ema = new_meaningful_deposit
+                debt_col_ema = new_debt_col
+                lupt0_debt_ema = new_lupt0_debt
+            else:
+                elapsed = wdiv(self.time - self.ema_update, 3600)
+                weight_mau = prb_exp(prb_mul(NEG_H_MAU_HOURS, elapsed))
+                weight_tu = prb_exp(prb_mul(NEG_H_TU_HOURS, elapsed))
+
+                debt_ema = _ema(weight_mau, debt_ema, self.interest_debt)
+                deposit_ema = _ema(weight_mau, deposit_ema, self.meaningful_deposit)
+                debt_col_ema = _ema(weight_tu, debt_col_ema, self.debt_col)
+                lupt0_debt_ema = _ema(weight_tu, lupt0_debt_ema, self.lupt0_debt)
+
+            updated.update(
+                debt_ema=debt_ema,
+                deposit_ema=deposit_ema,
+                debt_col_ema=debt_col_ema,
+                lupt0_debt_ema=lupt0_debt_ema,
+                ema_update=self.time,
+            )
+
+        if pool_state.rate > 10**17 and debt_ema < wmul(deposit_ema, 5 * 10**16):
+            updated.update(interest_rate=10**17, interest_rate_update=self.time)
+        elif self.time - self.interest_rate_update > 12 * 3600:
+            new_interest_rate = _calculate_interest_rate(
+                pool_state, debt_ema, deposit_ema, debt_col_ema, lupt0_debt_ema
+            )
+            if pool_state.rate != new_interest_rate:
+                updated.update(interest_rate=new_interest_rate, interest_rate_update=self.time)
+
+        updated.update(
+            interest_debt=new_debt,
+            meaningful_deposit=new_meaningful_deposit,
+            debt_col=new_debt_col,
+            lupt0_debt=new_lupt0_debt,
+        )
+        return updated
+
+    def _meaningful_deposit(self, non_auctioned_t0_debt: int, inflator: int) -> int:
+        dwatp = _dwatp(non_auctioned_t0_debt, inflator, self.t0_debt2_to_collateral)
+        if dwatp == 0 or dwatp < MIN_PRICE:
+            return self.deposits.tree_sum()
+        if dwatp >= MAX_PRICE:
+            return 0
+        return self.deposits.prefix_sum(index_of(dwatp))
+
+    def _remove_max_deposit(
+        self, bucket: Bucket, index: int, deposit_constraint: int, lp_constraint: int
+    ) -> Tuple[int, int, int]:
+        unscaled_deposit_available = self.deposits.unscaled_value_at(index)
+        if unscaled_deposit_available == 0:
+            raise PoolRevert("InsufficientLiquidity")
+
+        price = price_at(index)
+        deposit_scale = self.deposits.scale(index)
+        scaled_deposit_available = wmul(unscaled_deposit_available, deposit_scale)
+
+        scaled_lp_constraint = _lp_to_quote_tokens(bucket, scaled_deposit_available, lp_constraint, price, round_up=False)
+
+        if deposit_constraint < scaled_deposit_available and deposit_constraint < scaled_lp_constraint:
+            removed_amount = deposit_constraint
+            redeemed_lp = _quote_tokens_to_lp(bucket, scaled_deposit_available, removed_amount, price, round_up=True)
+            redeemed_lp = min(redeemed_lp, lp_constraint)
+            unscaled_removed_amount = wdiv(removed_amount, deposit_scale)
+        elif scaled_deposit_available < scaled_lp_constraint:
+            removed_amount = scaled_deposit_available
+            redeemed_lp = _quote_tokens_to_lp(bucket, scaled_deposit_available, removed_amount, price, round_up=True)
+            redeemed_lp = min(redeemed_lp, lp_constraint)
+            unscaled_removed_amount = unscaled_deposit_available
+        else:
+            redeemed_lp = lp_constraint
+            removed_amount = _lp_to_quote_tokens(bucket, scaled_deposit_available, redeemed_lp, price, round_up=False)
+            unscaled_removed_amount = wdiv(removed_amount, deposit_scale)
+
+        if redeemed_lp == bucket.lps:
+            removed_amount = scaled_deposit_available
+            unscaled_removed_amount = unscaled_deposit_available
+
+        scaled_deposit_available -= removed_amount
+        if scaled_deposit_available != 0 and scaled_deposit_available < self.quote_token_scale:
+            raise PoolRevert("DustAmountNotExceeded")
+
+        if redeemed_lp == 0:
+            raise PoolRevert("InsufficientLP")
+
+        self.deposits.unscaled_remove(index, unscaled_removed_amount)
+        return removed_amount, redeemed_lp, unscaled_deposit_available - unscaled_removed_amount
+
+    def _add_lender_lp(self, index: int, bankruptcy_time: int, lender: str, lp_amount: int) -> None:
+        if lp_amount != 0:
+            lender_lp = self.lenders.get((index, lender), Lender())
+            lps = lp_amount if bankruptcy_time >= lender_lp.deposit_time else lender_lp.lps + lp_amount
+            self.lenders[(index, lender)] = Lender(lps, self.time)
+
+    def _update_loan(self, borrower_address: str, borrower: Borrower) -> None:
+        # heap is updated last, once every check of the action passed, so it never needs to be rolled back
+        self.loans.update(borrower_address, borrower.t0_debt, borrower.collateral)
+        self.borrowers[borrower_address] = borrower
+
+    def _update_t0_debt2_to_collateral(self, debt_pre: int, debt_post: int, col_pre: int, col_post: int) -> None:
+        accum_pre = debt_pre**2 // col_pre if col_pre != 0 else 0
+        accum_post = debt_post**2 // col_post if col_post != 0 else 0
+        self.t0_debt2_to_collateral += accum_post - accum_pre
+
+    def _revert_on_min_debt(self, pool_debt: int, borrower_debt: int) -> None:
+        if borrower_debt != 0:
+            if borrower_debt < self.quote_token_scale:
+                raise PoolRevert("DustAmountNotExceeded")
+            loans_count = self.loans.no_of_loans()
+            if loans_count >= 10 and borrower_debt < _min_debt_amount(pool_debt, loans_count):
+                raise PoolRevert("AmountLTMinDebt")
+
+
+class _ModelTransaction:
+    """
+    Runs a model action: logs it if it completes, restores model state if it reverts.
+    """
+
+    def __init__(self, model: PoolModel, action: Action) -> None:
+        self.model = model
+        self.action = action
+        self._saved = None
+
+    def __enter__(self) -> None:
+        model = self.model
+        # values are immutable, shallow copies are enough to restore state
+        self._saved = dict(vars(model))
+        model.deposits = model.deposits.copy()
+        model.buckets = dict(model.buckets)
+        model.borrowers = dict(model.borrowers)
+        model.lenders = dict(model.lenders)
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is not None:
+            vars(self.model).update(self._saved)
+            return False
+        self.model.actions.append(self.action)
+        return False
+
+
+_ACTION_METHODS = {
+    "addQuoteToken": "add_quote_token",
+    "removeQuoteToken": "remove_quote_token",
+    "drawDebt": "draw_debt",
+    "repayDebt": "repay_debt",
+    "updateInterest": "update_interest",
+}
+
+
+# ----------------------------------------------------------------------
+# PoolHelper.sol and PoolCommons.sol internal functions
+# ----------------------------------------------------------------------
+
+
+def _address(account) -> str:
+    return str(getattr(account, "address", account))
+
+
+def _round_to_scale(amount: int, token_scale: int) -> int:
+    return amount // token_scale * token_scale
+
+
+def _borrow_fee_rate(interest_rate: int) -> int:
+    return max(wdiv(interest_rate, 52 * WAD), 5 * 10**14)
+
+
+def _deposit_fee_rate(interest_rate: int) -> int:
+    return wdiv(interest_rate, 365 * 3 * WAD)
+
+
+def _min_debt_amount(debt: int, loans_count: int) -> int:
+    return wdiv(wdiv(debt, loans_count * WAD), 10**19) if loans_count != 0 else 0
+
+
+def _np_tp_ratio(interest_rate: int) -> int:
+    return WAD + prb_sqrt(interest_rate) // 2
+
+
+def _htp(max_t0_debt_to_collateral: int, inflator: int) -> int:
+    return wmul(wmul(max_t0_debt_to_collateral, inflator), COLLATERALIZATION_FACTOR)
+
+
+def _dwatp(t0_debt: int, inflator: int, t0_debt2_to_collateral: int) -> int:
+    if t0_debt == 0:
+        return 0
+    return wdiv(wmul(wmul(inflator, t0_debt2_to_collateral), COLLATERALIZATION_FACTOR), t0_debt)
+
+
+def _is_collateralized(debt: int, collateral: int, price: int) -> bool:
+    if price == MIN_PRICE and debt != 0:
+        return False
+    return wmul(collateral, price) >= wmul(COLLATERALIZATION_FACTOR, debt)
+
+
+def _revert_if_price_dropped_below_limit(new_price: int, limit_index: int) -> None:
+    if new_price < price_at(limit_index):
+        raise PoolRevert("LimitIndexExceeded")
+
+
+def _quote_tokens_to_lp(bucket: Bucket, deposit: int, quote_tokens: int, price: int, round_up: bool) -> int:
+    if (deposit == 0 and bucket.collateral == 0) or bucket.lps == 0:
+        return quote_tokens
+    return _mul_div(bucket.lps, quote_tokens * WAD, deposit * WAD + bucket.collateral * price, round_up)
+
+
+def _lp_to_quote_tokens(bucket: Bucket, deposit: int, lp: int, price: int, round_up: bool) -> int:
+    if (deposit == 0 and bucket.collateral == 0) or bucket.lps == 0:
+        return lp
+    return _mul_div(deposit * WAD + bucket.collateral * price, lp, bucket.lps * WAD, round_up)
+
+
+def _mul_div(x: int, y: int, denominator: int, round_up: bool) -> int:
+    return ceil_div(x * y, denominator) if round_up else mul_div(x, y, denominator)
+
+
+def _pending_interest_factor(interest_rate: int, elapsed: int) -> int:
+    return prb_exp(interest_rate * elapsed // SECONDS_PER_YEAR)
+
+
+def _ema(weight: int, ema: int, value: int) -> int:
+    return prb_mul(weight, ema) + prb_mul(WAD - weight, value)
+
+
+def _utilization(debt_ema: int, deposit_ema: int) -> int:
+    return wdiv(debt_ema, deposit_ema) if deposit_ema != 0 else 0
+
+
+def _lender_interest_margin(mau: int) -> int:
+    base = 1_000_000 * WAD - min(mau, WAD) * 1_000_000
+    if base < WAD:
+        return WAD
+    crpud = prb_pow(base, ONE_THIRD)
+    return WAD - wdiv(wmul(crpud, 15 * 10**16), CUBIC_ROOT_1000000)
+
+
+def _calculate_interest_rate(
+    pool_state: _PoolState, debt_ema: int, deposit_ema: int, debt_col_ema: int, lupt0_debt_ema: int
+) -> int:
+    mau = 0
+    mau102 = 0
+    if pool_state.debt != 0:
+        mau = _utilization(debt_ema, deposit_ema)
+        mau102 = mau * PERCENT_102 // WAD
+
+    tu = wdiv(debt_col_ema, lupt0_debt_ema) if lupt0_debt_ema != 0 else WAD
+
+    new_interest_rate = pool_state.rate
+    if 4 * (tu - mau102) < _trunc_div(tu + mau102 - WAD, 10**9) ** 2 - WAD:
+        new_interest_rate = wmul(pool_state.rate, INCREASE_COEFFICIENT)
+    elif 4 * (tu - mau) > WAD - _trunc_div(tu + mau - WAD, 10**9) ** 2:
+        new_interest_rate = wmul(pool_state.rate, DECREASE_COEFFICIENT)
+
+    return min(4 * WAD, max(10**15, new_interest_rate))
+
+
+def _trunc_div(x: int, y: int) -> int:
+    quotient = abs(x) // abs(y)
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+# ----------------------------------------------------------------------
+# Differential replay on chain
+# ----------------------------------------------------------------------
+
+
+def replay(
+    actions: Iterable[Action],
+    pool,
+    accounts: Optional[Mapping[str, object]] = None,
+    checkpoint_every: int = 100,
+    page_size: int = REPLAY_PAGE_SIZE,
+) -> PoolModel:
+    """
+    Sends `actions` (e.g. `model.actions` of a simulation) to `pool`, a pool not used yet, and asserts
+    every `checkpoint_every` actions and after the last one that pool views return the model state.
+
+    Transactions are sent once chain time reaches action timestamp. Chain can only be moved forward, so a transaction
+    may be mined later than logged: actions are applied to a new model of `pool` at the timestamp they were mined at.
+
+    Args:
+        accounts: sender address => brownie account, senders are impersonated if not given
+        page_size: pool views read per `pool.multicall` at checkpoints
+
+    Returns:
+        model of `pool` after replay
+    """
+
+    from brownie import accounts as brownie_accounts, chain
+
+    if checkpoint_every <= 0:
+        raise ValueError(f"checkpoint_every must be positive: {checkpoint_every}")
+
+    model = PoolModel.from_pool(pool)
+    actions = list(actions)
+    for position, action in enumerate(actions, 1):
+        if action.timestamp > chain.time():
+            chain.sleep(action.timestamp - chain.time())
+
+        if accounts is not None:
+            sender = accounts[action.sender]
+        else:
+            sender = brownie_accounts.at(action.sender, force=True)
+        tx = getattr(pool, action.method)(*action.args, {"from": sender})
+
+        model.warp(tx.timestamp)
+        try:
+            model.apply(action)
+        except PoolRevert as e:
+            raise AssertionError(f"action {position} {action} mined on chain but reverts in model: {e}") from e
+
+        if position % checkpoint_every == 0 or position == len(actions):
+            try:
+                assert_pool_matches(model, pool, page_size)
+            except AssertionError as e:
+                raise AssertionError(f"after action {position} {action}: {e}") from e
+
+    return model
+
+
+def assert_pool_matches(model: PoolModel, pool, page_size: int = REPLAY_PAGE_SIZE) -> None:
+    """
+    Asserts `pool` views return the values of `model.views()`, reading them in batches with `pool.multicall`.
+    """
+
+    expected = model.views()
+    actual = read_views(pool, list(expected), page_size)
+
+    mismatches = [
+        f"{key}: pool {actual[key]}, model {values}"
+        for key, values in expected.items()
+        if not _matches(actual[key], values)
+    ]
+    if mismatches:
+        raise AssertionError("pool state differs from model:\n" + "\n".join(mismatches))
+
+
+def read_views(pool, keys: List[tuple], page_size: int = REPLAY_PAGE_SIZE) -> Dict[tuple, tuple]:
+    """
+    Returns pool views keyed by (view, *args), `page_size` views per `pool.multicall`.
+    """
+
+    results = {}
+    for start in range(0, len(keys), page_size):
+        page = keys[start : start + page_size]
+        calls = [getattr(pool, key[0]) for key in page]
+        outputs = pool.multicall.call([call.encode_input(*key[1:]) for call, key in zip(calls, page)])
+        for key, call, output in zip(page, calls, outputs):
+            values = call.decode_output(output)
+            results[key] = tuple(values) if isinstance(values, tuple) else (values,)
+    return results
+
+
+def _matches(actual: tuple, expected: tuple) -> bool:
+    if len(actual) != len(expected):
+        return False
+    for actual_value, expected_value in zip(actual, expected):
+        if expected_value is None:
+            continue
+        if isinstance(expected_value, str):
+            if str(actual_value).lower() != expected_value.lower():
+                return False
+        elif actual_value != expected_value:
+            return False
+    return True
@@ -0,0 +1,137 @@
+"""
+Immutable snapshot of pool state, read in a few RPC calls instead of one call per value.
+
+Pool details come from `PoolInfoUtilsMulticall.poolDetailsMulticall` and `poolBalanceDetails`,
+values none of them return (interest rate, pledged collateral) are batched through the pool `multicall`.
+Struct parts are named tuples, so they unpack as the PoolInfoUtils views they replace.
+"""
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from .prices import MAX_FENWICK_INDEX
+
+
+class PoolLoansInfo(NamedTuple):
+    pool_size: int
+    loans_count: int
+    max_borrower: str
+    pending_inflator: int
+    pending_interest_factor: int
+
+
+class PoolPriceInfo(NamedTuple):
+    hpb: int
+    hpb_index: int
+    htp: int
+    htp_index: int
+    lup: int
+    lup_index: int
+
+
+class PoolRatesAndFees(NamedTuple):
+    lender_interest_margin: int
+    borrow_fee_rate: int
+    deposit_fee_rate: int
+
+
+class PoolReservesInfo(NamedTuple):
+    reserves: int
+    claimable_reserves: int
+    claimable_reserves_remaining: int
+    auction_price: int
+    time_remaining: int
+
+
+class PoolUtilizationInfo(NamedTuple):
+    pool_min_debt_amount: int
+    pool_collateralization: int
+    pool_actual_utilization: int
+    pool_target_utilization: int
+
+
+class PoolBalanceDetails(NamedTuple):
+    debt: int
+    accrued_debt: int
+    debt_in_auction: int
+    t0_debt2_to_collateral: int
+    # deposit up to MAX_FENWICK_INDEX, i.e. pool deposit size
+    deposit_size: int
+    # token balances of the pool, normalized to WAD
+    quote_token_balance: int
+    collateral_token_balance: int
+
+
+@dataclass(frozen=True)
+class PoolSnapshot:
+    """
+    Pool state at a single chain state.
+
+    Usage:
+        snapshot = PoolSnapshot.load(ajna_protocol.pool_info_utils_multicall, pool)
+        print(snapshot.prices.lup, snapshot.balances.deposit_size)
+    """
+
+    pool: str
+    loans: PoolLoansInfo
+    prices: PoolPriceInfo
+    rates_and_fees: PoolRatesAndFees
+    reserves: PoolReservesInfo
+    utilization: PoolUtilizationInfo
+    balances: PoolBalanceDetails
+    interest_rate: int
+    interest_rate_update: int
+    pledged_collateral: int
+
+    @classmethod
+    def load(cls, multicall, pool, quote_token_address: str = None, collateral_address: str = None) -> "PoolSnapshot":
+        """
+        Reads pool state in three calls: pool details and balances from `PoolInfoUtilsMulticall`
+        and remaining pool views batched in a single `pool.multicall`.
+
+        Args:
+            multicall: deployed PoolInfoUtilsMulticall
+            pool: ERC20 pool
+            quote_token_address: pool quote token, read from pool if not given
+            collateral_address: pool collateral token, read from pool if not given
+        """
+
+        if quote_token_address is None:
+            quote_token_address = pool.quoteTokenAddress()
+        if collateral_address is None:
+            collateral_address = pool.collateralAddress()
+
+        (loans, prices, rates_and_fees, reserves, utilization) = multicall.poolDetailsMulticall(pool.address)
+        balances = multicall.poolBalanceDetails(
+            pool.address, MAX_FENWICK_INDEX, quote_token_address, collateral_address, False
+        )
+
+        views = (pool.interestRateInfo, pool.pledgedCollateral)
+        results = pool.multicall.call([view.encode_input() for view in views])
+        (interest_rate, interest_rate_update) = views[0].decode_output(results[0])
+        pledged_collateral = views[1].decode_output(results[1])
+
+        return cls(
+            pool=pool.address,
+            loans=PoolLoansInfo(*loans),
+            prices=PoolPriceInfo(*prices),
+            rates_and_fees=PoolRatesAndFees(*rates_and_fees),
+            reserves=PoolReservesInfo(*reserves),
+            utilization=PoolUtilizationInfo(*utilization),
+            balances=PoolBalanceDetails(*balances),
+            interest_rate=interest_rate,
+            interest_rate_update=interest_rate_update,
+            pledged_collateral=pledged_collateral,
+        )
+
+    @property
+    def pool_reserves(self) -> int:
+        """
+        Quote token held by the pool beyond deposits net of debt, as computed by `summarize_pool`.
+        """
+
+        return self.balances.quote_token_balance + self.balances.debt - self.balances.deposit_size
+
+    @property
+    def available_liquidity(self) -> int:
+        return self.balances.deposit_size - self.balances.debt
@@ -0,0 +1,221 @@
+"""
+Price and index conversions of `src/libraries/helpers/PoolHelper.sol`, bit exact with `_priceAt` and `_indexOf`.
+
+`PRBMathSD59x18` functions used by the pool (`log2`, `exp2`, `exp`, `mul`, `div`, `ceil`, `sqrt`) and `PRBMathUD60x18.pow`
+are ported with their rounding.
+Price of every Fenwick index is computed once into the immutable `PRICES` table, and `index_of` finds indexes
+by bisection in that table, falling back to the exact `_indexOf` computation only for prices close to a bucket boundary.
+"""
+
+from bisect import bisect_left
+from math import isqrt
+from decimal import Decimal, localcontext
+
+MAX_BUCKET_INDEX = 4_156
+MIN_BUCKET_INDEX = -3_232
+MAX_FENWICK_INDEX = 7_388
+
+MIN_PRICE = 99_836_282_890
+MAX_PRICE = 1_004_968_987_606512354182109771
+
+FLOAT_STEP_INT = 1_005000000000000000
+
+SCALE = 10**18
+HALF_SCALE = 5 * 10**17
+LOG2_E = 1_442695040888963407
+
+# 2^(2^-i) as 1.64 fixed point numbers, factors of PRBMath.exp2 for each fractional bit i of the exponent
+_EXP2_FACTORS = (
+    0x16A09E667F3BCC909, 0x1306FE0A31B7152DF, 0x1172B83C7D517ADCE, 0x10B5586CF9890F62A,
+    0x1059B0D31585743AE, 0x102C9A3E778060EE7, 0x10163DA9FB33356D8, 0x100B1AFA5ABCBED61,
+    0x10058C86DA1C09EA2, 0x1002C605E2E8CEC50, 0x100162F3904051FA1, 0x1000B175EFFDC76BA,
+    0x100058BA01FB9F96D, 0x10002C5CC37DA9492, 0x1000162E525EE0547, 0x10000B17255775C04,
+    0x1000058B91B5BC9AE, 0x100002C5C89D5EC6D, 0x10000162E43F4F831, 0x100000B1721BCFC9A,
+    0x10000058B90CF1E6E, 0x1000002C5C863B73F, 0x100000162E430E5A2, 0x1000000B172183551,
+    0x100000058B90C0B49, 0x10000002C5C8601CC, 0x1000000162E42FFF0, 0x10000000B17217FBB,
+    0x1000000058B90BFCE, 0x100000002C5C85FE3, 0x10000000162E42FF1, 0x100000000B17217F8,
+    0x10000000058B90BFC, 0x1000000002C5C85FE, 0x100000000162E42FF, 0x1000000000B17217F,
+    0x100000000058B90C0, 0x10000000002C5C860, 0x1000000000162E430, 0x10000000000B17218,
+    0x1000000000058B90C, 0x100000000002C5C86, 0x10000000000162E43, 0x100000000000B1721,
+    0x10000000000058B91, 0x1000000000002C5C8, 0x100000000000162E4, 0x1000000000000B172,
+    0x100000000000058B9, 0x10000000000002C5D, 0x1000000000000162E, 0x10000000000000B17,
+    0x1000000000000058C, 0x100000000000002C6, 0x10000000000000163, 0x100000000000000B1,
+    0x10000000000000059, 0x1000000000000002C, 0x10000000000000016, 0x1000000000000000B,
+    0x10000000000000006, 0x10000000000000003, 0x10000000000000001, 0x10000000000000001,
+)
+
+
+def _trunc_div(x: int, y: int) -> int:
+    # Solidity signed division rounds toward zero
+    quotient = abs(x) // abs(y)
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+def prb_log2(x: int) -> int:
+    if x <= 0:
+        raise ValueError(f"PRBMathSD59x18__LogInputTooSmall: {x}")
+
+    if x >= SCALE:
+        sign = 1
+    else:
+        sign = -1
+        x = 10**36 // x
+
+    n = (x // SCALE).bit_length() - 1
+    result = n * SCALE
+
+    y = x >> n
+    if y == SCALE:
+        return result * sign
+
+    delta = HALF_SCALE
+    while delta > 0:
+        y = (y * y) // SCALE
+        if y >= 2 * SCALE:
+            result += delta
+            y >>= 1
+        delta >>= 1
+
+    return result * sign
+
+
+def prb_exp2(x: int) -> int:
+    if x < 0:
+        if x < -59_794705707972522261:
+            return 0
+        return 10**36 // prb_exp2(-x)
+
+    if x >= 192 * SCALE:
+        raise ValueError(f"PRBMathSD59x18__Exp2InputTooBig: {x}")
+
+    x192x64 = (x << 64) // SCALE
+
+    result = 0x800000000000000000000000000000000000000000000000
+    for bit, factor in enumerate(_EXP2_FACTORS):
+        if x192x64 & (1 << (63 - bit)):
+            result = (result * factor) >> 64
+
+    result *= SCALE
+    result >>= 191 - (x192x64 >> 64)
+    return result
+
+
+def prb_exp(x: int) -> int:
+    """
+    `PRBMathSD59x18.exp`, also `PRBMathUD60x18.exp` for non negative `x`.
+    """
+
+    if x < -41_446531673892822322:
+        return 0
+    if x >= 133_084258667509499441:
+        raise ValueError(f"PRBMathSD59x18__ExpInputTooBig: {x}")
+
+    return prb_exp2(_trunc_div(x * LOG2_E + HALF_SCALE, SCALE))
+
+
+def prb_pow(x: int, y: int) -> int:
+    """
+    `PRBMathUD60x18.pow`, `x` must be 0 or at least 1.
+    """
+
+    if x == 0:
+        return SCALE if y == 0 else 0
+    return prb_exp2(prb_mul(prb_log2(x), y))
+
+
+def prb_sqrt(x: int) -> int:
+    if x < 0:
+        raise ValueError(f"PRBMathSD59x18__SqrtNegativeInput: {x}")
+    return isqrt(x * SCALE)
+
+
+def prb_mul(x: int, y: int) -> int:
+    product = abs(x) * abs(y)
+    result = product // SCALE + (1 if product % SCALE > HALF_SCALE - 1 else 0)
+    return result if (x < 0) == (y < 0) else -result
+
+
+def prb_div(x: int, y: int) -> int:
+    result = abs(x) * SCALE // abs(y)
+    return result if (x < 0) == (y < 0) else -result
+
+
+def prb_ceil(x: int) -> int:
+    remainder = x - _trunc_div(x, SCALE) * SCALE
+    if remainder == 0:
+        return x
+    return x - remainder + (SCALE if x > 0 else 0)
+
+
+LOG2_FLOAT_STEP = prb_log2(FLOAT_STEP_INT)
+
+
+def _price_at(index: int) -> int:
+    bucket_index = MAX_BUCKET_INDEX - index
+    return prb_exp2(prb_mul(bucket_index * SCALE, LOG2_FLOAT_STEP))
+
+
+def _index_of(price: int) -> int:
+    index = prb_div(prb_log2(price), LOG2_FLOAT_STEP)
+
+    ceil_index = prb_ceil(index)
+    if index < 0 and ceil_index - index > HALF_SCALE:
+        return 4157 - _trunc_div(ceil_index, SCALE)
+    return 4156 - _trunc_div(ceil_index, SCALE)
+
+
+def _geometric_midpoint(bucket_index: int) -> int:
+    with localcontext() as context:
+        context.prec = 60
+        return int(Decimal("1.005") ** (Decimal(bucket_index) + Decimal("0.5")) * SCALE)
+
+
+# price of each Fenwick index, from MAX_PRICE at index 0 down to MIN_PRICE at MAX_FENWICK_INDEX
+PRICES = tuple(_price_at(index) for index in range(MAX_FENWICK_INDEX + 1))
+# same prices in ascending order, for bisection
+_ASCENDING_PRICES = PRICES[::-1]
+# prices between buckets below 1, where `_indexOf` rounds to the nearest bucket in log space
+_ASCENDING_MIDPOINTS = tuple(_geometric_midpoint(bucket) for bucket in range(MIN_BUCKET_INDEX, 0))
+
+# relative distance to a bucket boundary under which `_indexOf` is computed instead of bisected
+_BOUNDARY_TOLERANCE = 10**9
+
+
+def price_at(index: int) -> int:
+    """
+    Returns price (WAD) of given Fenwick index, as `_priceAt`.
+    """
+
+    if index < 0 or index > MAX_FENWICK_INDEX:
+        raise ValueError(f"BucketIndexOutOfBounds: {index}")
+    return PRICES[index]
+
+
+def index_of(price: int) -> int:
+    """
+    Returns Fenwick index of given price (WAD), as `_indexOf`.
+
+    Above 1 the index of the lowest bucket priced at or above `price` is returned, below 1 the index
+    of the nearest bucket in log space. Both are bisected in the price table.
+    """
+
+    if price < MIN_PRICE or price > MAX_PRICE:
+        raise ValueError(f"BucketPriceOutOfBounds: {price}")
+
+    boundaries = _ASCENDING_PRICES if price >= SCALE else _ASCENDING_MIDPOINTS
+    position = bisect_left(boundaries, price)
+
+    # log rounding of `_indexOf` decides on which side of a boundary prices close to it fall
+    for boundary in boundaries[max(position - 1, 0) : position + 1]:
+        if abs(price - boundary) * _BOUNDARY_TOLERANCE <= price:
+            return _index_of(price)
+
+    return MAX_FENWICK_INDEX - position
+
+
+def price_to_index_safe(price: int) -> int:
+    """
+    Returns Fenwick index of given price, prices out of the pool price range are clamped to MIN_PRICE / MAX_PRICE.
+    """
+
+    return index_of(min(max(price, MIN_PRICE), MAX_PRICE))
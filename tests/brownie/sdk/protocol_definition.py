@@ -1,5 +1,7 @@
-from typing import List
-from dataclasses import dataclass, field
+import hashlib
+import json
+from typing import List, Optional, Union
+from dataclasses import asdict, dataclass, field
 
 AJNA_ADDRESS = "0x9a96ec9B57Fb64FbC60B423d1f4da7691Bd35079"
 
@@ -36,6 +38,22 @@ class TokenWithReserve:
     reserve_address: str
 
 
+@dataclass
+class MockToken:
+    """
+    Local mintable ERC20 token deployed in place of a mainnet token, so AjnaProtocol can run without a mainnet fork.
+    Definition is used to create MockERC20TokenClient.
+    Symbol is used instead of token address everywhere else in protocol definition.
+
+    Attributes:
+        symbol: symbol of the token, also used to reference token in protocol definition
+        decimals: number of token decimals, e.g. 6, 8 or 18
+    """
+
+    symbol: str
+    decimals: int = 18
+
+
 @dataclass
 class PoolsToDeploy:
     """
@@ -129,16 +147,20 @@ class InitialProtocolState:
     It can be used by AjnaProtocolRunner to prepare AjnaProtocol to desired state.
 
     Attributes:
-        - tokens: list of TokenUsedInAjnaProtocolDefinition, list of tokens used in AjnaProtocol
+        - tokens: list of TokenWithReserve or MockToken, list of tokens used in AjnaProtocol
         - deploy_pools: list of AjnaDeployedPoolsDefinition, which defines pools to deploy
         - lenders: list of AjnaUserDefinition, which defines how many tokens each user initially has
         - borrowers: list of AjnaUserDefinition, which defines how many tokens each user initially has
+        - storage_funding: if True, user balances and allowances are written directly to token storage instead of sending transactions
+        - pipelined_transactions: if True, setup transactions are submitted without waiting for each to be mined
     """
 
     lenders: List[AjnaUser] = field(default_factory=list)
     borrowers: List[AjnaUser] = field(default_factory=list)
-    tokens: List[TokenWithReserve] = field(default_factory=list)
+    tokens: List[Union[TokenWithReserve, MockToken]] = field(default_factory=list)
     deploy_pools: List[PoolsToDeploy] = field(default_factory=list)
+    storage_funding: bool = False
+    pipelined_transactions: bool = False
 
     @staticmethod
     def DEFAULT():
@@ -164,6 +186,16 @@ class InitialProtocolState:
 
         return options.build()
 
+    def cache_key(self) -> str:
+        """
+        Returns a stable hash of this definition.
+
+        Two definitions with the same tokens, pools, lenders and borrowers share the same key,
+        so it can be used to cache protocol state prepared from the definition.
+        """
+        definition = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(definition.encode()).hexdigest()
+
 
 class InitialProtocolStateBuilder:
     def __init__(self) -> None:
@@ -209,17 +241,24 @@ class InitialProtocolStateBuilder:
         )
 
     def add_token(
-        self, address: str, reserve_address: str
+        self, address: Union[str, MockToken], reserve_address: Optional[str] = None
     ) -> "InitialProtocolStateBuilder":
         """
         Adds token definition to be used in AjnaProtocol.
 
         Args:
-            address: address of ERC20 token contract
-            reserve_address: address of account with huge amount of token balance used to top up token balance for Ajna users
+            address: address of ERC20 token contract or MockToken to deploy a local mintable token.
+            Mock tokens are referenced by their symbol in the rest of the definition.
+            reserve_address: address of account with huge amount of token balance used to top up token balance for Ajna users.
+            Not used for mock tokens.
         """
 
-        self._options.tokens.append(TokenWithReserve(address, reserve_address))
+        if isinstance(address, MockToken):
+            self._options.tokens.append(address)
+        elif reserve_address is None:
+            raise Exception(f"Reserve address is required for token {address}")
+        else:
+            self._options.tokens.append(TokenWithReserve(address, reserve_address))
         return self
 
     def deploy_pool(
@@ -230,6 +269,34 @@ class InitialProtocolStateBuilder:
         )
         return self
 
+    def with_storage_funding(self, enabled: bool = True) -> "InitialProtocolStateBuilder":
+        """
+        Funds users by writing token balances and allowances directly to storage of the local node.
+        Much faster than sending a transfer and an approve transaction per user, token and pool,
+        but skips token logic (events, total supply, reserve balance).
+
+        Args:
+            enabled: if False, transfer based funding is used (default)
+        """
+
+        self._options.storage_funding = enabled
+        return self
+
+    def with_pipelined_transactions(
+        self, enabled: bool = True
+    ) -> "InitialProtocolStateBuilder":
+        """
+        Submits setup transactions with locally managed nonces without waiting for receipts,
+        mining them together in as few blocks as possible (see TransactionPipeline).
+        Reverts are reported once all transactions are mined.
+
+        Args:
+            enabled: if False, each transaction is mined before the next one is sent (default)
+        """
+
+        self._options.pipelined_transactions = enabled
+        return self
+
 
 class AjnaUserBuilder:
     def __init__(self, builder: InitialProtocolStateBuilder, accounts: List):
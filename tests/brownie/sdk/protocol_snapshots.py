@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+
+from .ajna_protocol import AjnaProtocol
+from .protocol_definition import *
+from .state_cache import ProtocolStateCache
+
+
+class AjnaProtocolSnapshots:
+    """
+    Session wide cache of prepared AjnaProtocol instances.
+
+    Each InitialProtocolState definition is deployed and prepared once, then a chain snapshot is taken.
+    Next requests for the same definition revert chain to that snapshot and return the same AjnaProtocol object.
+    If a ProtocolStateCache is given, first preparation of a definition loads its saved chain state when available.
+    """
+
+    def __init__(
+        self,
+        ajna_address: str = AJNA_ADDRESS,
+        state_cache: Optional[ProtocolStateCache] = None,
+    ) -> None:
+        self._ajna_address = ajna_address
+        self._state_cache = state_cache
+        self._protocols: Dict[str, AjnaProtocol] = {}
+        # keys in the order snapshots were taken, reverting to one invalidates all taken after it
+        self._order: List[str] = []
+
+    def get(self, protocol_definition: InitialProtocolState) -> AjnaProtocol:
+        """
+        Returns AjnaProtocol prepared to state defined by `protocol_definition`.
+
+        Protocol is deployed and prepared on first request for given definition,
+        following requests revert chain to the snapshot taken after preparation.
+
+        Args:
+            protocol_definition: InitialProtocolState
+        """
+
+        key = protocol_definition.cache_key()
+
+        if key in self._protocols:
+            self._protocols[key].revert()
+            self._drop_snapshots_after(key)
+            return self._protocols[key]
+
+        if self._state_cache is not None:
+            protocol = self._state_cache.get(protocol_definition, self._ajna_address)
+        else:
+            protocol = AjnaProtocol(self._ajna_address)
+            protocol.get_runner().prepare_protocol_to_state_by_definition(
+                protocol_definition
+            )
+        protocol.snapshot()
+
+        self._protocols[key] = protocol
+        self._order.append(key)
+        return protocol
+
+    def clear(self) -> None:
+        """
+        Forgets all cached protocols. Chain state is left untouched.
+        """
+
+        self._protocols.clear()
+        self._order.clear()
+
+    def _drop_snapshots_after(self, key: str) -> None:
+        position = self._order.index(key)
+        for stale_key in self._order[position + 1 :]:
+            del self._protocols[stale_key]
+        del self._order[position + 1 :]
@@ -0,0 +1,84 @@
+from typing import Any, Callable, Dict, Tuple
+
+from brownie import chain, history
+from brownie.network.state import _revert_register
+
+
+def chain_state_id() -> Tuple:
+    """
+    Returns an id of current chain state, changing whenever a transaction is sent, a block is mined or chain time moves.
+
+    Id is built from local brownie state only: number of transactions in history, id brownie takes
+    after every `chain.sleep` / `chain.mine` / snapshot, and chain time offset. Reading it costs no RPC call.
+    """
+
+    return len(history), chain._current_id, chain._time_offset
+
+
+class ReadCache:
+    """
+    Cache of contract view results, keyed by contract, method and arguments, valid for a single chain state.
+
+    Results are dropped as soon as chain state changes: a transaction is sent, a block is mined,
+    chain time moves (`chain.sleep`, `chain.mine`) or chain is reverted / reset.
+
+    Usage:
+        cache = ReadCache()
+        (hpb, hpb_index, htp, htp_index, lup, lup_index) = cache.call(pool_info_utils, "poolPricesInfo", pool.address)
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._state_id = None
+        self._results: Dict[Tuple, Any] = {}
+        # notified by brownie on chain revert and reset
+        _revert_register(self)
+
+    def call(self, contract, method: str, *args):
+        """
+        Returns `contract.method(*args)`, from cache if already called in current chain state.
+        """
+
+        return self.get((contract.address, method, args), lambda: getattr(contract, method)(*args))
+
+    def get(self, key: Tuple, load: Callable[[], Any]):
+        """
+        Returns result cached under `key` in current chain state, calling `load` to compute it on a miss.
+        """
+
+        state_id = chain_state_id()
+        if state_id != self._state_id:
+            self._results.clear()
+            self._state_id = state_id
+
+        if key in self._results:
+            self.hits += 1
+            return self._results[key]
+
+        self.misses += 1
+        result = load()
+        self._results[key] = result
+        return result
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._state_id = None
+
+    def reset_counters(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"read cache hits: {self.hits}, misses: {self.misses}, hit rate: {self.hit_rate:.1%}"
+
+    def _revert(self, height: int) -> None:
+        self.clear()
+
+    def _reset(self) -> None:
+        self.clear()
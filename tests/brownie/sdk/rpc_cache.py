@@ -0,0 +1,233 @@
+"""
+Disk backed JSON-RPC cache for a mainnet fork pinned to a block.
+
+Local node (ganache, hardhat or anvil) forks through `ForkCacheProxy` instead of the remote RPC.
+State reads at a given block (code, balance, nonce, storage, block header) never change,
+so every answer is persisted on disk and served from there on next runs, without network access.
+
+Module has no brownie dependency, it is loaded from `brownie_hooks.py` before brownie connects to the network.
+"""
+
+import json
+import sqlite3
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).parents[3] / ".fork-cache" / "rpc.sqlite"
+
+# position of the block parameter of cacheable methods
+BLOCK_PARAM_POSITION = {
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getStorageAt": 2,
+    "eth_getBlockByNumber": 0,
+}
+# methods answering the same for every block
+STATIC_METHODS = ("eth_chainId", "net_version")
+# block tags rewritten to the pinned block
+MOVING_BLOCK_TAGS = ("latest", "pending", "safe", "finalized")
+# key used for static methods
+NO_BLOCK = -1
+
+
+class RpcCache:
+    """
+    On disk store of JSON-RPC results, keyed by block number, method and params.
+
+    Args:
+        path: sqlite database file, created if missing
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rpc_cache ("
+            " block INTEGER NOT NULL, method TEXT NOT NULL, params TEXT NOT NULL, result TEXT NOT NULL,"
+            " PRIMARY KEY (block, method, params))"
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, block: int, method: str, params: list):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM rpc_cache WHERE block = ? AND method = ? AND params = ?",
+                (block, method, json.dumps(params)),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, block: int, method: str, params: list, result) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO rpc_cache (block, method, params, result) VALUES (?, ?, ?, ?)",
+                (block, method, json.dumps(params), json.dumps(result)),
+            )
+            self._db.commit()
+
+    def size(self, block: Optional[int] = None) -> int:
+        """
+        Returns number of cached results, for given block only if set.
+        """
+
+        with self._lock:
+            if block is None:
+                return self._db.execute("SELECT COUNT(*) FROM rpc_cache").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM rpc_cache WHERE block = ?", (block,)
+            ).fetchone()[0]
+
+
+class ForkCacheProxy:
+    """
+    Local JSON-RPC server forwarding requests to `upstream` and caching immutable state reads in `RpcCache`.
+
+    When `block` is set, `eth_blockNumber` and moving block tags (`latest`, `pending`...) are answered
+    as of that block, so a fork started from the proxy never needs the upstream once the cache is warm.
+
+    Args:
+        upstream: remote RPC url, can be None to run fully offline from cache
+        block: pinned fork block number
+        cache: RpcCache used to persist results
+        port: local port to listen to, 0 picks a free one
+    """
+
+    def __init__(
+        self,
+        upstream: Optional[str],
+        block: Optional[int] = None,
+        cache: Optional[RpcCache] = None,
+        port: int = 0,
+    ) -> None:
+        self.upstream = upstream
+        self.block = block
+        self.cache = cache if cache else RpcCache()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(self))
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def fork_url(self) -> str:
+        """
+        Url to pass as fork setting to local node, pinned to proxy block if set.
+        """
+
+        return f"{self.url}@{self.block}" if self.block is not None else self.url
+
+    def start(self) -> "ForkCacheProxy":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, request: dict) -> dict:
+        """
+        Answers a single JSON-RPC request, from cache when possible.
+        """
+
+        method = request.get("method")
+        params = list(request.get("params") or [])
+
+        if method == "eth_blockNumber" and self.block is not None:
+            return _result(request, hex(self.block))
+
+        block = self._block_key(method, params)
+        if block is None:
+            return self._forward(request)
+
+        result = self.cache.get(block, method, params)
+        if result is not None:
+            return _result(request, result)
+
+        response = self._forward({**request, "params": params})
+        if "error" not in response and response.get("result") is not None:
+            self.cache.put(block, method, params, response["result"])
+        return response
+
+    def _block_key(self, method: str, params: list) -> Optional[int]:
+        if method in STATIC_METHODS:
+            return NO_BLOCK
+
+        position = BLOCK_PARAM_POSITION.get(method)
+        if position is None or position >= len(params):
+            return None
+
+        tag = params[position]
+        if tag in MOVING_BLOCK_TAGS and self.block is not None:
+            params[position] = hex(self.block)
+            return self.block
+        if isinstance(tag, str) and tag.startswith("0x"):
+            return int(tag, 16)
+
+        return None
+
+    def _forward(self, request: dict) -> dict:
+        if self.upstream is None:
+            return _error(request, f"{request.get('method')} is not cached and no upstream is set")
+
+        upstream_request = urllib.request.Request(
+            self.upstream,
+            data=json.dumps(request).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(upstream_request, timeout=60) as response:
+                return json.loads(response.read())
+        except OSError as ex:
+            return _error(request, f"upstream request failed: {ex}")
+
+
+def _handler_for(proxy: ForkCacheProxy):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(body, list):
+                response = [proxy.handle(request) for request in body]
+            else:
+                response = proxy.handle(body)
+
+            payload = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _result(request: dict, result) -> dict:
+    return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+
+def _error(request: dict, message: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request.get("id"),
+        "error": {"code": -32000, "message": message},
+    }
@@ -0,0 +1,143 @@
+"""
+Event driven actor scheduler for pool simulations.
+
+Actors are kept in a priority queue keyed by the timestamp of their next interaction. Instead of polling every actor
+at a fixed step, chain time jumps straight to the next due interaction and every actor due within the same window
+acts at that timestamp, so a simulation costs as many iterations as there are actual actions.
+"""
+
+import heapq
+import itertools
+from contextlib import nullcontext
+from typing import Callable, Hashable, Iterable, List, Optional, Tuple
+
+# actors due within this many seconds of the first due actor act at the same timestamp
+DEFAULT_WINDOW = 900
+
+
+class ActorScheduler:
+    """
+    Runs actors of a simulation at their next trigger timestamps.
+
+    `act(actor)` performs the actor interaction, `interval(actor)` returns seconds until its next interaction
+    (None to stop scheduling it). Actors are rescheduled even if `act` raises, so a failing action is not retried
+    in a loop.
+
+    With `batch`, each window runs inside a `TransactionPipeline`: transactions sent through `transact`
+    by actors of the window land together in a single block.
+
+    Usage:
+        scheduler = ActorScheduler(act=lambda i: step(actors[i]), interval=lambda i: 3600 + 60 * i)
+        scheduler.schedule_all(range(len(actors)), at=chain.time())
+        scheduler.run(until=chain.time() + SECONDS_PER_DAY * 7)
+    """
+
+    def __init__(
+        self,
+        act: Callable[[Hashable], None],
+        interval: Callable[[Hashable], Optional[int]],
+        clock=None,
+        window: int = DEFAULT_WINDOW,
+        batch: bool = False,
+    ) -> None:
+        if window < 0:
+            raise ValueError(f"window must not be negative: {window}")
+        if clock is None:
+            from brownie import chain as clock
+
+        self.act = act
+        self.interval = interval
+        self.clock = clock
+        self.window = window
+        self.batch = batch
+        # number of windows run and actor interactions performed
+        self.iterations = 0
+        self.actions = 0
+        self._queue: List[Tuple[int, int, Hashable]] = []
+        # ties between actors due at the same time are broken by scheduling order
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def schedule(self, actor: Hashable, at: int) -> None:
+        """
+        Schedules `actor` to act at timestamp `at`.
+        """
+
+        heapq.heappush(self._queue, (int(at), next(self._sequence), actor))
+
+    def schedule_all(self, actors: Iterable[Hashable], at: int) -> None:
+        for actor in actors:
+            self.schedule(actor, at)
+
+    def next_due(self) -> Optional[int]:
+        """
+        Returns timestamp of the next scheduled interaction, None if no actor is scheduled.
+        """
+
+        return self._queue[0][0] if self._queue else None
+
+    def run(self, until: int) -> int:
+        """
+        Runs scheduled interactions due before `until`, jumping chain time from one window to the next,
+        and leaves chain time at `until`.
+
+        Returns:
+            number of actor interactions performed
+        """
+
+        actions = self.actions
+        while self._queue and self._queue[0][0] < until:
+            self._sleep_until(self._queue[0][0])
+            self.run_due()
+        self._sleep_until(until)
+        return self.actions - actions
+
+    def run_due(self) -> List[Hashable]:
+        """
+        Runs every actor due up to `window` seconds from now, at current chain time.
+
+        Returns:
+            actors which acted, in order
+        """
+
+        now = self.clock.time()
+        due = []
+        while self._queue and self._queue[0][0] <= now + self.window:
+            due.append(heapq.heappop(self._queue)[2])
+        if not due:
+            return due
+
+        self.iterations += 1
+        with self._block():
+            for position, actor in enumerate(due):
+                try:
+                    self.actions += 1
+                    self.act(actor)
+                except BaseException:
+                    # actors not reached yet stay due
+                    for waiting in due[position + 1 :]:
+                        self.schedule(waiting, now)
+                    raise
+                finally:
+                    self._reschedule(actor)
+        return due
+
+    def _reschedule(self, actor: Hashable) -> None:
+        interval = self.interval(actor)
+        if interval is not None:
+            self.schedule(actor, self.clock.time() + interval)
+
+    def _sleep_until(self, timestamp: int) -> None:
+        seconds = timestamp - self.clock.time()
+        if seconds > 0:
+            self.clock.sleep(seconds)
+
+    def _block(self):
+        if not self.batch:
+            return nullcontext()
+
+        from .tx_pipeline import TransactionPipeline
+
+        return TransactionPipeline()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+from brownie import web3
+
+from .ajna_protocol import AjnaProtocol
+from .protocol_definition import *
+
+PROJECT_ROOT = Path(__file__).parents[3]
+DEFAULT_BUILD_PATH = PROJECT_ROOT / "brownie_out"
+DEFAULT_STATE_CACHE_PATH = PROJECT_ROOT / ".state-cache"
+
+
+def artifacts_hash(build_path: Path = DEFAULT_BUILD_PATH) -> str:
+    """
+    Returns hash of compiled contract artifacts, changes whenever any contract is recompiled differently.
+
+    Args:
+        build_path: brownie build folder
+    """
+
+    digest = hashlib.sha256()
+    for artifact in sorted(Path(build_path).glob("contracts/**/*.json")):
+        digest.update(artifact.relative_to(build_path).as_posix().encode())
+        digest.update(artifact.read_bytes())
+    return digest.hexdigest()
+
+
+def dump_node_state() -> str:
+    """
+    Returns full state of the local node, as hex encoded blob.
+    Requires Anvil (`anvil_dumpState`).
+    """
+
+    response = web3.provider.make_request("anvil_dumpState", [])
+    if "error" in response:
+        raise Exception(f"Failed to dump node state: {response['error']}")
+    return response["result"]
+
+
+def load_node_state(state: str) -> None:
+    """
+    Loads state returned by `dump_node_state` into the local node.
+    Requires Anvil (`anvil_loadState`).
+    """
+
+    response = web3.provider.make_request("anvil_loadState", [state])
+    if "error" in response or not response.get("result"):
+        raise Exception(f"Failed to load node state: {response.get('error')}")
+
+
+class ProtocolStateCache:
+    """
+    On disk cache of chain state after AjnaProtocol deployment and preparation by an InitialProtocolState.
+
+    Entries are keyed by hash of build artifacts and protocol definition, so a contract change or
+    a definition change prepares protocol again. Chain state is dumped and loaded with Anvil state RPCs,
+    SDK objects are restored from the manifest saved next to it.
+
+    Args:
+        cache_path: folder where chain states and manifests are saved
+        build_path: brownie build folder hashed in cache keys
+    """
+
+    def __init__(
+        self,
+        cache_path: Path = DEFAULT_STATE_CACHE_PATH,
+        build_path: Path = DEFAULT_BUILD_PATH,
+    ) -> None:
+        self._cache_path = Path(cache_path)
+        self._artifacts_hash = artifacts_hash(build_path)
+
+    def key(self, protocol_definition: InitialProtocolState) -> str:
+        """
+        Returns cache key of given protocol definition for current build artifacts.
+        """
+
+        digest = hashlib.sha256()
+        digest.update(self._artifacts_hash.encode())
+        digest.update(protocol_definition.cache_key().encode())
+        return digest.hexdigest()
+
+    def get(
+        self, protocol_definition: InitialProtocolState, ajna_address: str = AJNA_ADDRESS
+    ) -> AjnaProtocol:
+        """
+        Returns AjnaProtocol prepared to state defined by `protocol_definition`.
+
+        If a saved state matches current artifacts and definition, it is loaded and nothing is deployed nor funded.
+        Otherwise protocol is deployed, prepared and its state is saved for next runs.
+        """
+
+        protocol = self.load(protocol_definition)
+        if protocol is not None:
+            return protocol
+
+        protocol = AjnaProtocol(ajna_address)
+        protocol.get_runner().prepare_protocol_to_state_by_definition(
+            protocol_definition
+        )
+        self.save(protocol, protocol_definition)
+        return protocol
+
+    def load(self, protocol_definition: InitialProtocolState) -> Optional[AjnaProtocol]:
+        """
+        Loads saved chain state for `protocol_definition` and returns AjnaProtocol attached to it,
+        or None if nothing was saved for current artifacts and definition.
+        """
+
+        state_file, manifest_file = self._files(protocol_definition)
+        if not state_file.exists() or not manifest_file.exists():
+            return None
+
+        manifest = json.loads(manifest_file.read_text())
+        if not manifest["contracts"].keys() >= AjnaProtocol._deployed_contracts().keys():
+            # saved by an SDK version deploying fewer contracts
+            return None
+
+        load_node_state(state_file.read_text())
+        return AjnaProtocol(manifest["ajna"], manifest=manifest)
+
+    def save(self, protocol: AjnaProtocol, protocol_definition: InitialProtocolState) -> None:
+        """
+        Saves current chain state and `protocol` manifest for `protocol_definition`.
+        """
+
+        state_file, manifest_file = self._files(protocol_definition)
+        self._cache_path.mkdir(parents=True, exist_ok=True)
+
+        state_file.write_text(dump_node_state())
+        manifest_file.write_text(json.dumps(protocol.to_manifest(), indent=2))
+
+    def _files(self, protocol_definition: InitialProtocolState):
+        key = self.key(protocol_definition)
+        return (
+            self._cache_path / f"{key}.state",
+            self._cache_path / f"{key}.json",
+        )
@@ -0,0 +1,369 @@
+"""
+Parallel Monte Carlo sweeps of brownie simulations.
+
+`run_sweep` expands a parameter grid and a list of seeds into runs and executes each run as its own
+`brownie test` process, as many at a time as there are cores. Every worker launches its local node on a port
+of its own (`AJNA_NODE_PORT`, applied by `brownie_hooks.py`), so runs never share chain state.
+
+A run reads its parameters and seed with `sweep_params` / `current_run` and records metrics through a
+`RunRecorder` into `SweepResults`, a sqlite store shared by all workers.
+
+Module has no brownie dependency at import, the sweep driver process never connects to a network.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# run description passed to the worker process, as JSON
+SWEEP_RUN_ENV = "AJNA_SWEEP_RUN"
+# port the worker local node listens to
+NODE_PORT_ENV = "AJNA_NODE_PORT"
+
+DEFAULT_BASE_PORT = 8600
+# seconds a worker waits on a store locked by another worker
+STORE_TIMEOUT = 60
+# rows buffered by a recorder before they are written to the store
+RECORDER_BATCH_SIZE = 1_000
+
+
+@dataclass(frozen=True)
+class SweepRun:
+    run_id: int
+    seed: int
+    params: Dict[str, Any] = field(default_factory=dict)
+    results: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps({"run_id": self.run_id, "seed": self.seed, "params": self.params, "results": self.results})
+
+    @classmethod
+    def from_json(cls, value: str) -> "SweepRun":
+        return cls(**json.loads(value))
+
+
+def sweep_run_id(seed: int, params: Mapping[str, Any]) -> int:
+    """
+    Returns the id of the run of `params` with `seed`, a hash of both, so runs of different grids and seed lists
+    recorded into one store never share an id.
+    """
+
+    value = json.dumps({"seed": seed, "params": params}, sort_keys=True)
+    # sqlite integer keys are signed 64 bit
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big") >> 1
+
+
+def sweep_runs(grid: Mapping[str, Sequence], seeds: Iterable[int], results: Optional[str] = None) -> List[SweepRun]:
+    """
+    Returns a run for every combination of grid values and seed, seeds varying fastest.
+
+    Usage:
+        sweep_runs({"NUM_LENDERS": [25, 50], "GOAL_UTILIZATION": [0.4, 0.5]}, seeds=range(4))  # 16 runs
+    """
+
+    names = list(grid)
+    seeds = list(seeds)
+    runs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in seeds:
+            params = dict(zip(names, values))
+            runs.append(SweepRun(sweep_run_id(seed, params), seed, params, results))
+    return runs
+
+
+def current_run() -> Optional[SweepRun]:
+    """
+    Returns the sweep run this process executes, None outside of a sweep.
+    """
+
+    value = os.environ.get(SWEEP_RUN_ENV)
+    return SweepRun.from_json(value) if value else None
+
+
+def sweep_params(defaults: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Returns `defaults` overridden by parameters of the current sweep run.
+
+    Raises:
+        KeyError: if the run sets a parameter missing from `defaults`
+    """
+
+    params = dict(defaults)
+    run = current_run()
+    if run is not None:
+        unknown = set(run.params) - set(params)
+        if unknown:
+            raise KeyError(f"unknown sweep parameters: {sorted(unknown)}")
+        params.update(run.params)
+    return params
+
+
+class SweepResults:
+    """
+    Results of sweep runs in a sqlite database, written concurrently by every worker.
+
+    Per run it holds the run parameters and status, metric time series (e.g. utilization and rate paths),
+    gas used by each transaction and invariant failures.
+
+    Usage:
+        results = SweepResults("sweep.sqlite")
+        for run, status in results.runs():
+            steps, utilization = results.series(run.run_id, "utilization")
+    """
+
+    def __init__(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+        self._db = sqlite3.connect(str(path), timeout=STORE_TIMEOUT)
+        # readers do not block the writing worker
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id INTEGER PRIMARY KEY, seed INTEGER NOT NULL, params TEXT NOT NULL,"
+            " status TEXT NOT NULL, started REAL, finished REAL, log TEXT);"
+            "CREATE TABLE IF NOT EXISTS series ("
+            " run_id INTEGER NOT NULL, name TEXT NOT NULL, step INTEGER NOT NULL, value REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS series_run_name ON series (run_id, name);"
+            "CREATE TABLE IF NOT EXISTS gas ("
+            " run_id INTEGER NOT NULL, method TEXT NOT NULL, gas_used INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS failures ("
+            " run_id INTEGER NOT NULL, step INTEGER NOT NULL, message TEXT NOT NULL);"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def start_run(self, run: SweepRun) -> None:
+        """
+        Registers `run` as running, dropping anything recorded by a previous attempt.
+        """
+
+        with self._db:
+            for table in ("series", "gas", "failures"):
+                self._db.execute(f"DELETE FROM {table} WHERE run_id = ?", (run.run_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (run_id, seed, params, status, started) VALUES (?, ?, ?, 'running', ?)",
+                (run.run_id, run.seed, json.dumps(run.params, sort_keys=True), time.time()),
+            )
+
+    def finish_run(self, run_id: int, status: str, log: Optional[str] = None) -> None:
+        with self._db:
+            self._db.execute(
+                "UPDATE runs SET status = ?, finished = ?, log = ? WHERE run_id = ?",
+                (status, time.time(), log, run_id),
+            )
+
+    def write(
+        self,
+        series: Sequence[Tuple[int, str, int, float]] = (),
+        gas: Sequence[Tuple[int, str, int]] = (),
+        failures: Sequence[Tuple[int, int, str]] = (),
+    ) -> None:
+        """
+        Writes rows of each table in a single transaction.
+        """
+
+        with self._db:
+            self._db.executemany("INSERT INTO series VALUES (?, ?, ?, ?)", series)
+            self._db.executemany("INSERT INTO gas VALUES (?, ?, ?)", gas)
+            self._db.executemany("INSERT INTO failures VALUES (?, ?, ?)", failures)
+
+    def runs(self, status: Optional[str] = None) -> List[Tuple[SweepRun, str]]:
+        """
+        Returns every run recorded, with its status (`running`, `passed` or `failed`).
+        """
+
+        query = "SELECT run_id, seed, params, status FROM runs"
+        args: tuple = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            args = (status,)
+        rows = self._db.execute(query + " ORDER BY run_id", args).fetchall()
+        return [(SweepRun(run_id, seed, json.loads(params)), status) for run_id, seed, params, status in rows]
+
+    def series(self, run_id: int, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns steps (int64 array) and values (float array) of a metric time series of a run.
+        """
+
+        rows = self._db.execute(
+            "SELECT step, value FROM series WHERE run_id = ? AND name = ? ORDER BY step", (run_id, name)
+        ).fetchall()
+        steps = np.array([step for step, _ in rows], dtype=np.int64)
+        values = np.array([value for _, value in rows], dtype=float)
+        return steps, values
+
+    def gas(self, run_id: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns gas used by transactions of a run, or of every run, as an int64 array per method.
+        """
+
+        query = "SELECT method, gas_used FROM gas"
+        args: tuple = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+
+        gas: Dict[str, list] = {}
+        for method, gas_used in self._db.execute(query, args):
+            gas.setdefault(method, []).append(gas_used)
+        return {method: np.array(values, dtype=np.int64) for method, values in gas.items()}
+
+    def failures(self, run_id: Optional[int] = None) -> List[Tuple[int, int, str]]:
+        """
+        Returns (run id, step, message) of invariant failures of a run, or of every run.
+        """
+
+        query = "SELECT run_id, step, message FROM failures"
+        args: tuple = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            args = (run_id,)
+        return self._db.execute(query + " ORDER BY run_id, step", args).fetchall()
+
+
+class RunRecorder:
+    """
+    Records metrics of the current sweep run, buffered and written to `SweepResults` in batches,
+    so workers rarely contend for the store. Outside of a sweep every call is a no-op.
+
+    Usage:
+        with RunRecorder.for_current_run() as recorder:
+            recorder.record("utilization", chain.time(), utilization)
+            recorder.record_gas("drawDebt", tx.gas_used)
+    """
+
+    def __init__(self, results: Optional[SweepResults], run_id: int = 0, batch_size: int = RECORDER_BATCH_SIZE):
+        self.results = results
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self._series: List[Tuple[int, str, int, float]] = []
+        self._gas: List[Tuple[int, str, int]] = []
+        self._failures: List[Tuple[int, int, str]] = []
+
+    @classmethod
+    def for_current_run(cls) -> "RunRecorder":
+        run = current_run()
+        if run is None or run.results is None:
+            return cls(None)
+        return cls(SweepResults(run.results), run.run_id)
+
+    @property
+    def enabled(self) -> bool:
+        return self.results is not None
+
+    def __enter__(self) -> "RunRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.flush()
+
+    def record(self, name: str, step: int, value: float) -> None:
+        if self.enabled:
+            self._series.append((self.run_id, name, int(step), float(value)))
+            self._flush_if_full()
+
+    def record_gas(self, method: str, gas_used: int) -> None:
+        if self.enabled:
+            self._gas.append((self.run_id, method, int(gas_used)))
+            self._flush_if_full()
+
+    def record_failure(self, step: int, message: str) -> None:
+        if self.enabled:
+            self._failures.append((self.run_id, int(step), message))
+            self._flush_if_full()
+
+    def flush(self) -> None:
+        if self.enabled and (self._series or self._gas or self._failures):
+            self.results.write(self._series, self._gas, self._failures)
+            self._series, self._gas, self._failures = [], [], []
+
+    def _flush_if_full(self) -> None:
+        if len(self._series) + len(self._gas) + len(self._failures) >= self.batch_size:
+            self.flush()
+
+
+def run_sweep(
+    grid: Mapping[str, Sequence],
+    seeds: Iterable[int],
+    results,
+    test: str = "tests/brownie/test_stable_volatile.py",
+    workers: Optional[int] = None,
+    base_port: int = DEFAULT_BASE_PORT,
+    brownie_args: Sequence[str] = (),
+    skip_passed: bool = True,
+) -> Dict[str, int]:
+    """
+    Runs `test` once per grid combination and seed, `workers` runs at a time, each in its own
+    `brownie test` process with its own local node on port `base_port + worker`.
+
+    Output of each run is saved next to the store, in `<results>.logs/run-<id>.log`.
+
+    Args:
+        results: path of the `SweepResults` store
+        workers: parallel runs, number of cores by default
+        brownie_args: extra arguments of `brownie test`, e.g. `("--network", "anvil-fork")`
+        skip_passed: do not run again runs the store already has as passed, so an interrupted sweep resumes
+
+    Returns:
+        number of runs per final status
+    """
+
+    results_path = str(Path(results).resolve())
+    runs = sweep_runs(grid, seeds, results_path)
+    store = SweepResults(results_path)
+    if skip_passed:
+        passed = {run.run_id for run, _ in store.runs("passed")}
+        runs = [run for run in runs if run.run_id not in passed]
+    store.close()
+
+    workers = workers or os.cpu_count() or 1
+    logs = Path(results_path + ".logs")
+    logs.mkdir(parents=True, exist_ok=True)
+
+    # a port is held by one worker at a time, local nodes of concurrent runs never collide
+    ports: "queue.Queue[int]" = queue.Queue()
+    for worker in range(workers):
+        ports.put(base_port + worker)
+
+    def execute(run: SweepRun) -> str:
+        port = ports.get()
+        try:
+            return _execute_run(run, port, test, brownie_args, logs / f"run-{run.run_id}.log")
+        finally:
+            ports.put(port)
+
+    counts: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for status in executor.map(execute, runs):
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _execute_run(run: SweepRun, port: int, test: str, brownie_args: Sequence[str], log_path: Path) -> str:
+    store = SweepResults(run.results)
+    try:
+        store.start_run(run)
+        env = dict(os.environ, **{SWEEP_RUN_ENV: run.to_json(), NODE_PORT_ENV: str(port)})
+        command = ["brownie", "test", test, "-s", *brownie_args]
+        with open(log_path, "w") as log:
+            process = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        status = "passed" if process.returncode == 0 else "failed"
+        store.finish_run(run.run_id, status, str(log_path))
+        return status
+    finally:
+        store.close()
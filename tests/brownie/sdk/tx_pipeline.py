@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Tuple
+
+from brownie import chain, web3
+from brownie.network.transaction import TransactionReceipt
+from web3.exceptions import TransactionNotFound
+
+# gas limit of pipelined token transactions, gas cannot be estimated against state of transactions not mined yet
+TOKEN_TX_GAS_LIMIT = 250_000
+# blocks mined at a barrier without any transaction landing before giving up
+MAX_EMPTY_BLOCKS = 10
+
+_active_pipeline: Optional["TransactionPipeline"] = None
+
+
+class NonceManager:
+    """
+    Hands out consecutive nonces per sender, starting from the sender's pending transaction count.
+    """
+
+    def __init__(self) -> None:
+        self._nonces: Dict[str, int] = {}
+
+    def next(self, address: str) -> int:
+        if address not in self._nonces:
+            self._nonces[address] = web3.eth.get_transaction_count(address, "pending")
+
+        nonce = self._nonces[address]
+        self._nonces[address] += 1
+        return nonce
+
+    def reset(self) -> None:
+        self._nonces.clear()
+
+
+class TransactionPipeline:
+    """
+    Submits SDK transactions without waiting for them to be mined.
+
+    Transactions are sent with locally managed nonces. When node supports it, automine is disabled
+    while pipeline is active, so transactions queue up and land together in as few blocks as possible.
+    Receipts are collected and reverts checked at `barrier`, which also runs when pipeline context exits.
+
+    Usage:
+        with TransactionPipeline():
+            sdk.get_runner().prepare_protocol_to_state_by_definition(protocol_definition)
+    """
+
+    def __init__(self, manual_mining: bool = True) -> None:
+        self._mining_rpc = _mining_rpc() if manual_mining else None
+        self._nonces = NonceManager()
+        self._pending: List[Tuple[TransactionReceipt, str]] = []
+        self._previous = None
+
+    def __enter__(self) -> "TransactionPipeline":
+        global _active_pipeline
+        self._previous = _active_pipeline
+        _active_pipeline = self
+
+        if self._mining_rpc:
+            web3.provider.make_request(*self._mining_rpc["stop"])
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        global _active_pipeline
+        try:
+            if exc_type is None:
+                self.barrier()
+        finally:
+            if self._mining_rpc:
+                web3.provider.make_request(*self._mining_rpc["start"])
+            _active_pipeline = self._previous
+
+    def submit(
+        self, fn, *args, sender, failure_message: str, gas_limit: int = None
+    ) -> TransactionReceipt:
+        """
+        Sends `fn(*args)` from `sender` without waiting for it to be mined.
+        Revert is reported with `failure_message` at next barrier.
+        """
+
+        tx_params = {
+            "from": sender,
+            "nonce": self._nonces.next(sender.address),
+            "required_confs": 0,
+        }
+        if gas_limit is not None:
+            tx_params["gas_limit"] = gas_limit
+
+        tx = fn(*args, tx_params)
+        self._pending.append((tx, failure_message))
+        return tx
+
+    def barrier(self) -> List[TransactionReceipt]:
+        """
+        Mines until every submitted transaction is included, then checks them for reverts.
+
+        Returns:
+            receipts of transactions submitted since previous barrier, in submission order
+        """
+
+        pending, self._pending = self._pending, []
+
+        not_mined = [tx for tx, _ in pending]
+        empty_blocks = 0
+        while not_mined:
+            if self._mining_rpc:
+                chain.mine()
+
+            still_not_mined = [tx for tx in not_mined if not _is_mined(tx)]
+            empty_blocks = empty_blocks + 1 if len(still_not_mined) == len(not_mined) else 0
+            if empty_blocks > MAX_EMPTY_BLOCKS:
+                raise Exception(
+                    f"{len(still_not_mined)} transactions not mined after {MAX_EMPTY_BLOCKS} blocks"
+                )
+            not_mined = still_not_mined
+
+        failures = []
+        for tx, failure_message in pending:
+            tx.wait(1)
+            if tx.status != 1:
+                failures.append(f"{failure_message}. Revert message: {tx.revert_msg}")
+
+        self._nonces.reset()
+        if failures:
+            raise Exception("\n".join(failures))
+
+        return [tx for tx, _ in pending]
+
+
+def active_pipeline() -> Optional[TransactionPipeline]:
+    """
+    Returns pipeline of the current `with TransactionPipeline()` block, None outside of it.
+    """
+
+    return _active_pipeline
+
+
+def transact(
+    fn, *args, sender, failure_message: str, gas_limit: int = None
+) -> TransactionReceipt:
+    """
+    Sends `fn(*args)` transaction from `sender`.
+
+    Inside a TransactionPipeline the transaction is submitted without waiting and checked at the pipeline barrier.
+    Otherwise it is mined right away and an exception with `failure_message` is raised if it reverts.
+    """
+
+    if _active_pipeline is not None:
+        return _active_pipeline.submit(
+            fn, *args, sender=sender, failure_message=failure_message, gas_limit=gas_limit
+        )
+
+    tx = fn(*args, {"from": sender})
+
+    if bool(tx.revert_msg):
+        raise Exception(f"{failure_message}. Revert message: {tx.revert_msg}")
+
+    return tx
+
+
+def deploy_all(contracts: Dict[str, tuple], sender) -> Dict:
+    """
+    Deploys contracts given as `{name: (container, *constructor_args)}`.
+
+    Inside a TransactionPipeline all deployments are submitted at once and awaited at a barrier.
+
+    Returns:
+        deployed contracts by name
+    """
+
+    if _active_pipeline is None:
+        return {
+            name: container.deploy(*args, {"from": sender})
+            for name, (container, *args) in contracts.items()
+        }
+
+    txs = {
+        name: _active_pipeline.submit(
+            container.deploy,
+            *args,
+            sender=sender,
+            failure_message=f"Failed to deploy {container._name}",
+        )
+        for name, (container, *args) in contracts.items()
+    }
+    _active_pipeline.barrier()
+
+    return {
+        name: contracts[name][0].at(tx.contract_address) for name, tx in txs.items()
+    }
+
+
+def _is_mined(tx: TransactionReceipt) -> bool:
+    try:
+        return web3.eth.get_transaction_receipt(tx.txid) is not None
+    except TransactionNotFound:
+        return False
+
+
+def _mining_rpc() -> Optional[dict]:
+    """
+    Returns RPC requests stopping and starting automine on the local node, None if not supported.
+    """
+
+    client = web3.clientVersion.lower()
+    if "anvil" in client or "hardhat" in client:
+        return {"stop": ("evm_setAutomine", [False]), "start": ("evm_setAutomine", [True])}
+    if "ganache" in client:
+        return {"stop": ("miner_stop", []), "start": ("miner_start", [])}
+    return None
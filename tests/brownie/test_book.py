@@ -0,0 +1,113 @@
+import csv
+
+from sdk.book import BucketInfo, depth_curve, export_book, iter_bucket_pages, iter_buckets, lender_positions
+from sdk.deposits import Deposits
+from sdk.prices import MAX_FENWICK_INDEX, price_at
+
+POOL = "0x0000000000000000000000000000000000000001"
+
+
+class _PoolInfoUtils:
+    """
+    Serves `bucketsInfo` pages as PoolInfoUtils does, from buckets held in memory.
+    """
+
+    def __init__(self, deposits, lps=None):
+        self.deposits = deposits
+        # (lender, index) => LP balance, valued at 2 quote tokens each
+        self.lps = lps or {}
+        self.calls = 0
+
+    def lendersInfo(self, pool, lenders, indexes):
+        self.calls += 1
+        lps = [self.lps.get((lender, index), 0) for lender in lenders for index in indexes]
+        return lps, [2 * lp for lp in lps]
+
+    def bucketsInfo(self, pool, from_index, to_index, limit):
+        assert pool == POOL
+        self.calls += 1
+        to_index = min(to_index, MAX_FENWICK_INDEX)
+        count = 0 if from_index > to_index else min(to_index - from_index + 1, limit)
+        buckets = []
+        for index in range(from_index, from_index + count):
+            deposit = self.deposits.get(index, 0)
+            buckets.append((index, price_at(index), deposit, 0, deposit, 10**18, 10**18))
+        return buckets, from_index + count
+
+
+def test_iter_buckets_pages():
+    pool_info_utils = _PoolInfoUtils({2550: 10_000 * 10**18})
+
+    pages = list(iter_bucket_pages(pool_info_utils, POOL, 2540, 2560, page_size=8))
+    assert [len(page) for page in pages] == [8, 8, 5]
+    assert pool_info_utils.calls == 3
+
+    buckets = list(iter_buckets(pool_info_utils, POOL, 2540, 2560, page_size=8))
+    assert [bucket.index for bucket in buckets] == list(range(2540, 2561))
+    assert buckets[10] == BucketInfo(2550, price_at(2550), 10_000 * 10**18, 0, 10_000 * 10**18, 10**18, 10**18)
+
+    # range is capped at the last bucket
+    buckets = list(iter_buckets(pool_info_utils, POOL, MAX_FENWICK_INDEX - 2, 10**9))
+    assert [bucket.index for bucket in buckets] == [MAX_FENWICK_INDEX - 2, MAX_FENWICK_INDEX - 1, MAX_FENWICK_INDEX]
+
+
+def test_export_book_csv(tmp_path):
+    deposits = {100: 5 * 10**18, 4000: 2**200, 7000: 1}
+    pool_info_utils = _PoolInfoUtils(deposits)
+
+    path = tmp_path / "book.csv"
+    assert export_book(pool_info_utils, POOL, path, page_size=1_000) == 3
+    assert pool_info_utils.calls == 8
+
+    with path.open() as file:
+        rows = list(csv.DictReader(file))
+    assert [int(row["index"]) for row in rows] == sorted(deposits)
+    assert [int(row["quote_tokens"]) for row in rows] == [deposits[index] for index in sorted(deposits)]
+    assert int(rows[1]["price"]) == price_at(4000)
+
+
+def test_lender_positions_matrix():
+    lenders = [f"lender{i}" for i in range(7)]
+    indexes = [2550, 2551, 2552]
+    lps = {("lender1", 2551): 10**18, ("lender6", 2550): 3 * 10**18, ("lender6", 2552): 5}
+    pool_info_utils = _PoolInfoUtils({}, lps)
+
+    lp_matrix, quote_matrix = lender_positions(pool_info_utils, POOL, lenders, indexes, page_size=6)
+    assert lp_matrix.shape == (7, 3)
+    assert pool_info_utils.calls == 4
+    assert lp_matrix[1, 1] == 10**18
+    assert list(lp_matrix[6]) == [3 * 10**18, 0, 5]
+    assert quote_matrix[6, 0] == 6 * 10**18
+    assert lp_matrix.sum() == sum(lps.values())
+
+
+class _Pool:
+    """
+    Serves `depositUpToIndexes` from a Deposits mirror.
+    """
+
+    def __init__(self, deposits):
+        self.deposits = deposits
+        self.calls = 0
+
+    def depositUpToIndexes(self, indexes):
+        self.calls += 1
+        return [self.deposits.prefix_sum(index) for index in indexes]
+
+
+def test_depth_curve_pages():
+    deposits = Deposits()
+    deposits.add(2550, 10_000 * 10**18)
+    deposits.add(2552, 5_000 * 10**18)
+    deposits.add(7000, 1 * 10**18)
+    pool = _Pool(deposits)
+
+    indexes, depth = depth_curve(pool, 2549, 2553, page_size=2)
+    assert list(indexes) == [2549, 2550, 2551, 2552, 2553]
+    assert list(depth) == [0, 10_000 * 10**18, 10_000 * 10**18, 15_000 * 10**18, 15_000 * 10**18]
+    assert pool.calls == 3
+
+    indexes, depth = depth_curve(pool, stride=100)
+    assert len(indexes) == 74
+    assert indexes[-1] == 7300
+    assert depth[-1] == deposits.tree_sum()
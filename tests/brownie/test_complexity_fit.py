@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from sdk.gas_scaling import ScalingCurves, bucket_layout, fit_complexity
+from sdk.prices import MAX_FENWICK_INDEX
+
+LOANS = [10, 100, 1_000, 10_000]
+
+
+def test_fit_picks_generating_model():
+    log_fit = fit_complexity(LOANS, [150_000 + 4_000 * np.log2(n) for n in LOANS])[0]
+    assert log_fit.model == "log"
+    assert log_fit.intercept == pytest.approx(150_000)
+    assert log_fit.slope == pytest.approx(4_000)
+    assert log_fit.r_squared == pytest.approx(1)
+    assert log_fit.predict(2**20) == pytest.approx(150_000 + 4_000 * 20)
+
+    linear_fit = fit_complexity(LOANS, [30_000 + 25 * n for n in LOANS])[0]
+    assert (linear_fit.model, round(linear_fit.slope)) == ("linear", 25)
+
+    # flat gas is reported as constant, not as a zero slope of a richer model
+    assert fit_complexity(LOANS, [120_000] * 4)[0].model == "constant"
+    # a single size only supports a constant
+    assert [fit.model for fit in fit_complexity([100, 100], [1, 3])] == ["constant"]
+    assert fit_complexity([], []) == []
+
+
+def test_curves_by_dimension(tmp_path):
+    curves = ScalingCurves()
+    for loans in LOANS:
+        for buckets, spread in [(5, 50), (500, 2_500)]:
+            curves.add("drawDebt", loans, buckets, spread, 200_000 + 5_000 * np.log2(loans) + buckets)
+            curves.add("addQuoteToken", loans, buckets, spread, 140_000)
+
+    sizes, gas = curves.curve("drawDebt", "loans", buckets=5)
+    assert sizes.tolist() == LOANS
+    assert gas[0] == int(200_005 + 5_000 * np.log2(10))
+
+    assert curves.fit("drawDebt", "loans", buckets=5)[0].model == "log"
+    assert curves.summary()["addQuoteToken"]["loans"]["model"] == "constant"
+
+    path = tmp_path / "scaling.csv"
+    curves.save(path)
+    assert len(path.read_text().splitlines()) == len(curves.points) + 1
+    assert (tmp_path / "scaling.csv.fits.json").exists()
+
+
+def test_fits_hold_other_dimensions_at_base():
+    curves = ScalingCurves()
+    for loans in LOANS:
+        for buckets, spread in [(5, 50), (50, 500), (500, 2_500)]:
+            curves.add("drawDebt", loans, buckets, spread, 200_000 + 5_000 * np.log2(loans) + 30 * buckets)
+    # a layout measured at a single loans count only
+    curves.add("drawDebt", 10_000, 2_000, 4_800, 400_000)
+
+    # loans fitted at 5 buckets, spread 50
+    assert [point.buckets for point in curves.select("drawDebt", "loans")] == [5] * 4
+    loans_fit = curves.fit("drawDebt", "loans")[0]
+    assert loans_fit.model == "log" and loans_fit.slope == pytest.approx(5_000, rel=1e-4)
+
+    # buckets fitted at 10 loans, spread moves along with the bucket count
+    buckets_fit = curves.fit("drawDebt", "buckets")[0]
+    assert buckets_fit.model == "linear" and buckets_fit.slope == pytest.approx(30)
+    assert curves.curve("drawDebt", "spread")[0].tolist() == [50, 500, 2_500]
+
+    # fixed values select another base
+    assert curves.curve("drawDebt", "buckets", loans=10_000)[0].tolist() == [5, 50, 500, 2_000]
+    assert curves.summary()["drawDebt"]["loans"]["slope"] == pytest.approx(5_000, rel=1e-4)
+
+
+def test_bucket_layout():
+    assert bucket_layout(5, 40, 2550) == [2550, 2560, 2570, 2580, 2590]
+    assert bucket_layout(1, 0, 2550) == [2550]
+    # spread is capped at the last bucket
+    layout = bucket_layout(100, 10_000, 7_000)
+    assert len(layout) == 100 and layout[-1] == MAX_FENWICK_INDEX
+    with pytest.raises(ValueError):
+        bucket_layout(500, 100, 7_000)
@@ -0,0 +1,186 @@
+import random
+
+import pytest
+from sdk.deposits import Deposits, InvalidAmount, SIZE
+from sdk.prices import MAX_FENWICK_INDEX, price_at
+
+# cases below are ported from tests/forge/unit/FenwickTree.t.sol, so Python tree stays aligned with Deposits library
+MAX_INDEX = 7388
+
+
+def test_fenwick_unscaled():
+    tree = Deposits()
+    tree.add(11, 300 * 10**18)
+    tree.add(9, 200 * 10**18)
+
+    assert tree.value_at(8) == 0
+    assert tree.value_at(9) == 200 * 10**18
+    assert tree.value_at(11) == 300 * 10**18
+    assert tree.value_at(12) == 0
+    assert tree.value_at(13) == 0
+
+    assert tree.prefix_sum(0) == 0
+    assert tree.prefix_sum(5) == 0
+    assert tree.prefix_sum(10) == 200 * 10**18
+    assert tree.prefix_sum(11) == 500 * 10**18
+    assert tree.prefix_sum(12) == 500 * 10**18
+    assert tree.prefix_sum(14) == 500 * 10**18
+    assert tree.prefix_sum(8191) == 500 * 10**18
+
+    assert tree.tree_sum() == 500 * 10**18
+
+    assert tree.find_index_of_sum(10 * 10**18) == 9
+    assert tree.find_index_of_sum(200 * 10**18) == 9
+    assert tree.find_index_of_sum(250 * 10**18) == 11
+    assert tree.find_index_of_sum(500 * 10**18) == 11
+    assert tree.find_index_of_sum(700 * 10**18) == MAX_INDEX
+
+    assert tree.get_lup(250 * 10**18) == price_at(11)
+
+
+def test_fenwick_scaled():
+    tree = Deposits()
+    tree.add(5, 100 * 10**18)
+    tree.add(9, 200 * 10**18)
+    tree.mult(5, 11 * 10**17)
+    tree.add(11, 300 * 10**18)
+    tree.add(9, 200 * 10**18)
+    tree.mult(10, 12 * 10**17)
+
+    assert tree.value_at(5) == 132 * 10**18
+    assert tree.value_at(9) == 480 * 10**18
+    assert tree.value_at(10) == 0
+    assert tree.value_at(11) == 300 * 10**18
+
+    assert tree.prefix_sum(0) == 0
+    assert tree.prefix_sum(4) == 0
+    assert tree.prefix_sum(5) == 132 * 10**18
+    assert tree.prefix_sum(10) == 612 * 10**18
+    assert tree.prefix_sum(11) == 912 * 10**18
+    assert tree.prefix_sum(12) == 912 * 10**18
+    assert tree.prefix_sum(14) == 912 * 10**18
+    assert tree.prefix_sum(8191) == 912 * 10**18
+
+    assert tree.tree_sum() == 912 * 10**18
+
+    assert tree.find_index_of_sum(10 * 10**18) == 5
+    assert tree.find_index_of_sum(100 * 10**18) == 5
+    assert tree.find_index_of_sum(200 * 10**18) == 9
+    assert tree.find_index_of_sum(350 * 10**18) == 9
+    assert tree.find_index_of_sum(400 * 10**18) == 9
+    assert tree.find_index_of_sum(500 * 10**18) == 9
+    assert tree.find_index_of_sum(900 * 10**18) == 11
+    assert tree.find_index_of_sum(1_000 * 10**18) == MAX_INDEX
+
+    tree.remove(11, 300 * 10**18)
+
+    assert tree.tree_sum() == 612 * 10**18
+
+    assert tree.find_index_of_sum(10 * 10**18) == 5
+    assert tree.find_index_of_sum(100 * 10**18) == 5
+    assert tree.find_index_of_sum(200 * 10**18) == 9
+    assert tree.find_index_of_sum(350 * 10**18) == 9
+    assert tree.find_index_of_sum(400 * 10**18) == 9
+    assert tree.find_index_of_sum(500 * 10**18) == 9
+    assert tree.find_index_of_sum(900 * 10**18) == MAX_INDEX
+    assert tree.find_index_of_sum(1_000 * 10**18) == MAX_INDEX
+
+    assert tree.value_at(5) == 132 * 10**18
+    assert tree.value_at(9) == 480 * 10**18
+    assert tree.value_at(10) == 0
+    assert tree.value_at(11) == 0
+
+    tree.obliterate(9)
+    assert tree.value_at(9) == 0
+
+
+def test_fenwick_remove_precision():
+    tree = Deposits()
+    tree.add(3_696, 2_000 * 10**18)
+    tree.add(3_698, 5_000 * 10**18)
+    tree.add(3_700, 11_000 * 10**18)
+    tree.add(3_702, 25_000 * 10**18)
+    tree.add(3_704, 30_000 * 10**18)
+    tree.mult(3_701, 1_000054318968922188)
+    tree.obliterate(3_696)
+    tree.remove(3_700, 2_992_800000000000000000)
+    tree.mult(3_701, 1_000070411233491284)
+    tree.mult(3_739, 1_000001510259590795)
+
+    assert tree.value_at(3_700) == 8_008_373442262808824908
+    tree.obliterate(3_700)
+    assert tree.value_at(3_700) == 0
+
+
+def test_fenwick_out_of_bounds_behavior():
+    deposit_amount = 3 * 10**18
+
+    tree = Deposits()
+    for i in range(MAX_FENWICK_INDEX):
+        tree.add(i, deposit_amount)
+
+    assert tree.prefix_sum(0) == deposit_amount
+    assert tree.prefix_sum(1) == 2 * deposit_amount
+    assert tree.prefix_sum(MAX_INDEX + 1) == deposit_amount * MAX_FENWICK_INDEX
+
+    # on-chain prefixSum never terminates past the tree size
+    with pytest.raises(IndexError):
+        tree.prefix_sum(SIZE)
+
+
+def test_fenwick_invalid_amount():
+    tree = Deposits()
+    with pytest.raises(InvalidAmount):
+        tree.unscaled_add(10, 0)
+
+    tree.add(10, 10**18)
+    with pytest.raises(InvalidAmount):
+        tree.unscaled_remove(10, 0)
+    with pytest.raises(ArithmeticError):
+        tree.unscaled_remove(10, 2 * 10**18)
+    assert tree.value_at(10) == 10**18
+
+
+def test_fenwick_load_on_all_deposits():
+    deposit_amount = 100 * 10**18
+    indexes = list(range(MAX_FENWICK_INDEX))
+
+    tree = Deposits()
+    tree.bulk_add(indexes, [deposit_amount] * MAX_FENWICK_INDEX)
+
+    assert tree.tree_sum() == MAX_FENWICK_INDEX * deposit_amount
+    assert list(tree.values_at(indexes)) == [deposit_amount] * MAX_FENWICK_INDEX
+    assert list(tree.prefix_sums(indexes)) == [deposit_amount + i * deposit_amount for i in indexes]
+    assert list(
+        tree.find_indexes_of_sums([738_800 * 10**18 - i * deposit_amount for i in indexes])
+    ) == [MAX_FENWICK_INDEX - i - 1 for i in indexes]
+
+
+def test_fenwick_bulk_matches_single_operations():
+    rng = random.Random(1234)
+
+    single = Deposits()
+    for _ in range(500):
+        single.add(rng.randint(1, MAX_INDEX), rng.randint(1, 10**9) * 10**15)
+    for _ in range(20):
+        single.mult(rng.randint(2, MAX_INDEX), rng.randint(10**18, 5 * 10**18))
+
+    bulk = single.copy()
+
+    indexes = [rng.randint(1, MAX_INDEX) for _ in range(1_000)]
+    amounts = [rng.randint(1, 10**9) * 10**15 for _ in indexes]
+    for index, amount in zip(indexes, amounts):
+        single.add(index, amount)
+    bulk.bulk_add(indexes, amounts)
+
+    assert list(bulk.values) == list(single.values)
+    assert list(bulk.scaling) == list(single.scaling)
+
+    all_indexes = range(SIZE)
+    assert list(single.prefix_sums()) == [single.prefix_sum(i) for i in all_indexes]
+    assert list(single.scales()) == [single.scale(i) for i in all_indexes]
+    assert list(single.values_at()) == [single.value_at(i) for i in all_indexes]
+
+    debts = [rng.randint(0, single.tree_sum() + 10**18) for _ in range(200)]
+    assert list(single.find_indexes_of_sums(debts)) == [single.find_index_of_sum(d) for d in debts]
+    assert list(single.get_lups(debts)) == [single.get_lup(d) for d in debts]
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sdk.gas_profile import GasProfile, GasRegression, GasStats, load_baseline
+
+
+def _tx(fn_name, gas_used, block, status=1, contract_name="ERC20Pool"):
+    return SimpleNamespace(
+        contract_name=contract_name, fn_name=fn_name, gas_used=gas_used, block_number=block, status=status
+    )
+
+
+def test_percentiles_of_every_call():
+    profile = GasProfile()
+    for gas_used in range(100_001, 100_101):
+        profile.add("ERC20Pool.drawDebt", gas_used)
+    # reverted calls are left out of statistics by default
+    profile.add("ERC20Pool.drawDebt", 30_000, success=False)
+
+    assert profile.stats("ERC20Pool.drawDebt") == GasStats(
+        count=100, mean=100_050, low=100_001, high=100_100, p50=100_050, p90=100_090, p99=100_099
+    )
+    assert profile.stats("ERC20Pool.drawDebt", success_only=False).low == 30_000
+    assert profile.stats("ERC20Pool.repayDebt") is None
+
+    counts, edges = profile.histogram("ERC20Pool.drawDebt", bins=4)
+    assert counts.tolist() == [25, 25, 25, 25]
+    assert edges[0] == 100_001 and edges[-1] == 100_100
+
+
+def test_profile_from_transactions_tags_pool_context():
+    contexts = []
+
+    def context(block):
+        contexts.append(block)
+        return {"loans_count": block // 10}
+
+    transactions = [
+        _tx("drawDebt", 200_000, 11),
+        _tx("drawDebt", 210_000, 11),
+        _tx("addQuoteToken", 120_000, 12),
+        _tx("drawDebt", 400_000, 31),
+        _tx("drawDebt", 420_000, 32, status=0),
+        _tx("transfer", 50_000, 33, contract_name="ERC20"),
+        SimpleNamespace(contract_name=None, fn_name=None, gas_used=21_000, block_number=34, status=1),
+    ]
+    profile = GasProfile.from_transactions(transactions, method_names=["drawDebt", "QuoteToken"], context=context)
+
+    assert profile.methods() == ["ERC20Pool.addQuoteToken", "ERC20Pool.drawDebt"]
+    # pool state is read once per block, at the block before it
+    assert contexts == [10, 11, 30, 31]
+    assert profile.samples["ERC20Pool.drawDebt"][0].context == {"loans_count": 1}
+
+    by_loans = profile.stats_by("ERC20Pool.drawDebt", "loans_count")
+    assert list(by_loans) == [1, 3]
+    assert by_loans[1].count == 2 and by_loans[1].high == 210_000
+    assert by_loans[3].count == 1 and by_loans[3].p99 == 400_000
+
+    assert list(profile.stats_by("ERC20Pool.drawDebt", "loans_count", bins=[0, 2, 100])) == [0, 2]
+
+
+def test_baseline_roundtrip_and_regressions(tmp_path):
+    path = tmp_path / "gas.json"
+    baseline_profile = GasProfile()
+    current = GasProfile()
+    for gas_used in range(1, 101):
+        baseline_profile.add("ERC20Pool.drawDebt", 100_000 + gas_used)
+        baseline_profile.add("ERC20Pool.repayDebt", 80_000 + gas_used)
+        # tail of drawDebt grows by 10%, median stays
+        current.add("ERC20Pool.drawDebt", 100_000 + gas_used if gas_used < 90 else 110_000 + gas_used)
+        current.add("ERC20Pool.repayDebt", 80_000 + gas_used)
+    baseline_profile.save_baseline(path)
+
+    baseline = load_baseline(path)
+    assert baseline["methods"]["ERC20Pool.drawDebt"]["p99"] == 100_099
+
+    regressions = current.compare(baseline)
+    assert regressions == [
+        GasRegression("ERC20Pool.drawDebt", "p90", 100_090, 110_090),
+        GasRegression("ERC20Pool.drawDebt", "p99", 100_099, 110_099),
+    ]
+    assert regressions[0].change == pytest.approx(0.0999, abs=1e-4)
+    # thresholds are configurable per statistic
+    assert current.compare(baseline, {"p50": 0.02, "p99": 0.2}) == []
+
+
+def test_load_baseline_rejects_unknown_version(tmp_path):
+    path = tmp_path / "gas.json"
+    path.write_text('{"version": 0, "methods": {}}')
+    with pytest.raises(ValueError):
+        load_baseline(path)
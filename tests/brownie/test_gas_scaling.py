@@ -0,0 +1,160 @@
+import math
+import os
+
+import pytest
+from brownie import chain
+from brownie.network import rpc
+from sdk.gas_scaling import ScalingCurves, bucket_layout
+from sdk.prices import MAX_FENWICK_INDEX, price_at
+from sdk.tx_pipeline import TransactionPipeline, transact
+from conftest import LoansHeapUtils
+
+# set AJNA_GAS_SCALING=1 to run, pools of up to 10k loans take a while to set up
+pytestmark = pytest.mark.skipif(
+    os.environ.get("AJNA_GAS_SCALING", "0") != "1", reason="gas scaling benchmark, set AJNA_GAS_SCALING=1 to run"
+)
+
+LOAN_COUNTS = [int(n) for n in os.environ.get("AJNA_GAS_SCALING_LOANS", "10,100,1000,10000").split(",")]
+# (funded buckets, spread in indexes between first and last funded bucket)
+BUCKET_LAYOUTS = [(5, 50), (50, 500), (500, 2_500), (2_000, 4_800)]
+FIRST_BUCKET = 2550
+LOAN_AMOUNT = 1_000 * 10**18
+# setup transactions mined per pipeline barrier, gas cannot be estimated for pipelined transactions
+SETUP_BATCH = 200
+SETUP_GAS_LIMIT = 2_000_000
+# points CSV, best fits are written next to it
+OUTPUT = os.environ.get("AJNA_GAS_SCALING_OUT", "gas-scaling.csv")
+
+
+@pytest.fixture(scope="module")
+def scaling_curves():
+    curves = ScalingCurves()
+    yield curves
+    if curves.points:
+        print("\nGas scaling, best fit per method and dimension:")
+        for line in curves.format():
+            print(line)
+        curves.save(OUTPUT)
+
+
+def _pipelined(pool_fn, calls, sender_of, failure_message):
+    with TransactionPipeline() as pipeline:
+        for position, args in enumerate(calls):
+            transact(pool_fn, *args, sender=sender_of(position), failure_message=failure_message, gas_limit=SETUP_GAS_LIMIT)
+            if (position + 1) % SETUP_BATCH == 0:
+                pipeline.barrier()
+
+
+def _fund(token, account, pool, amount):
+    token.top_up_in_storage(account, amount)
+    token.approve_max_in_storage(pool, account)
+
+
+def _setup_pool(ajna_protocol, pool, loans, indexes):
+    """
+    Funds `indexes` equally with twice the debt of `loans` loans of LOAN_AMOUNT, then draws the loans with
+    threshold prices in the worst case order of heap `remove`, as kicks do.
+    """
+
+    dai = ajna_protocol.get_token(pool.quoteTokenAddress())
+    mkr = ajna_protocol.get_token(pool.collateralAddress())
+
+    lender = ajna_protocol.add_lender()
+    deposit = 2 * loans * LOAN_AMOUNT
+    _fund(dai, lender, pool, 2 * deposit)
+    expiry = chain.time() + 3600 * 24
+    _pipelined(
+        pool.addQuoteToken,
+        [(deposit // len(indexes), index, expiry) for index in indexes],
+        lambda _: lender,
+        "Failed to fund bucket",
+    )
+
+    # debt takes half of deposit, LUP stays above the bucket 60% down the layout
+    max_threshold_price = price_at(indexes[int(len(indexes) * 0.6)]) * 0.8 / 1.04
+    threshold_prices = LoansHeapUtils.threshold_prices(
+        loans, "remove", scale=max_threshold_price / (2 * loans), offset=max_threshold_price / 2
+    )
+
+    borrowers = []
+    calls = []
+    for threshold_price in threshold_prices:
+        borrower = ajna_protocol.add_borrower()
+        # origination fee is below 1%
+        collateral = math.ceil(LOAN_AMOUNT * 1.01 / threshold_price * 10**18)
+        _fund(mkr, borrower, pool, collateral)
+        borrowers.append(borrower)
+        calls.append((borrower, LOAN_AMOUNT, MAX_FENWICK_INDEX, collateral))
+    _pipelined(pool.drawDebt, calls, lambda position: borrowers[position], "Failed to draw debt")
+
+    return lender, borrowers, max_threshold_price
+
+
+@pytest.mark.parametrize("buckets,spread", BUCKET_LAYOUTS)
+@pytest.mark.parametrize("loans", LOAN_COUNTS)
+def test_gas_scaling(loans, buckets, spread, ajna_protocol, scaled_pool, scaling_curves):
+    pool = scaled_pool
+    indexes = bucket_layout(buckets, spread, FIRST_BUCKET)
+    lender, borrowers, max_threshold_price = _setup_pool(ajna_protocol, pool, loans, indexes)
+    (_, _, loans_count) = pool.loansInfo()
+    assert loans_count == loans
+
+    dai = ajna_protocol.get_token(pool.quoteTokenAddress())
+    mkr = ajna_protocol.get_token(pool.collateralAddress())
+    expiry = chain.time() + 3600 * 24 * 365 * 10
+
+    def measure(method, *steps):
+        # every measurement runs against the same pool state
+        snapshot_id = rpc.snapshot()
+        try:
+            tx = None
+            for step in steps:
+                tx = step()
+            assert tx.status == 1
+            scaling_curves.add(method, loans, len(indexes), indexes[-1] - indexes[0], tx.gas_used)
+        finally:
+            chain._revert(snapshot_id)
+
+    # new loan above every other one, inserted at the heap root
+    newcomer = ajna_protocol.add_borrower()
+    collateral = math.ceil(LOAN_AMOUNT / max_threshold_price * 10**18)
+    _fund(mkr, newcomer, pool, collateral)
+    measure("drawDebt", lambda: pool.drawDebt(newcomer, LOAN_AMOUNT, MAX_FENWICK_INDEX, collateral, {"from": newcomer}))
+
+    # full repayment of the top loan, removed from the heap root
+    (max_borrower, _, _) = pool.loansInfo()
+    top = next(borrower for borrower in borrowers if borrower.address == max_borrower)
+    _fund(dai, top, pool, 2 * LOAN_AMOUNT)
+    (top_debt, top_collateral, _, _) = ajna_protocol.pool_info_utils.borrowerInfo(pool.address, top)
+    measure(
+        "repayDebt",
+        lambda: pool.repayDebt(top, 2 * LOAN_AMOUNT, top_collateral, top, MAX_FENWICK_INDEX, {"from": top}),
+    )
+
+    middle = indexes[len(indexes) // 2]
+    measure("addQuoteToken", lambda: pool.addQuoteToken(LOAN_AMOUNT, middle, expiry, {"from": lender}))
+    measure(
+        "moveQuoteToken",
+        lambda: pool.moveQuoteToken(LOAN_AMOUNT, indexes[0], indexes[-1], expiry, {"from": lender}),
+    )
+    measure("removeQuoteToken", lambda: pool.removeQuoteToken(LOAN_AMOUNT, indexes[0], {"from": lender}))
+
+    # top loan gets undercollateralized as interest accrues, kicked and taken once the take cooldown is over
+    kicker = ajna_protocol.add_lender()
+    _fund(dai, kicker, pool, 100 * loans * LOAN_AMOUNT)
+    (interest_rate, _) = pool.interestRateInfo()
+    lup = ajna_protocol.pool_info_utils.lup(pool.address)
+    # time for debt to outgrow collateral value at LUP, with margin for deposit interest lifting LUP
+    margin = math.log(top_collateral * lup / (1.04 * top_debt * 10**18))
+    seconds_to_kick = int(1.5 * margin / (interest_rate / 1e18) * 365 * 24 * 3600) + 3600 * 24 * 30
+
+    def kick():
+        chain.sleep(seconds_to_kick)
+        return pool.kick(top, MAX_FENWICK_INDEX, {"from": kicker})
+
+    def take():
+        chain.sleep(3 * 3600)
+        return pool.take(top, top_collateral, kicker, b"", {"from": kicker})
+
+    measure("kick", kick)
+    measure("take", kick, take)
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+from sdk.heap_orders import (
+    bubble_down_order,
+    bubble_up_order,
+    heap_order,
+    iter_threshold_prices,
+    remove_order,
+)
+from sdk.loans import ROOT_INDEX, Loans
+
+
+class CountingLoans(Loans):
+    """
+    Counts loans written to the heap, a loan moved to its final position is a single write.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def _insert(self, borrower, t0_debt_to_collateral, index):
+        self.writes += 1
+        super()._insert(borrower, t0_debt_to_collateral, index)
+
+
+def _build(order):
+    loans = CountingLoans()
+    for rank in order:
+        loans.upsert(f"b{rank}", int(rank))
+    return loans
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 8, 100, 1_000])
+def test_orders_are_permutations(n):
+    for case in ("bubble_up", "bubble_down", "remove"):
+        assert sorted(heap_order(n, case).tolist()) == list(range(1, n + 1))
+
+
+def test_bubble_up_moves_every_loan_to_root():
+    loans = CountingLoans()
+    for position, rank in enumerate(bubble_up_order(500), start=1):
+        writes = loans.writes
+        loans.upsert(f"b{rank}", int(rank))
+        assert loans.get_max() == (f"b{rank}", rank)
+        assert loans.writes - writes == int(math.log2(position)) + 1
+
+
+def test_bubble_down_sinks_to_deepest_level():
+    n = 1_000
+    loans = _build(bubble_down_order(n))
+    # no moves while building
+    assert loans.writes == n
+
+    loans.upsert(f"b{n}", 0)
+    assert math.floor(math.log2(loans.indices[f"b{n}"])) == math.floor(math.log2(n))
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 64, 1_000])
+def test_remove_sinks_every_tail_to_deepest_level(n):
+    loans = _build(remove_order(n))
+    assert loans.writes == n
+
+    while loans.no_of_loans() > 1:
+        count = loans.no_of_loans()
+        writes = loans.writes
+        loans.remove(loans.get_max()[0], ROOT_INDEX)
+        # lowest loan is written at the root, then a loan moves up per level as it sinks back to the last position
+        assert loans.writes - writes == int(math.log2(count - 1)) + 2
+        assert loans.get_by_index(count - 1) == ("b1", 1)
+
+
+def test_million_loans():
+    n = 1_000_000
+    for case in ("bubble_up", "bubble_down", "remove"):
+        order = heap_order(n, case)
+        assert len(order) == n and order.min() == 1 and order.max() == n
+
+    # layout is a valid max-heap, no loan above its parent
+    order = remove_order(n)
+    positions = np.arange(2, n + 1)
+    assert (order[positions - 1] < order[positions // 2 - 1]).all()
+
+
+def test_iter_threshold_prices():
+    prices = iter_threshold_prices(5, "bubble_down", scale=10, offset=1, chunk_size=2)
+    assert list(prices) == [51, 41, 31, 21, 11]
+    assert list(iter_threshold_prices(0)) == []
+
+    with pytest.raises(ValueError):
+        iter_threshold_prices(5, "insert")
+    with pytest.raises(ValueError):
+        heap_order(-1)
@@ -0,0 +1,237 @@
+import random
+
+from sdk.loans import Loans, ZERO_ADDRESS, iter_loans
+
+# cases below are ported from tests/forge/unit/Heap.t.sol, so Python heap stays aligned with Loans library
+
+
+def test_heap_insert_and_randomly_remove_tps():
+    loans = Loans()
+    assert loans.get_max() == (ZERO_ADDRESS, 0)
+
+    loans.upsert("b1", 100 * 10**18)
+    loans.upsert("b5", 500 * 10**18)
+    loans.upsert("b2", 200 * 10**18)
+    loans.upsert("b4", 400 * 10**18)
+    loans.upsert("b3", 300 * 10**18)
+
+    assert loans.get_max() == ("b5", 500 * 10**18)
+    assert loans.no_of_loans() == 5
+
+    loans.remove("b2")
+    assert loans.get_max() == ("b5", 500 * 10**18)
+    assert loans.no_of_loans() == 4
+
+    loans.remove("b5")
+    assert loans.get_max() == ("b4", 400 * 10**18)
+
+    loans.remove("b4")
+    assert loans.get_max() == ("b3", 300 * 10**18)
+
+    loans.remove("b1")
+    assert loans.get_max() == ("b3", 300 * 10**18)
+
+    loans.remove("b3")
+    assert loans.get_max() == (ZERO_ADDRESS, 0)
+    assert loans.no_of_loans() == 0
+
+
+def test_heap_insert_multiple_loans_with_same_tp():
+    loans = Loans()
+    loans.upsert("b1", 100 * 10**18)
+    loans.upsert("b2", 200 * 10**18)
+    loans.upsert("b3", 200 * 10**18)
+    loans.upsert("b4", 300 * 10**18)
+    loans.upsert("b5", 400 * 10**18)
+    loans.upsert("b6", 400 * 10**18)
+
+    assert loans.get_max() == ("b5", 400 * 10**18)
+    assert loans.no_of_loans() == 6
+
+    loans.remove("b5")
+    assert loans.get_max() == ("b6", 400 * 10**18)
+
+    loans.remove("b6")
+    assert loans.get_max() == ("b4", 300 * 10**18)
+
+    loans.remove("b4")
+    assert loans.get_max() == ("b2", 200 * 10**18)
+
+    loans.upsert("b1", 200 * 10**18)
+    assert loans.get_max() == ("b2", 200 * 10**18)
+    assert loans.no_of_loans() == 3
+
+    loans.remove("b2")
+    assert loans.get_max() == ("b3", 200 * 10**18)
+
+    loans.remove("b3")
+    assert loans.get_max() == ("b1", 200 * 10**18)
+
+    loans.remove("b1")
+    assert loans.get_max() == (ZERO_ADDRESS, 0)
+
+
+def test_heap_update_from_borrower_state():
+    loans = Loans()
+    loans.update("b1", 1_000 * 10**18, 10 * 10**18)
+    loans.update("b2", 2_000 * 10**18, 10 * 10**18)
+    assert loans.get_max() == ("b2", 200 * 10**18)
+
+    # loans in auction are left untouched, repaid loans are removed
+    loans.update("b2", 0, 10 * 10**18, in_auction=True)
+    assert loans.get_max() == ("b2", 200 * 10**18)
+    loans.update("b2", 0, 10 * 10**18)
+    assert loans.get_max() == ("b1", 100 * 10**18)
+    assert loans.no_of_loans() == 1
+
+
+def test_heap_node_order_matches_library():
+    rng = random.Random(42)
+
+    loans = Loans()
+    reference = _ReferenceHeap()
+    borrowers = [f"b{i}" for i in range(300)]
+
+    for _ in range(5_000):
+        borrower = rng.choice(borrowers)
+        if borrower in loans.indices and rng.random() < 0.3:
+            loans.remove(borrower)
+            reference.remove(borrower)
+        else:
+            tp = rng.randint(1, 50) * 10**18
+            loans.upsert(borrower, tp)
+            reference.upsert(borrower, tp)
+
+        assert loans.borrowers == reference.borrowers
+        assert loans.t0_debt_to_collateral == reference.tps
+
+    # heap loaded in pool order keeps following the library
+    copy = Loans.from_heap(zip(loans.borrowers[1:], loans.t0_debt_to_collateral[1:]))
+    copy.upsert("b1", 100 * 10**18)
+    loans.upsert("b1", 100 * 10**18)
+    assert copy.borrowers == loans.borrowers
+
+
+def test_heapify():
+    rng = random.Random(7)
+    snapshot = [(f"b{i}", rng.randint(1, 10**6) * 10**12) for i in range(10_001)]
+
+    loans = Loans.heapify(snapshot)
+
+    assert loans.no_of_loans() == len(snapshot)
+    assert loans.get_max()[1] == max(tp for _, tp in snapshot)
+    for index in range(2, len(loans.borrowers)):
+        assert loans.t0_debt_to_collateral[index // 2] >= loans.t0_debt_to_collateral[index]
+    for borrower, index in loans.indices.items():
+        assert loans.borrowers[index] == borrower
+
+
+def test_iter_loans_pages_and_cutoff():
+    rng = random.Random(3)
+    loans = Loans()
+    for i in range(5_000):
+        loans.upsert(f"b{i}", rng.randint(1, 10**6) * 10**12)
+    pool_info_utils = _PoolInfoUtils(loans)
+
+    walked = list(iter_loans(pool_info_utils, "pool", page_size=512))
+    assert [loan.borrower for loan in walked] == loans.borrowers[1:]
+    assert [loan.index for loan in walked] == list(range(1, 5_001))
+    assert pool_info_utils.calls == 11
+
+    # walk stops early and still finds every loan above cutoff
+    cutoff = sorted(loans.t0_debt_to_collateral[1:])[-100]
+    pool_info_utils.calls = 0
+    walked = list(iter_loans(pool_info_utils, "pool", page_size=64, min_threshold_price=cutoff))
+    expected = {borrower for borrower, index in loans.indices.items() if loans.t0_debt_to_collateral[index] >= cutoff}
+    assert {loan.borrower for loan in walked} == expected
+    assert pool_info_utils.calls < 5_000 // 64
+
+    # cutoff above root
+    assert list(iter_loans(pool_info_utils, "pool", min_threshold_price=loans.get_max()[1] + 1)) == []
+
+    copy = Loans.from_pool("pool", pool_info_utils, page_size=100)
+    assert copy.borrowers == loans.borrowers
+    assert copy.t0_debt_to_collateral == loans.t0_debt_to_collateral
+
+
+class _PoolInfoUtils:
+    """
+    Serves `loansHeapInfo` pages as PoolInfoUtils does, from a heap held in memory, with threshold price equal to t0 debt to collateral.
+    """
+
+    def __init__(self, loans):
+        self.loans = loans
+        self.calls = 0
+
+    def loansHeapInfo(self, pool, from_index, limit):
+        self.calls += 1
+        from_index = max(from_index, 1)
+        count = max(0, min(self.loans.no_of_loans() - from_index + 1, limit))
+        page = []
+        for index in range(from_index, from_index + count):
+            borrower, t0_debt_to_collateral = self.loans.get_by_index(index)
+            page.append((index, borrower, t0_debt_to_collateral, t0_debt_to_collateral))
+        return page, from_index + count
+
+
+class _ReferenceHeap:
+    """
+    Line by line recursive port of Loans.sol, checks iterative mirror keeps the same node order.
+    """
+
+    def __init__(self):
+        self.borrowers = [ZERO_ADDRESS]
+        self.tps = [0]
+        self.indices = {}
+
+    def upsert(self, borrower, tp):
+        index = self.indices.get(borrower, 0)
+        if index != 0:
+            if self.tps[index] > tp:
+                self._bubble_down(borrower, tp, index)
+            else:
+                self._bubble_up(borrower, tp, index)
+        else:
+            self._bubble_up(borrower, tp, len(self.borrowers))
+
+    def remove(self, borrower):
+        index = self.indices.pop(borrower)
+        tail_index = len(self.borrowers) - 1
+        if index == tail_index:
+            self.borrowers.pop()
+            self.tps.pop()
+        else:
+            tail = (self.borrowers.pop(), self.tps.pop())
+            self._bubble_up(*tail, index)
+            self._bubble_down(self.borrowers[index], self.tps[index], index)
+
+    def _bubble_up(self, borrower, tp, index):
+        count = len(self.borrowers)
+        if index == 1 or tp <= self.tps[index // 2]:
+            self._insert(borrower, tp, index, count)
+        else:
+            self._insert(self.borrowers[index // 2], self.tps[index // 2], index, count)
+            self._bubble_up(borrower, tp, index // 2)
+
+    def _bubble_down(self, borrower, tp, index):
+        c_index = index * 2
+        count = len(self.borrowers)
+        if count <= c_index:
+            self._insert(borrower, tp, index, count)
+        else:
+            if count > c_index + 1 and self.tps[c_index + 1] > self.tps[c_index]:
+                c_index += 1
+            if self.tps[c_index] <= tp:
+                self._insert(borrower, tp, index, count)
+            else:
+                self._insert(self.borrowers[c_index], self.tps[c_index], index, count)
+                self._bubble_down(borrower, tp, c_index)
+
+    def _insert(self, borrower, tp, index, count):
+        if index == count:
+            self.borrowers.append(borrower)
+            self.tps.append(tp)
+        else:
+            self.borrowers[index] = borrower
+            self.tps[index] = tp
+        self.indices[borrower] = index
@@ -0,0 +1,110 @@
+import csv
+
+import pytest
+
+from sdk.metrics import ConsoleSink, CsvSink, MetricsRecorder, PoolMetrics, format_metrics, metrics_sink
+from sdk.pool_snapshot import (
+    PoolBalanceDetails,
+    PoolLoansInfo,
+    PoolPriceInfo,
+    PoolRatesAndFees,
+    PoolReservesInfo,
+    PoolSnapshot,
+    PoolUtilizationInfo,
+)
+
+WAD = 10**18
+
+
+def _snapshot(debt: int = 4_000 * WAD, loans_count: int = 2) -> PoolSnapshot:
+    return PoolSnapshot(
+        pool="0x0000000000000000000000000000000000000001",
+        loans=PoolLoansInfo(10_000 * WAD, loans_count, "0x0000000000000000000000000000000000000002", WAD, WAD),
+        prices=PoolPriceInfo(3_000 * WAD, 2530, 500 * WAD, 3100, 2_900 * WAD, 2540),
+        rates_and_fees=PoolRatesAndFees(85 * 10**16, 0, 0),
+        reserves=PoolReservesInfo(0, 0, 0, 0, 0),
+        utilization=PoolUtilizationInfo(400 * WAD, 3 * WAD, 4 * 10**17, 5 * 10**17),
+        balances=PoolBalanceDetails(debt, debt, 0, 0, 10_000 * WAD, 6_100 * WAD, 10 * WAD),
+        interest_rate=5 * 10**16,
+        interest_rate_update=0,
+        pledged_collateral=10 * WAD,
+    )
+
+
+def test_pool_metrics_from_snapshot():
+    row = PoolMetrics.from_snapshot(_snapshot(), time=3600, block=12, tx_count=4, gas_used=1_000_000)
+
+    assert row.time == 3600
+    assert row.block == 12
+    assert row.utilization == 0.4
+    assert row.target_utilization == 0.5
+    assert row.collateralization == 3.0
+    assert row.rate == 0.05
+    assert row.debt == 4_000.0
+    assert row.deposit == 10_000.0
+    assert row.reserves == 100.0
+    assert row.lup == 2_900.0
+    assert row.htp == 500.0
+    assert row.loans_count == 2
+    assert row.gas_per_tx == 250_000.0
+
+
+def test_recorder_accumulates_gas_per_step(tmp_path):
+    path = tmp_path / "metrics.csv"
+    with MetricsRecorder([metrics_sink(path)]) as metrics:
+        metrics.record_tx(200_000)
+        metrics.record_tx(300_000)
+        metrics.record_pool(_snapshot(), time=3600)
+        metrics.record_pool(_snapshot(debt=0, loans_count=0), time=7200)
+    assert metrics.rows == 2
+
+    with path.open() as file:
+        rows = list(csv.DictReader(file))
+    assert list(rows[0]) == list(PoolMetrics._fields)
+    assert [(row["time"], row["tx_count"], row["gas_used"]) for row in rows] == [
+        ("3600", "2", "500000"),
+        ("7200", "0", "0"),
+    ]
+    assert [float(row["debt"]) for row in rows] == [4_000.0, 0.0]
+
+
+def test_csv_sink_streams_rows(tmp_path):
+    path = tmp_path / "metrics.csv"
+    rows = [PoolMetrics.from_snapshot(_snapshot(), time=3600 * step, block=step) for step in range(3)]
+    sink = CsvSink(path)
+    sink.write(rows[:1])
+    sink.write(rows[1:])
+    sink.close()
+
+    with path.open() as file:
+        lines = list(csv.reader(file))
+    assert lines[0] == list(PoolMetrics._fields)
+    assert [[int(line[0]), int(line[1])] for line in lines[1:]] == [[0, 0], [3600, 1], [7200, 2]]
+
+    sink = metrics_sink(tmp_path / "other.csv")
+    sink.close()
+    assert isinstance(sink, CsvSink)
+
+
+def test_console_sink_prints_pool_summary(capsys):
+    row = PoolMetrics.from_snapshot(_snapshot(), time=0, tx_count=2, gas_used=500_000)
+    ConsoleSink().write([row])
+
+    output = capsys.readouterr().out
+    assert output == format_metrics(row) + "\n"
+    assert "actual utlzn:          40.0%" in output
+    assert "gas per tx:           250000" in output
+
+
+def test_parquet_sink_streams_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "metrics.parquet"
+    with MetricsRecorder([metrics_sink(path, batch_size=2)]) as metrics:
+        for step in range(5):
+            metrics.record_pool(_snapshot(), time=3600 * step)
+
+    file = pq.ParquetFile(str(path))
+    assert file.metadata.num_rows == 5
+    assert file.metadata.num_row_groups == 3
+    assert file.read().column("time").to_pylist() == [0, 3600, 7200, 10800, 14400]
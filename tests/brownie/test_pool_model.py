@@ -0,0 +1,129 @@
+import pytest
+
+from sdk.pool_model import MAX_UINT256, PoolModel, PoolRevert
+from sdk.prices import MAX_FENWICK_INDEX, MAX_PRICE, price_at
+
+# cases below are ported from forge unit tests, so the model stays aligned with ERC20Pool
+
+LENDER = "0x0000000000000000000000000000000000000001"
+BORROWER = "0x0000000000000000000000000000000000000002"
+START_TIME = 1_000_000
+
+
+def _interest_rate_pool() -> PoolModel:
+    # setup of ERC20PoolInterestRateAndEMAs.t.sol testPoolInterestRateIncreaseDecrease
+    model = PoolModel(interest_rate=5 * 10**16, time=START_TIME)
+    model.add_quote_token(LENDER, 10_000 * 10**18, 2550)
+    model.add_quote_token(LENDER, 20_000 * 10**18, 2551)
+    model.add_quote_token(LENDER, 20_000 * 10**18, 2552)
+    model.add_quote_token(LENDER, 50_000 * 10**18, 3900)
+    model.add_quote_token(LENDER, 10_000 * 10**18, 4200)
+    model.sleep(10 * 24 * 3600)
+    model.draw_debt(BORROWER, BORROWER, 46_000 * 10**18, 4_300, 100 * 10**18)
+    return model
+
+
+def test_interest_rate_and_emas():
+    model = _interest_rate_pool()
+
+    assert model.deposit_size() == 109_994_977168949771690000
+    assert model.interest_rate == 45 * 10**15
+    assert model.interest_rate_update == START_TIME + 10 * 24 * 3600
+    assert model.htp() == 478_860000000000000221
+    assert model.lup() == 2_981_007422784467321543
+    assert model.debt() == 46_044_230769230769252000
+    assert model.deposit_ema == 109_994_881805872808333863
+
+    model.sleep(14 * 3600)
+    model.update_interest()
+
+    assert model.htp() == 478_894439800046459253
+    assert model.deposit_size() == 109_997_791960299722618973
+    assert model.debt() == 46_047_542288466005697371
+    assert model.utilization() == 332803975174572376
+    assert model.interest_rate == 45 * 10**15
+    assert (model.debt_col_ema, model.lupt0_debt_ema, model.debt_ema, model.deposit_ema) == (
+        2_313_024_841496349382919830,
+        14_975_044_878354639842735067,
+        25_533_857684197937318785,
+        76_723_415550562905372147,
+    )
+
+
+def test_repay_updates_interest_rate():
+    model = _interest_rate_pool()
+    model.sleep(14 * 3600)
+
+    repaid = model.repay_debt(BORROWER, BORROWER, 46_200 * 10**18, 0, BORROWER, MAX_FENWICK_INDEX)
+
+    assert repaid == 46_047_542288466005697371
+    assert model.lup() == MAX_PRICE
+    assert model.htp() == 0
+    assert model.debt() == 0
+    assert model.interest_rate == 405 * 10**14
+    assert model.interest_rate_update == START_TIME + 10 * 24 * 3600 + 14 * 3600
+    assert model.pledged_collateral == 100 * 10**18
+
+
+def test_remove_quote_token_with_debt():
+    # ERC20PoolQuoteToken.t.sol testPoolRemoveQuoteTokenWithDebt
+    model = PoolModel(interest_rate=5 * 10**16, time=START_TIME)
+    model.sleep(60)
+    lp_awarded = 3_399_844748858447488600
+    assert model.add_quote_token(LENDER, 3_400 * 10**18, 1606)[0] == lp_awarded
+    assert model.add_quote_token(LENDER, 3_400 * 10**18, 1663)[0] == lp_awarded
+    model.sleep(59 * 60)
+
+    model.draw_debt(BORROWER, BORROWER, 3_000 * 10**18, 2_000, 100 * 10**18)
+    assert model.lup() == 333_777_824045947762079231
+    model.sleep(2 * 3600)
+
+    assert model.remove_quote_token(LENDER, 1_700 * 10**18, 1606) == (
+        1_700 * 10**18,
+        1_699_992715262243008677,
+    )
+    assert model.lup() == price_at(1663)
+    model.sleep(24 * 3600)
+
+    assert model.remove_quote_token(LENDER, MAX_UINT256, 1606) == (
+        1_699_976461135759488146,
+        1_699_852033596204479923,
+    )
+    assert model.bucket_deposit(1606) == 0
+    assert model.buckets[1606].lps == 0
+    assert model.buckets[1663].lps == lp_awarded
+    assert model.bucket_deposit(1663) == 3_400_093614235320616015
+
+
+def test_reverted_action_leaves_state_unchanged():
+    model = _interest_rate_pool()
+    model.sleep(3600)
+    views = model.views()
+    actions = list(model.actions)
+
+    # drawing 10k more moves LUP from bucket 2552 down to bucket 3900
+    with pytest.raises(PoolRevert) as e:
+        model.draw_debt(BORROWER, BORROWER, 10_000 * 10**18, 2_552, 0)
+    assert e.value.args[0] == "LimitIndexExceeded"
+
+    with pytest.raises(PoolRevert):
+        model.draw_debt(BORROWER, BORROWER, 10**30, 4_300, 0)
+
+    assert model.views() == views
+    assert model.actions == actions
+
+
+def test_actions_replay_into_same_state():
+    model = _interest_rate_pool()
+    model.sleep(14 * 3600)
+    model.repay_debt(BORROWER, BORROWER, 10_000 * 10**18, 0, BORROWER, MAX_FENWICK_INDEX)
+    model.sleep(3600)
+    model.remove_quote_token(LENDER, 5_000 * 10**18, 2550)
+
+    replica = PoolModel(interest_rate=5 * 10**16, time=START_TIME)
+    for action in model.actions:
+        replica.warp(action.timestamp)
+        replica.apply(action)
+
+    assert replica.actions == model.actions
+    assert replica.views() == model.views()
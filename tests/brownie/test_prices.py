@@ -0,0 +1,81 @@
+import pytest
+from sdk.prices import MAX_FENWICK_INDEX, MAX_PRICE, MIN_PRICE, PRICES, _index_of, index_of, price_at, price_to_index_safe
+
+# cases below are ported from tests/forge/unit/PoolHelperTest.t.sol, so Python conversions stay bit exact with PoolHelper
+PRICE_TO_INDEX = [
+    (4_669_863_090889329544038534, 1077),
+    (49_910_043670274810022205, 1987),
+    (21_699_795273870723549803, 2154),
+    (2_000_221618840727700609, 2632),
+    (146_575625611106531706, 3156),
+    (145_846393642892072537, 3157),
+    (100_332368143282009890, 3232),
+    (5_263790124045347667, 3823),
+    (1_646668492116543299, 4056),
+    (1_315628874808846999, 4101),
+    (1_051140132040790557, 4146),
+    (1_000000000000000000, 4156),
+    (951347940696068854, 4166),
+    (463902261297398000, 4310),
+    (6856528811048429, 5155),
+    (6822416727411372, 5156),
+    (2144924036174487, 5388),
+    (46545370002462, 6156),
+    (9917388865689, 6466),
+    (99_836_282_890, 7388),
+]
+
+INDEX_TO_PRICE = [
+    (0, 1_004_968_987_606512354182109771),
+    (1077, 4_669_863_090889329544038534),
+    (1987, 49_910_043670274810022205),
+    (2154, 21_699_795273870723549803),
+    (2632, 2_000_221618840727700609),
+    (3156, 146_575625611106531706),
+    (3157, 145_846393642892072537),
+    (3232, 100_332368143282009890),
+    (3823, 5_263790124045347667),
+    (4056, 1_646668492116543299),
+    (4101, 1_315628874808846999),
+    (4146, 1_051140132040790557),
+    (4156, 1_000000000000000000),
+    (4166, 951347940696068854),
+    (4310, 463902261297391185),
+    (5155, 6856528811048429),
+    (5156, 6822416727411372),
+    (5388, 2144924036174487),
+    (6156, 46545370002462),
+    (6466, 9917388865689),
+    (7388, 99_836_282_890),
+]
+
+
+@pytest.mark.parametrize("price, index", PRICE_TO_INDEX)
+def test_price_to_index(price, index):
+    assert index_of(price) == index
+
+
+@pytest.mark.parametrize("index, price", INDEX_TO_PRICE)
+def test_index_to_price(index, price):
+    assert price_at(index) == price
+
+
+def test_out_of_bounds():
+    with pytest.raises(ValueError):
+        price_at(MAX_FENWICK_INDEX + 1)
+    with pytest.raises(ValueError):
+        index_of(MIN_PRICE - 1)
+    with pytest.raises(ValueError):
+        index_of(MAX_PRICE + 1)
+
+    assert price_to_index_safe(MIN_PRICE - 1) == MAX_FENWICK_INDEX
+    assert price_to_index_safe(MAX_PRICE + 1) == 0
+
+
+def test_bisection_matches_index_of():
+    # every bucket price and its neighbours, where log rounding of _indexOf matters most
+    for index, price in enumerate(PRICES):
+        assert index_of(price) == _index_of(price) == index
+        for offset in (-10**9, -1, 1, 10**9, price // 1000, -(price // 1000)):
+            neighbour = min(max(price + offset, MIN_PRICE), MAX_PRICE)
+            assert index_of(neighbour) == _index_of(neighbour)
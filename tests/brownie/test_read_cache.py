@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sdk import read_cache
+from sdk.read_cache import ReadCache
+
+
+class _Contract:
+    """
+    Contract double counting view calls.
+    """
+
+    address = "0x0000000000000000000000000000000000000001"
+
+    def __init__(self):
+        self.calls = 0
+
+    def poolPricesInfo(self, pool):
+        self.calls += 1
+        return (pool, self.calls)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = SimpleNamespace(_current_id=1, _time_offset=0)
+    history = []
+    registered = []
+    monkeypatch.setattr(read_cache, "chain", chain)
+    monkeypatch.setattr(read_cache, "history", history)
+    monkeypatch.setattr(read_cache, "_revert_register", registered.append)
+    return SimpleNamespace(state=chain, history=history, registered=registered)
+
+
+def test_reads_are_cached_in_a_chain_state(chain):
+    cache = ReadCache()
+    contract = _Contract()
+
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 1)
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 1)
+    # other arguments are another key
+    assert cache.call(contract, "poolPricesInfo", "0xother") == ("0xother", 2)
+    assert (cache.hits, cache.misses, contract.calls) == (1, 2, 2)
+    assert str(cache) == "read cache hits: 1, misses: 2, hit rate: 33.3%"
+
+    cache.reset_counters()
+    assert cache.hit_rate == 0.0
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda chain: chain.history.append("tx"),
+        lambda chain: setattr(chain.state, "_current_id", 2),
+        lambda chain: setattr(chain.state, "_time_offset", 3600),
+    ],
+    ids=["transaction", "mine", "sleep"],
+)
+def test_chain_state_change_drops_results(chain, change):
+    cache = ReadCache()
+    contract = _Contract()
+    cache.call(contract, "poolPricesInfo", "0xpool")
+
+    change(chain)
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 2)
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 2)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_revert_and_reset_drop_results(chain):
+    cache = ReadCache()
+    contract = _Contract()
+    # brownie notifies registered objects on revert and reset
+    assert chain.registered == [cache]
+
+    cache.call(contract, "poolPricesInfo", "0xpool")
+    # a revert to a snapshot can restore the same local state id with different chain state
+    cache._revert(12)
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 2)
+
+    cache._reset()
+    assert cache.call(contract, "poolPricesInfo", "0xpool") == ("0xpool", 3)
+    assert (cache.hits, cache.misses) == (0, 3)
@@ -0,0 +1,101 @@
+import json
+import urllib.request
+
+import pytest
+
+from sdk.rpc_cache import NO_BLOCK, ForkCacheProxy, RpcCache
+
+BLOCK = 16_295_000
+ACCOUNT = "0x6b175474e89094c44da98b954eedeac495271d0f"
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    proxy = ForkCacheProxy(None, block=BLOCK, cache=RpcCache(tmp_path / "rpc.sqlite")).start()
+    yield proxy
+    proxy.stop()
+
+
+def _request(method, *params):
+    return {"jsonrpc": "2.0", "id": 1, "method": method, "params": list(params)}
+
+
+def test_cache_persists_results(tmp_path):
+    path = tmp_path / "rpc.sqlite"
+    cache = RpcCache(path)
+    assert cache.get(BLOCK, "eth_getBalance", [ACCOUNT, hex(BLOCK)]) is None
+    cache.put(BLOCK, "eth_getBalance", [ACCOUNT, hex(BLOCK)], "0x10")
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    reopened = RpcCache(path)
+    assert reopened.get(BLOCK, "eth_getBalance", [ACCOUNT, hex(BLOCK)]) == "0x10"
+    assert reopened.get(BLOCK + 1, "eth_getBalance", [ACCOUNT, hex(BLOCK + 1)]) is None
+    assert (reopened.hits, reopened.misses) == (1, 1)
+    assert reopened.size() == reopened.size(BLOCK) == 1
+
+
+def test_hit_is_served_without_upstream(proxy):
+    proxy.cache.put(BLOCK, "eth_getCode", [ACCOUNT, hex(BLOCK)], "0x6080")
+
+    assert proxy.handle(_request("eth_getCode", ACCOUNT, hex(BLOCK))) == {"jsonrpc": "2.0", "id": 1, "result": "0x6080"}
+    assert proxy.cache.hits == 1
+
+    # through the local server as well, batches included
+    body = json.dumps([_request("eth_getCode", ACCOUNT, hex(BLOCK)), _request("eth_blockNumber")]).encode()
+    request = urllib.request.Request(proxy.url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        assert [answer["result"] for answer in json.loads(response.read())] == ["0x6080", hex(BLOCK)]
+
+
+def test_miss_is_forwarded_and_stored(proxy, monkeypatch):
+    forwarded = []
+
+    def forward(request):
+        forwarded.append(request)
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x2a"}
+
+    monkeypatch.setattr(proxy, "_forward", forward)
+    assert proxy.handle(_request("eth_getTransactionCount", ACCOUNT, hex(BLOCK)))["result"] == "0x2a"
+    assert proxy.handle(_request("eth_getTransactionCount", ACCOUNT, hex(BLOCK)))["result"] == "0x2a"
+    assert len(forwarded) == 1
+    assert (proxy.cache.hits, proxy.cache.misses) == (1, 1)
+
+
+def test_miss_without_upstream_is_an_error(proxy):
+    response = proxy.handle(_request("eth_getStorageAt", ACCOUNT, "0x0", hex(BLOCK)))
+    assert "not cached and no upstream is set" in response["error"]["message"]
+    assert proxy.cache.size() == 0
+
+
+def test_block_tags_are_keyed_by_block(proxy):
+    proxy.cache.put(BLOCK, "eth_getBalance", [ACCOUNT, hex(BLOCK)], "0x10")
+
+    # moving tags are answered as of the pinned block
+    for tag in ("latest", "pending", "safe", "finalized"):
+        assert proxy.handle(_request("eth_getBalance", ACCOUNT, tag))["result"] == "0x10"
+    assert proxy._block_key("eth_getBalance", [ACCOUNT, hex(BLOCK - 5)]) == BLOCK - 5
+    assert proxy._block_key("eth_getBlockByNumber", ["latest", False]) == BLOCK
+    assert proxy._block_key("eth_chainId", []) == NO_BLOCK
+    # earliest, or a missing block parameter, are not cacheable
+    assert proxy._block_key("eth_getBalance", [ACCOUNT, "earliest"]) is None
+    assert proxy._block_key("eth_getBalance", [ACCOUNT]) is None
+
+
+def test_uncacheable_methods_pass_through(proxy, monkeypatch):
+    forwarded = []
+
+    def forward(request):
+        forwarded.append(request["method"])
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x1"}
+
+    monkeypatch.setattr(proxy, "_forward", forward)
+    for method, params in [
+        ("eth_call", [{"to": ACCOUNT, "data": "0x"}, hex(BLOCK)]),
+        ("eth_sendRawTransaction", ["0xf86c"]),
+        ("eth_getBalance", [ACCOUNT, "earliest"]),
+    ]:
+        proxy.handle(_request(method, *params))
+        proxy.handle(_request(method, *params))
+
+    assert forwarded == ["eth_call"] * 2 + ["eth_sendRawTransaction"] * 2 + ["eth_getBalance"] * 2
+    assert proxy.cache.size() == 0
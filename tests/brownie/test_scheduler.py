@@ -0,0 +1,79 @@
+import pytest
+
+from sdk.scheduler import ActorScheduler
+
+
+class _Clock:
+    """
+    Chain clock double, counting `sleep` calls.
+    """
+
+    def __init__(self, now=0):
+        self.now = now
+        self.sleeps = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        assert seconds > 0
+        self.now += seconds
+        self.sleeps += 1
+
+
+def test_run_jumps_to_due_actors():
+    clock = _Clock()
+    acted = []
+    intervals = {0: 3600, 1: 7200, 2: 3600 * 24}
+    scheduler = ActorScheduler(
+        act=lambda actor: acted.append((clock.time(), actor)), interval=intervals.get, clock=clock, window=0
+    )
+    scheduler.schedule_all(intervals, at=0)
+
+    week = 3600 * 24 * 7
+    actions = scheduler.run(until=week)
+
+    assert clock.time() == week
+    assert actions == len(acted) == 168 + 84 + 7
+    assert scheduler.iterations == 168
+    # one jump per distinct due timestamp, plus the final one to `until`
+    assert clock.sleeps == 168
+    assert acted[:3] == [(0, 0), (0, 1), (0, 2)]
+    assert acted[3:6] == [(3600, 0), (7200, 1), (7200, 0)]
+    assert scheduler.next_due() == week
+
+
+def test_window_groups_actors():
+    clock = _Clock()
+    acted = []
+    scheduler = ActorScheduler(
+        act=lambda actor: acted.append((clock.time(), actor)), interval=lambda actor: None, clock=clock, window=900
+    )
+    scheduler.schedule("a", 100)
+    scheduler.schedule("b", 1000)
+    scheduler.schedule("c", 1001)
+
+    assert scheduler.run(until=5000) == 3
+    assert acted == [(100, "a"), (100, "b"), (1001, "c")]
+    assert scheduler.iterations == 2
+    assert len(scheduler) == 0
+
+
+def test_failed_action_is_rescheduled():
+    clock = _Clock()
+
+    def act(actor):
+        if actor == 0:
+            raise RuntimeError("reverted")
+
+    scheduler = ActorScheduler(act=act, interval=lambda actor: 600, clock=clock, window=0)
+    scheduler.schedule_all([0, 1], at=0)
+
+    with pytest.raises(RuntimeError):
+        scheduler.run(until=3600)
+    assert clock.time() == 0
+    # failing actor waits for its next interaction, the other one stays due
+    assert len(scheduler) == 2
+    assert scheduler.next_due() == 0
+    assert scheduler.run_due() == [1]
+    assert scheduler.next_due() == 600
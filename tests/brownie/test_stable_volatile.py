@@ -1,35 +1,59 @@
 import math
+import os
 
 import brownie
+import numpy as np
 import pytest
 import random
 from decimal import *
 from brownie import Contract
 from brownie.exceptions import VirtualMachineError
-from sdk import AjnaProtocol, DAI_ADDRESS, MKR_ADDRESS
+from sdk import ActorScheduler, AjnaProtocol, ConsoleSink, DAI_ADDRESS, MetricsRecorder, MKR_ADDRESS, metrics_sink
+from sdk.sweep import RunRecorder, current_run, sweep_params
 from conftest import LoansHeapUtils, MAX_PRICE, PoolHelper, TestUtils
 
 
 MAX_BUCKET = 2532  # 3293.70191, highest bucket for initial deposits, is exceeded after initialization
 MIN_BUCKET = 2612  # 2210.03602, lowest bucket involved in the test
 SECONDS_PER_DAY = 3600 * 24
-MIN_UTILIZATION = 0.3
-MAX_UTILIZATION = 0.7
-GOAL_UTILIZATION = 0.5      # borrowers should collateralize such that target utilization approaches this
+REPORT_INTERVAL = 3600      # seconds of simulated activity between pool summaries
 MIN_PARTICIPATION = 25000   # in quote token, the minimum amount to lend
-NUM_LENDERS = 50
-NUM_BORROWERS = 50
-LOG_LENDER_ACTIONS = True
-LOG_BORROWER_ACTIONS = True
+GAS_METHODS = ['addQuoteToken', 'drawDebt', 'removeQuoteToken', 'repayDebt']
+
+# parameters a sweep (sdk/sweep.py) can override per run
+PARAMS = sweep_params({
+    "MIN_UTILIZATION": 0.3,
+    "MAX_UTILIZATION": 0.7,
+    "GOAL_UTILIZATION": 0.5,    # borrowers should collateralize such that target utilization approaches this
+    "NUM_LENDERS": 50,
+    "NUM_BORROWERS": 50,
+    "SIMULATION_DAYS": 7,
+})
+MIN_UTILIZATION = PARAMS["MIN_UTILIZATION"]
+MAX_UTILIZATION = PARAMS["MAX_UTILIZATION"]
+GOAL_UTILIZATION = PARAMS["GOAL_UTILIZATION"]
+NUM_LENDERS = PARAMS["NUM_LENDERS"]
+NUM_BORROWERS = PARAMS["NUM_BORROWERS"]
+SIMULATION_DAYS = PARAMS["SIMULATION_DAYS"]
+# unseeded outside of a sweep
+SEED = current_run().seed if current_run() else None
+# set AJNA_METRICS to a .csv or .parquet path to stream pool metrics to,
+# AJNA_METRICS_CONSOLE=0 to stop printing them along with lender and borrower actions
+METRICS_PATH = os.environ.get("AJNA_METRICS")
+METRICS_CONSOLE = os.environ.get("AJNA_METRICS_CONSOLE", "1") != "0"
+# set AJNA_GAS_BASELINE to a JSON path to compare gas percentiles against (written if missing),
+# AJNA_GAS_CONTEXT=1 to tag gas samples with loans count, bucket count and LUP index
+GAS_BASELINE = os.environ.get("AJNA_GAS_BASELINE")
+GAS_CONTEXT = os.environ.get("AJNA_GAS_CONTEXT", "0") == "1"
+LOG_LENDER_ACTIONS = METRICS_CONSOLE
+LOG_BORROWER_ACTIONS = METRICS_CONSOLE
+STORAGE_FUNDING = True      # write actor balances and allowances to token storage instead of sending transactions
 
 
 # set of buckets deposited into, indexed by lender index
 buckets_deposited = {lender_id: set() for lender_id in range(0, NUM_LENDERS)}
-# timestamp when a lender/borrower last interacted with the pool
-last_triggered = {}
-# list of threshold prices for borrowers to attain in test setup, to start heap in a worst-case state
-threshold_prices = LoansHeapUtils.worst_case_heap_orientation(NUM_BORROWERS, scale=2210/NUM_BORROWERS)
-assert len(threshold_prices) == NUM_BORROWERS
+# threshold prices for borrowers to attain in test setup, streamed to start heap in a worst-case state
+threshold_prices = LoansHeapUtils.threshold_prices(NUM_BORROWERS, scale=2210/NUM_BORROWERS)
 
 
 def log(message: str):
@@ -48,8 +72,12 @@ def lenders(ajna_protocol, scaled_pool):
     print("Initializing lenders")
     for _ in range(NUM_LENDERS):
         lender = ajna_protocol.add_lender()
-        dai_client.top_up(lender, amount)
-        dai_client.approve_max(scaled_pool, lender)
+        if STORAGE_FUNDING:
+            dai_client.top_up_in_storage(lender, amount)
+            dai_client.approve_max_in_storage(scaled_pool, lender)
+        else:
+            dai_client.top_up(lender, amount)
+            dai_client.approve_max(scaled_pool, lender)
         lenders.append(lender)
     return lenders
 
@@ -63,10 +91,16 @@ def borrowers(ajna_protocol, scaled_pool):
     print("Initializing borrowers")
     for _ in range(NUM_BORROWERS):
         borrower = ajna_protocol.add_borrower()
-        collateral_client.top_up(borrower, amount)
-        collateral_client.approve_max(scaled_pool, borrower)
-        dai_client.top_up(borrower, 100_000 * 10**18)  # for repayment of interest
-        dai_client.approve_max(scaled_pool, borrower)
+        if STORAGE_FUNDING:
+            collateral_client.top_up_in_storage(borrower, amount)
+            collateral_client.approve_max_in_storage(scaled_pool, borrower)
+            dai_client.top_up_in_storage(borrower, 100_000 * 10**18)  # for repayment of interest
+            dai_client.approve_max_in_storage(scaled_pool, borrower)
+        else:
+            collateral_client.top_up(borrower, amount)
+            collateral_client.approve_max(scaled_pool, borrower)
+            dai_client.top_up(borrower, 100_000 * 10**18)  # for repayment of interest
+            dai_client.approve_max(scaled_pool, borrower)
         assert collateral_client.get_contract().balanceOf(borrower) >= amount
         borrowers.append(borrower)
     return borrowers
@@ -74,12 +108,11 @@ def borrowers(ajna_protocol, scaled_pool):
 
 @pytest.fixture
 def pool_helper(ajna_protocol, scaled_pool, lenders, borrowers, test_utils, chain):
+    random.seed(SEED)
     pool_helper = PoolHelper(ajna_protocol, scaled_pool)
     # Adds liquidity to an empty pool and draws debt up to a target utilization
     add_initial_liquidity(lenders, pool_helper, chain)
     draw_initial_debt(borrowers, pool_helper, test_utils, chain, target_utilization=GOAL_UTILIZATION)
-    global last_triggered
-    last_triggered = dict.fromkeys(range(0, max(NUM_LENDERS, NUM_BORROWERS)), 0)
     test_utils.validate_pool(pool_helper, borrowers)
     return pool_helper
 
@@ -101,7 +134,7 @@ def add_initial_liquidity(lenders, pool_helper, chain):
 
 def draw_initial_debt(borrowers, pool_helper, test_utils, chain, target_utilization):
     pool = pool_helper.pool
-    target_debt = (pool.depositSize() - pool_helper.debt()) * target_utilization
+    target_debt = pool_helper.availableLiquidity() * target_utilization
     sleep_amount = max(1, int(12 * 3600 / NUM_BORROWERS))
     for borrower_index in range(0, len(borrowers) - 1):
         # determine amount we want to borrow and how much collateral should be deposited
@@ -114,13 +147,10 @@ def draw_initial_debt(borrowers, pool_helper, test_utils, chain, target_utilizat
             pool_price = pool_helper.hpb()  # use the highest-priced bucket with deposit
 
         # determine amount of collateral to deposit
-        if threshold_prices:
+        tp = next(threshold_prices, None)
+        if tp is not None:
             # order the loan heap in a specific manner
-            tp = threshold_prices.pop(0)
-            if tp:
-                collateral_to_deposit = int(borrow_amount / tp)
-            else:  # 0 TP implies empty node on the tree
-                collateral_to_deposit = 0
+            collateral_to_deposit = int(borrow_amount / tp)
         else:
             collateralization_ratio = 1/GOAL_UTILIZATION
             collateral_to_deposit = borrow_amount * 10**18 / pool_price * collateralization_ratio  # WAD
@@ -149,14 +179,11 @@ def get_time_between_interactions(actor_index):
 
 # for debugging discrepancy between borrower debt and pool debt
 def aggregate_borrower_debt(borrowers, pool_helper, debug=False):
-    total_debt = 0
-    for i in range(0, len(borrowers) - 1):
-        borrower = borrowers[i]
-        (debt, _, _, _) = pool_helper.borrowerInfo(borrower.address)
-        if debug and debt > 0:
-            log(f"   borrower {i:>4}     debt: {debt/1e18:>15.3f}")
-        total_debt += debt
-    return total_debt
+    (debts, _, _, _) = pool_helper.borrowersInfo(borrowers[:-1])
+    if debug:
+        for i in np.flatnonzero(debts > 0):
+            log(f"   borrower {i:>4}     debt: {debts[i]/1e18:>15.3f}")
+    return debts.sum()
 
 
 # for debugging debt-with-no-loans issue
@@ -213,57 +240,58 @@ def pledge_and_borrow(pool_helper, borrower, borrower_index, collateral_to_depos
     return tx
 
 
-def draw_and_bid(lenders, borrowers, start_from, pool_helper, chain, test_utils, duration=3600):
-    user_index = start_from
-    end_time = chain.time() + duration
-    chain.sleep(14)
-
-    while chain.time() < end_time:
-        if chain.time() - last_triggered[user_index] > get_time_between_interactions(user_index):
-
-            # Draw debt, repay debt, or do nothing depending on utilization
-            if user_index < NUM_BORROWERS:
-                (_, _, poolActualUtilization, _) = pool_helper.utilizationInfo()
-                utilization = poolActualUtilization / 10**18
-                if utilization < MAX_UTILIZATION:
-                    target_collateralization = random.uniform(1.05, 1/MAX_UTILIZATION)
-                    draw_debt(borrowers[user_index], user_index, pool_helper, test_utils, collateralization=target_collateralization)
-                elif utilization > MIN_UTILIZATION:  # start repaying debt if interest grows too high
-                    repay_debt(borrowers[user_index], user_index, pool_helper, test_utils)
-                # log_borrower_stats(borrowers, pool_helper, chain, debug=True)
-                chain.sleep(14)
-
-            # Add or remove liquidity
-            if user_index < NUM_LENDERS:
-                if random.choice([True, False]):
-                    price = add_quote_token(lenders[user_index], user_index, pool_helper, chain)
-                    if price:
-                        buckets_deposited[user_index].add(price)
-                else:
-                    if len(buckets_deposited[user_index]) > 0:
-                        price = buckets_deposited[user_index].pop()
-                        if not remove_quote_token(lenders[user_index], user_index, price, pool_helper):
-                            buckets_deposited[user_index].add(price)
-                chain.sleep(14)
-
-            try:
-                test_utils.validate_pool(pool_helper, borrowers)
-            except AssertionError as ex:
-                log("Pool state became invalid:")
-                log(TestUtils.dump_book(pool_helper))
-                raise ex
+def record_pool_state(recorder, pool_helper, chain):
+    (_, _, actual_utilization, target_utilization) = pool_helper.utilizationInfo()
+    snapshot = pool_helper.snapshot()
+    recorder.record("utilization", chain.time(), actual_utilization / 1e18)
+    recorder.record("target_utilization", chain.time(), target_utilization / 1e18)
+    recorder.record("rate", chain.time(), snapshot.interest_rate / 1e18)
+
+
+def record_gas(recorder, transactions):
+    for tx in transactions:
+        if tx.fn_name in GAS_METHODS:
+            recorder.record_gas(tx.fn_name, tx.gas_used)
+
+
+def interact(actor_index, lenders, borrowers, pool_helper, chain, test_utils, recorder=None):
+    # Draw debt, repay debt, or do nothing depending on utilization
+    if actor_index < NUM_BORROWERS:
+        (_, _, poolActualUtilization, _) = pool_helper.utilizationInfo()
+        utilization = poolActualUtilization / 10**18
+        if utilization < MAX_UTILIZATION:
+            target_collateralization = random.uniform(1.05, 1/MAX_UTILIZATION)
+            draw_debt(borrowers[actor_index], actor_index, pool_helper, test_utils, collateralization=target_collateralization)
+        elif utilization > MIN_UTILIZATION:  # start repaying debt if interest grows too high
+            repay_debt(borrowers[actor_index], actor_index, pool_helper, test_utils)
+        # log_borrower_stats(borrowers, pool_helper, chain, debug=True)
+
+    # Add or remove liquidity
+    if actor_index < NUM_LENDERS:
+        if random.choice([True, False]):
+            price = add_quote_token(lenders[actor_index], actor_index, pool_helper, chain)
+            if price:
+                buckets_deposited[actor_index].add(price)
+        else:
+            if len(buckets_deposited[actor_index]) > 0:
+                price = buckets_deposited[actor_index].pop()
+                if not remove_quote_token(lenders[actor_index], actor_index, price, pool_helper):
+                    buckets_deposited[actor_index].add(price)
 
-            last_triggered[user_index] = chain.time()
-        # chain.mine(blocks=20, timedelta=274)  # https://github.com/eth-brownie/brownie/issues/1514
-        chain.sleep(900)
-        user_index = (user_index + 1) % max(NUM_LENDERS, NUM_BORROWERS)  # increment with wraparound
-    return user_index
+    try:
+        test_utils.validate_pool(pool_helper, borrowers)
+    except AssertionError as ex:
+        if recorder is not None:
+            recorder.record_failure(chain.time(), f"actor {actor_index}: pool state became invalid {ex}")
+        log("Pool state became invalid:")
+        log(TestUtils.dump_book(pool_helper))
+        raise ex
 
 
 def draw_debt(borrower, borrower_index, pool_helper, test_utils, collateralization=1.1):
     # Draw debt based on available liquidity
     borrow_amount = pool_helper.availableLiquidity() * 1 / (4*((borrower_index%5)+1))
-    pool_quote_on_deposit = pool_helper.pool.depositSize() - pool_helper.debt()
+    pool_quote_on_deposit = pool_helper.availableLiquidity()
     borrow_amount = min(pool_quote_on_deposit / 2, borrow_amount)
     collateral_to_deposit = borrow_amount / pool_helper.lup() * collateralization * 10**18
 
@@ -300,12 +328,12 @@ def add_quote_token(lender, lender_index, pool_helper, chain):
 
 def remove_quote_token(lender, lender_index, price, pool_helper) -> bool:
     price_index = pool_helper.priceToIndex(price)
-    (lp_balance, _) = pool_helper.lenderInfo(price_index, lender)
+    (lps, quote_tokens) = pool_helper.lendersInfo([lender], [price_index])
+    lp_balance = lps[0, 0]
     if lp_balance > 0:
-        (_, _, _, _, _, exchange_rate) = pool_helper.bucketInfo(price_index)
-        claimable_quote = lp_balance * exchange_rate / 10**18
+        claimable_quote = quote_tokens[0, 0]
         log(f" lender   {lender_index:>4} removing {claimable_quote / 10**18:.1f} quote"
-            f" from bucket {price_index} ({price / 10**18:.1f}); exchange rate is {exchange_rate/1e18:.8f}")
+            f" from bucket {price_index} ({price / 10**18:.1f}); exchange rate is {claimable_quote / lp_balance:.8f}")
         if not ensure_pool_is_funded(pool_helper.pool, claimable_quote * 2, "withdraw"):
             return False
         try:
@@ -373,17 +401,38 @@ def test_stable_volatile_one(pool_helper, lenders, borrowers, test_utils, chain)
 
     # Simulate pool activity over a configured time duration
     start_time = chain.time()
-    end_time = start_time + SECONDS_PER_DAY * 7
-    actor_id = 0
-    with test_utils.GasWatcher(['addQuoteToken', 'drawDebt', 'removeQuoteToken', 'repayDebt']):
+    end_time = start_time + SECONDS_PER_DAY * SIMULATION_DAYS
+    # metrics of the run go to the sweep results store when run from a sweep
+    recorder = RunRecorder.for_current_run()
+    # every actor interacts right away, then after its own time between interactions
+    scheduler = ActorScheduler(
+        act=lambda actor_index: interact(actor_index, lenders, borrowers, pool_helper, chain, test_utils, recorder),
+        interval=get_time_between_interactions,
+    )
+    scheduler.schedule_all(range(max(NUM_LENDERS, NUM_BORROWERS)), at=chain.time())
+    metrics = MetricsRecorder(
+        ([ConsoleSink()] if METRICS_CONSOLE else []) + ([metrics_sink(METRICS_PATH)] if METRICS_PATH else [])
+    )
+    gas_watcher = test_utils.GasWatcher(
+        GAS_METHODS, context=pool_helper.gasContext if GAS_CONTEXT else None, baseline=GAS_BASELINE
+    )
+    with recorder, metrics, gas_watcher:
+        record_pool_state(recorder, pool_helper, chain)
         while chain.time() < end_time:
-            # hit the pool an hour at a time, calculating interest and then sending transactions
+            # jump from one due interaction to the next, summarizing the pool an hour at a time
+            first_tx = len(brownie.history)
             try:
-                actor_id = draw_and_bid(lenders, borrowers, actor_id, pool_helper, chain, test_utils)
+                scheduler.run(until=min(chain.time() + REPORT_INTERVAL, end_time))
             except VirtualMachineError as ex:
                 log(f"WARN: {ex.message}")
-            test_utils.summarize_pool(pool_helper)
-            print(f"days remaining: {(end_time - chain.time()) / 3600 / 24:.3f}\n")
+            transactions = brownie.history[first_tx:]
+            for tx in transactions:
+                metrics.record_tx(tx.gas_used)
+            record_gas(recorder, transactions)
+            test_utils.summarize_pool(pool_helper, metrics)
+            record_pool_state(recorder, pool_helper, chain)
+            if METRICS_CONSOLE:
+                print(f"days remaining: {(end_time - chain.time()) / 3600 / 24:.3f}\n")
 
     # Validate test ended with the pool in a meaningful state
     test_utils.validate_pool(pool_helper, borrowers)
@@ -391,4 +440,9 @@ def test_stable_volatile_one(pool_helper, lenders, borrowers, test_utils, chain)
     (_, _, poolActualUtilization, _) = pool_helper.utilizationInfo()
     utilization = poolActualUtilization / 10**18
     print(f"elapsed time: {(chain.time()-start_time) / 3600 / 24} days   actual utilization: {utilization}")
+    print(f"scheduler iterations: {scheduler.iterations}   actions: {scheduler.actions}")
+    if GAS_CONTEXT:
+        for method in ("ERC20Pool.drawDebt", "ERC20Pool.repayDebt"):
+            for loans_count, stats in gas_watcher.profile.stats_by(method, "loans_count", bins=range(0, 1_000, 10)).items():
+                print(f"{method} with {loans_count:>4}+ loans  p50: {stats.p50:>9}  p99: {stats.p99:>9}  count: {stats.count:>5}")
     assert utilization > MIN_UTILIZATION
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from sdk import sweep
+from sdk.sweep import (
+    SWEEP_RUN_ENV,
+    RunRecorder,
+    SweepResults,
+    SweepRun,
+    run_sweep,
+    sweep_params,
+    sweep_run_id,
+    sweep_runs,
+)
+
+
+def test_sweep_runs_cover_grid_and_seeds():
+    runs = sweep_runs({"NUM_LENDERS": [25, 50], "GOAL_UTILIZATION": [0.4, 0.5, 0.6]}, seeds=range(4))
+
+    assert len(runs) == 24
+    assert runs[0].seed == 0 and runs[0].params == {"NUM_LENDERS": 25, "GOAL_UTILIZATION": 0.4}
+    assert runs[5].seed == 1 and runs[5].params == {"NUM_LENDERS": 25, "GOAL_UTILIZATION": 0.5}
+    assert len({(run.seed, tuple(run.params.items())) for run in runs}) == 24
+
+    # ids are stable across grids and seed lists, whatever the position of the run
+    assert len({run.run_id for run in runs}) == 24
+    assert all(0 <= run.run_id < 2**63 for run in runs)
+    assert runs[5].run_id == sweep_run_id(1, {"GOAL_UTILIZATION": 0.5, "NUM_LENDERS": 25})
+    other = sweep_runs({"GOAL_UTILIZATION": [0.5]}, seeds=[1])
+    assert other[0].run_id == sweep_run_id(1, {"GOAL_UTILIZATION": 0.5}) != runs[5].run_id
+
+
+def test_sweep_params_override_defaults(monkeypatch):
+    defaults = {"NUM_LENDERS": 50, "GOAL_UTILIZATION": 0.5}
+    assert sweep_params(defaults) == defaults
+
+    monkeypatch.setenv(SWEEP_RUN_ENV, SweepRun(3, 7, {"NUM_LENDERS": 10}).to_json())
+    assert sweep_params(defaults) == {"NUM_LENDERS": 10, "GOAL_UTILIZATION": 0.5}
+
+    monkeypatch.setenv(SWEEP_RUN_ENV, SweepRun(3, 7, {"NUM_BUCKETS": 10}).to_json())
+    with pytest.raises(KeyError):
+        sweep_params(defaults)
+
+
+def test_recorder_writes_run_metrics(tmp_path):
+    path = tmp_path / "sweep.sqlite"
+    results = SweepResults(path)
+    run = SweepRun(1, 42, {"NUM_LENDERS": 10}, str(path))
+    results.start_run(run)
+
+    with RunRecorder(SweepResults(path), run.run_id, batch_size=3) as recorder:
+        for step in range(5):
+            recorder.record("utilization", 3600 * step, step / 10)
+        recorder.record_gas("drawDebt", 250_000)
+        recorder.record_gas("drawDebt", 230_000)
+        recorder.record_failure(7200, "pool state became invalid")
+    results.finish_run(run.run_id, "failed")
+
+    steps, values = results.series(1, "utilization")
+    assert steps.tolist() == [0, 3600, 7200, 10800, 14400]
+    assert values.tolist() == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert results.gas(1)["drawDebt"].tolist() == [250_000, 230_000]
+    assert results.failures() == [(1, 7200, "pool state became invalid")]
+    assert results.runs() == [(SweepRun(1, 42, {"NUM_LENDERS": 10}), "failed")]
+
+    # a new attempt of the run starts from scratch
+    results.start_run(run)
+    assert results.series(1, "utilization")[0].size == 0
+    assert results.runs("running") == [(SweepRun(1, 42, {"NUM_LENDERS": 10}), "running")]
+
+
+def test_recorder_is_noop_outside_sweep(monkeypatch):
+    monkeypatch.delenv(SWEEP_RUN_ENV, raising=False)
+    with RunRecorder.for_current_run() as recorder:
+        assert not recorder.enabled
+        recorder.record("utilization", 0, 0.5)
+
+
+def test_run_sweep_gives_concurrent_runs_distinct_ports(tmp_path, monkeypatch):
+    lock = threading.Lock()
+    ports_in_use = set()
+    ports_used = []
+
+    def execute_run(run, port, test, brownie_args, log_path):
+        with lock:
+            assert port not in ports_in_use
+            ports_in_use.add(port)
+            ports_used.append(port)
+        time.sleep(0.01)
+        with lock:
+            ports_in_use.remove(port)
+        store = SweepResults(run.results)
+        store.start_run(run)
+        store.finish_run(run.run_id, "passed" if run.seed % 2 == 0 else "failed")
+        store.close()
+        return "passed" if run.seed % 2 == 0 else "failed"
+
+    monkeypatch.setattr(sweep, "_execute_run", execute_run)
+    path = tmp_path / "sweep.sqlite"
+
+    counts = run_sweep({"NUM_LENDERS": [10, 20]}, range(4), path, workers=3, base_port=9000)
+    assert counts == {"passed": 4, "failed": 4}
+    assert set(ports_used) <= {9000, 9001, 9002}
+
+    # passed runs are not run again
+    ports_used.clear()
+    assert run_sweep({"NUM_LENDERS": [10, 20]}, range(4), path, workers=3, base_port=9000) == {"failed": 4}
+    assert len(ports_used) == 4
+
+    # another grid into the same store keeps results of earlier runs
+    assert run_sweep({"NUM_LENDERS": [30]}, range(2), path, workers=3, base_port=9000) == {"passed": 1, "failed": 1}
+    recorded = SweepResults(path).runs()
+    assert len(recorded) == 10
+    assert sorted(run.params["NUM_LENDERS"] for run, _ in recorded) == [10] * 4 + [20] * 4 + [30] * 2
@@ -0,0 +1,176 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sdk import tx_pipeline
+from sdk.tx_pipeline import MAX_EMPTY_BLOCKS, NonceManager, TransactionPipeline, deploy_all, transact
+
+
+class _Node:
+    """
+    Local node double: transactions queue up while automine is off and are included by `mine`.
+    """
+
+    def __init__(self, client="anvil/v0.1.0", transaction_counts=None):
+        self.clientVersion = client
+        self.transaction_counts = transaction_counts or {}
+        self.automine = True
+        self.requests = []
+        self.queued = []
+        self.mined = set()
+        self.blocks = 0
+        # transactions never included, e.g. underpriced ones
+        self.stuck = set()
+
+        self.eth = SimpleNamespace(
+            get_transaction_count=self.get_transaction_count, get_transaction_receipt=self.get_transaction_receipt
+        )
+        self.provider = SimpleNamespace(make_request=self.make_request)
+
+    def get_transaction_count(self, address, block):
+        assert block == "pending"
+        return self.transaction_counts.get(address, 0)
+
+    def get_transaction_receipt(self, txid):
+        if txid not in self.mined:
+            raise tx_pipeline.TransactionNotFound(txid)
+        return {"transactionHash": txid}
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+        if method == "evm_setAutomine":
+            self.automine = params[0]
+
+    def mine(self):
+        self.blocks += 1
+        self.mined.update(txid for txid in self.queued if txid not in self.stuck)
+        self.queued = [txid for txid in self.queued if txid in self.stuck]
+
+    def send(self, txid):
+        if self.automine:
+            self.mined.add(txid)
+        else:
+            self.queued.append(txid)
+
+
+class _Tx:
+    def __init__(self, txid, params, revert_msg=None):
+        self.txid = txid
+        self.params = params
+        self.status = 0 if revert_msg else 1
+        self.revert_msg = revert_msg
+        self.contract_address = f"0xc{txid}"
+        self.confirmations = []
+
+    def wait(self, confirmations):
+        self.confirmations.append(confirmations)
+
+
+class _Function:
+    """
+    Contract function double, sending a transaction to the node per call.
+    """
+
+    def __init__(self, node, revert_msg=None):
+        self.node = node
+        self.revert_msg = revert_msg
+        self.txs = []
+
+    def __call__(self, *args):
+        *args, params = args
+        tx = _Tx(len(self.node.mined) + len(self.node.queued), params, self.revert_msg)
+        self.node.send(tx.txid)
+        self.txs.append(tx)
+        return tx
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = _Node(transaction_counts={"0xa": 7, "0xb": 0})
+    monkeypatch.setattr(tx_pipeline, "web3", node)
+    monkeypatch.setattr(tx_pipeline, "chain", node)
+    return node
+
+
+def test_nonce_manager_hands_out_consecutive_nonces(node):
+    nonces = NonceManager()
+    assert [nonces.next("0xa") for _ in range(3)] == [7, 8, 9]
+    assert nonces.next("0xb") == 0
+
+    # after a reset nonces are read from the node again
+    node.transaction_counts["0xa"] = 10
+    nonces.reset()
+    assert nonces.next("0xa") == 10
+    assert nonces.next("0xb") == 0
+
+
+def test_pipeline_submits_with_local_nonces(node):
+    sender = SimpleNamespace(address="0xa")
+    approve = _Function(node)
+
+    with TransactionPipeline():
+        assert not node.automine
+        for amount in range(3):
+            transact(approve, "0xpool", amount, sender=sender, failure_message="Failed to approve")
+        # nothing is mined until the barrier
+        assert node.mined == set()
+    assert node.automine
+    assert node.requests == [("evm_setAutomine", [False]), ("evm_setAutomine", [True])]
+
+    assert [tx.params["nonce"] for tx in approve.txs] == [7, 8, 9]
+    assert all(tx.params["required_confs"] == 0 for tx in approve.txs)
+    assert node.blocks == 1
+    assert tx_pipeline.active_pipeline() is None
+
+
+def test_barrier_reports_reverts(node):
+    sender = SimpleNamespace(address="0xb")
+    with pytest.raises(Exception, match="Failed to draw debt. Revert message: BorrowerUnderCollateralized"):
+        with TransactionPipeline() as pipeline:
+            transact(_Function(node), sender=sender, failure_message="Failed to approve")
+            transact(
+                _Function(node, "BorrowerUnderCollateralized"), sender=sender, failure_message="Failed to draw debt"
+            )
+            pipeline.barrier()
+
+
+def test_barrier_gives_up_after_empty_blocks(node):
+    sender = SimpleNamespace(address="0xa")
+    with pytest.raises(Exception, match=f"1 transactions not mined after {MAX_EMPTY_BLOCKS} blocks"):
+        with TransactionPipeline() as pipeline:
+            transact(_Function(node), sender=sender, failure_message="Failed to approve")
+            node.stuck.add(transact(_Function(node), sender=sender, failure_message="Failed to transfer").txid)
+            pipeline.barrier()
+
+    # first block includes the other transaction, then MAX_EMPTY_BLOCKS + 1 empty blocks
+    assert node.blocks == MAX_EMPTY_BLOCKS + 2
+    # automine is restored on failure as well
+    assert node.automine
+
+
+def test_transact_outside_pipeline_mines_right_away(node):
+    sender = SimpleNamespace(address="0xa")
+    tx = transact(_Function(node), 1, sender=sender, failure_message="Failed to approve")
+    assert tx.params == {"from": sender}
+    assert tx.txid in node.mined
+
+    with pytest.raises(Exception, match="Failed to repay. Revert message: NoDebt"):
+        transact(_Function(node, "NoDebt"), sender=sender, failure_message="Failed to repay")
+
+
+def test_deploy_all_awaits_deployments_at_a_barrier(node):
+    sender = SimpleNamespace(address="0xa")
+
+    def container(name):
+        return SimpleNamespace(_name=name, deploy=_Function(node), at=lambda address: (name, address))
+
+    factory, utils = container("ERC20PoolFactory"), container("PoolInfoUtils")
+    with TransactionPipeline():
+        deployed = deploy_all({"factory": (factory, "0xajna"), "utils": (utils,)}, sender)
+        assert node.blocks == 1
+
+    assert deployed == {
+        "factory": ("ERC20PoolFactory", factory.deploy.txs[0].contract_address),
+        "utils": ("PoolInfoUtils", utils.deploy.txs[0].contract_address),
+    }
+    assert [tx.params["nonce"] for tx in factory.deploy.txs + utils.deploy.txs] == [7, 8]
@@ -0,0 +1,252 @@
+"""
+Runs invariant test matrices (`test-invariant-*-precision.sh`, `test-invariant-*-buckets.sh`) with cells in parallel.
+
+    python invariant_matrix.py [erc20-precision ...|all] [workers=4] [report=report.json] [rerun=1] [forge_args=...]
+
+Every cell (e.g. 6 decimals quote and 18 decimals collateral) runs `forge t --mt invariant` in its own process
+with its own `--out` and `--cache-path`, under `.invariant-matrix/<matrix>/<cell>/` along with its log. Cells
+passed with the same sources (`src`, `lib`, `tests/forge`, `foundry.toml`), forge version, arguments and
+environment read by the tests (`vm.env*` names and `FOUNDRY_*`) are not run again, their cached result is reported.
+Failed cells always run again. A report of every cell, with status, time and failed tests, is printed and
+written as JSON.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+BUCKET_INDEXES = (1, 500, 1500, 2500, 3500, 4500, 5500, 6500, 7369)
+PRECISIONS = (6, 8, 18)
+
+# matrix => (contracts matched with --mc, values of every environment variable)
+MATRICES: Dict[str, Tuple[str, Dict[str, Sequence[int]]]] = {
+    "erc20-precision": ("ERC20", {"QUOTE_PRECISION": PRECISIONS, "COLLATERAL_PRECISION": PRECISIONS}),
+    "erc721-precision": ("ERC721", {"QUOTE_PRECISION": PRECISIONS}),
+    "erc20-buckets": ("ERC20", {"BUCKET_INDEX_ERC20": BUCKET_INDEXES}),
+    "erc721-buckets": ("ERC721", {"BUCKET_INDEX_ERC721": BUCKET_INDEXES}),
+    "position-erc20-precision": (
+        "ERC20PoolPosition",
+        {"QUOTE_PRECISION": PRECISIONS, "COLLATERAL_PRECISION": PRECISIONS},
+    ),
+    "position-erc721-precision": ("ERC721PoolPosition", {"QUOTE_PRECISION": PRECISIONS}),
+}
+
+WORK_DIR = ".invariant-matrix"
+CACHE_DIR = ".invariant-matrix/results"
+SOURCE_DIRS = ("src", "lib", "tests/forge")
+SOURCE_FILES = ("foundry.toml", "remappings.txt")
+ENV_PATTERN = re.compile(r'vm\.env\w*\(\s*"(\w+)"')
+FAIL_PATTERN = re.compile(r"\[FAIL(?:[.:]\s*(?:Reason:\s*)?(?P<reason>.*?))?\]\s+(?P<test>\w+)\(")
+
+
+class Cell(NamedTuple):
+    matrix: str
+    match_contract: str
+    env: Dict[str, str]
+
+    @property
+    def name(self) -> str:
+        return "-".join(f"{name.lower()}-{value}" for name, value in self.env.items())
+
+
+class CellResult(NamedTuple):
+    matrix: str
+    cell: str
+    env: Dict[str, str]
+    # passed, failed or cached (passed before with the same key)
+    status: str
+    seconds: float
+    # "test: reason" of every failed test
+    failures: List[str]
+    log: str
+
+
+def matrix_cells(matrix: str) -> Iterator[Cell]:
+    if matrix not in MATRICES:
+        raise ValueError(f"unknown matrix {matrix}, expected one of {', '.join(MATRICES)}")
+
+    match_contract, axes = MATRICES[matrix]
+    for values in itertools.product(*axes.values()):
+        yield Cell(matrix, match_contract, {name: str(value) for name, value in zip(axes, values)})
+
+
+def sources_digest(root: Path) -> str:
+    """
+    Returns a digest of every Solidity source and forge configuration file of `root`.
+    """
+
+    digest = hashlib.sha256()
+    paths = [root / name for name in SOURCE_FILES if (root / name).exists()]
+    for directory in SOURCE_DIRS:
+        # leaving out candidates written by `regression_generator.py minimize=1`
+        paths += [
+            path for path in (root / directory).rglob("*.sol")
+            if not any(part.startswith("minimize-") for part in path.parts)
+        ]
+    for path in sorted(paths):
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def read_env_names(root: Path) -> List[str]:
+    """
+    Returns names of environment variables read by forge tests with `vm.env*` cheatcodes.
+    """
+
+    names = set()
+    for path in (root / "tests" / "forge").rglob("*.sol"):
+        names.update(ENV_PATTERN.findall(path.read_text()))
+    return sorted(names)
+
+
+class InvariantMatrix:
+    """
+    Runs cells of invariant matrices in parallel, skipping cells passed with the same sources and environment.
+
+    Usage:
+        matrix = InvariantMatrix(root, workers=4)
+        results = matrix.run(matrix_cells("erc20-precision"))
+    """
+
+    def __init__(self, root: Path, workers: Optional[int] = None, rerun: bool = False, forge_args: Sequence[str] = ()) -> None:
+        self.root = Path(root)
+        self.workers = workers or os.cpu_count()
+        self.rerun = rerun
+        self.forge_args = list(forge_args)
+        self.cache_dir = self.root / CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.sources = sources_digest(self.root)
+        self.env_names = read_env_names(self.root)
+        self.forge_version = subprocess.run(
+            ["forge", "--version"], cwd=self.root, capture_output=True, text=True
+        ).stdout.strip()
+
+    def key(self, cell: Cell) -> str:
+        env = {**os.environ, **cell.env}
+        inputs = {
+            "sources": self.sources,
+            "forge": self.forge_version,
+            "args": self.command(cell, Path(".")),
+            "env": {
+                name: env[name]
+                for name in sorted(env)
+                if name in self.env_names or name.startswith("FOUNDRY_")
+            },
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def command(self, cell: Cell, directory: Path) -> List[str]:
+        return [
+            "forge", "t", "--mt", "invariant", "--nmc", "RegressionTest", "--mc", cell.match_contract,
+            "--out", str(directory / "out"), "--cache-path", str(directory / "cache"),
+            *self.forge_args,
+        ]
+
+    def run(self, cells: Sequence[Cell]) -> List[CellResult]:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.run_cell, cells))
+
+    def run_cell(self, cell: Cell) -> CellResult:
+        key = self.key(cell)
+        cached = self.cache_dir / f"{key}.json"
+        if cached.exists() and not self.rerun:
+            result = CellResult(**json.loads(cached.read_text()))
+            return result._replace(status="cached")
+
+        directory = self.root / WORK_DIR / cell.matrix / cell.name
+        directory.mkdir(parents=True, exist_ok=True)
+        log = directory / "forge.log"
+        print(f"{cell.matrix} {cell.name}: running", file=sys.stderr)
+
+        started = time.monotonic()
+        with log.open("w") as output:
+            completed = subprocess.run(
+                self.command(cell, directory),
+                cwd=self.root,
+                env={**os.environ, **cell.env},
+                stdout=output,
+                stderr=subprocess.STDOUT,
+            )
+        seconds = round(time.monotonic() - started, 1)
+
+        failures = _failures(log)
+        status = "passed" if completed.returncode == 0 else "failed"
+        result = CellResult(
+            cell.matrix, cell.name, cell.env, status, seconds, failures, str(log.relative_to(self.root))
+        )
+        print(f"{cell.matrix} {cell.name}: {status} in {seconds}s", file=sys.stderr)
+        if status == "passed":
+            cached.write_text(json.dumps(result._asdict(), indent=2) + "\n")
+        return result
+
+
+def format_report(results: Sequence[CellResult]) -> List[str]:
+    lines = []
+    width = max((len(f"{result.matrix} {result.cell}") for result in results), default=0)
+    for result in results:
+        lines.append(f"{f'{result.matrix} {result.cell}'.ljust(width)}  {result.status:<7} {result.seconds:>9.1f}s")
+        lines += [f"    {failure}" for failure in result.failures]
+
+    counts = {status: sum(result.status == status for result in results) for status in ("passed", "cached", "failed")}
+    lines.append(", ".join(f"{count} {status}" for status, count in counts.items()))
+    return lines
+
+
+def _failures(log: Path) -> List[str]:
+    failures = []
+    with log.open(errors="replace") as lines:
+        for line in lines:
+            match = FAIL_PATTERN.search(line)
+            if match is not None:
+                failure = f"{match.group('test')}: {match.group('reason') or 'no reason'}"
+                if failure not in failures:
+                    failures.append(failure)
+    return failures
+
+
+def _find_root(start: Path) -> Path:
+    for directory in [start, *start.parents]:
+        if (directory / "foundry.toml").exists():
+            return directory
+    raise FileNotFoundError(f"foundry.toml not found above {start}")
+
+
+def main(*args):
+    options = {"workers": None, "report": "invariant-matrix.json", "rerun": "0", "forge_args": ""}
+    matrices = []
+    for arg in args:
+        if "=" not in arg:
+            matrices += list(MATRICES) if arg == "all" else [arg]
+            continue
+        name, value = arg.split("=", 1)
+        if name not in options:
+            raise ValueError(f"unknown option {name}, expected one of {', '.join(options)}")
+        options[name] = value
+
+    cells = [cell for matrix in matrices or list(MATRICES) for cell in matrix_cells(matrix)]
+    runner = InvariantMatrix(
+        _find_root(Path(__file__).resolve().parent),
+        workers=int(options["workers"]) if options["workers"] else None,
+        rerun=options["rerun"] == "1",
+        forge_args=options["forge_args"].split(),
+    )
+    results = runner.run(cells)
+
+    for line in format_report(results):
+        print(line)
+    Path(options["report"]).write_text(json.dumps([result._asdict() for result in results], indent=2) + "\n")
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -1,20 +1,393 @@
+"""
+Generates regression tests from failing sequences of an invariant run.
+
+    python regression_generator.py [trace.log] [minimize=1] [workers=8] [contract=BasicERC20PoolInvariants]
+                                   [any_failure=1] [out=regressions.sol] [keep=1]
+
+Trace is read line by line (`-` reads stdin), so whole `forge t --mt invariant` outputs can be given as is: every
+`[Sequence]` of calls is a failure, with the failure reason and invariant reported around it. Identical call
+sequences are reported once and each one is printed as a `test_regression_*` function calling handlers as
+`RegressionTest*` suites do.
+
+With `minimize=1` every sequence is reduced to a minimal reproducer by delta debugging: candidate subsequences
+are written as tests of a contract inheriting the invariant suite declaring the handlers (or `contract`),
+compiled once per round and replayed with `forge test --mt` in a process pool of `workers`. A candidate
+reproduces the failure when it fails with the same reason (any reason with `any_failure=1`). Invariant
+configuration is read from environment as in the invariant run, e.g. `NO_OF_BUCKETS`.
+"""
+
+import os
 import re
-filename = 'trace.log'
-
-with open(filename, 'r') as f:
-   lines = f.readlines()
-
-first_line = lines[0]
-full_handler = first_line.split("addr=[")[1].split(']')[0].split(":")[1]
-handler_prefix = '_' + ''.join(full_handler[:1].lower())
-handler_suffix = full_handler[1:]
-test_handler = handler_prefix + handler_suffix
-
-print('function test_regression_failure() external {')
-for line in lines:
-    function_name = line.split("calldata=")[1].split('(')[0]
-    args = line.split("args=")[1].replace("[", "(" ).replace("]", ")" )
-    args = re.sub(r"(\s\(\d.*?\))", "", args)
-    sequence_call = function_name + args + ";"
-    print('    ' + test_handler + '.' + ''.join(sequence_call.splitlines()))
-print('}')
\ No newline at end of file
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# sender=0x.. addr=[path:Handler]0x.. calldata=addQuoteToken(uint256,uint256,uint256,uint256), args=[1, 2 [2e0], 3]
+CALL_PATTERN = re.compile(
+    r"addr=\[(?:[^\]]*:)?(?P<handler>\w+)\]\S*\s+calldata=(?P<function>\w+)\([^)]*\),?\s+args=\[(?P<args>.*)\]\s*$"
+)
+# human readable value printed by forge next to large numbers, e.g. `3600000000000000000000 [3.6e21]`
+ANNOTATION_PATTERN = re.compile(r"(?<=\d) \[[^\[\]]*\]")
+FAIL_PATTERN = re.compile(r"\[FAIL(?:[.:]\s*(?:Reason:\s*)?(?P<reason>.*?))?\]")
+INVARIANT_PATTERN = re.compile(r"\b(invariant_\w+)\(\)")
+TEST_RESULT_PATTERN = re.compile(r"\[(?P<status>PASS|FAIL)(?:[.:]\s*(?:Reason:\s*)?(?P<reason>.*?))?\]\s+(?P<test>\w+)\(")
+
+CONTRACT_PATTERN = re.compile(r"^\s*(?:abstract\s+)?contract\s+(\w+)", re.MULTILINE)
+HANDLER_PATTERN = re.compile(r"^\s*(\w+Handler)\s+internal\s+(_\w+)\s*;", re.MULTILINE)
+PRAGMA_PATTERN = re.compile(r"^pragma solidity [^;]+;", re.MULTILINE)
+
+INVARIANTS_DIR = Path("tests") / "forge" / "invariants"
+CANDIDATE_CONTRACT = "RegressionTestMinimize"
+
+
+class Call(NamedTuple):
+    handler: str
+    function: str
+    args: str
+
+    def solidity(self, variables: Dict[str, str]) -> str:
+        variable = variables.get(self.handler) or _handler_variable(self.handler)
+        return f"{variable}.{self.function}({self.args});"
+
+
+@dataclass
+class Failure:
+    calls: Tuple[Call, ...] = ()
+    reason: Optional[str] = None
+    invariant: Optional[str] = None
+    # failures of the trace with the same call sequence
+    count: int = 1
+
+    @property
+    def handlers(self) -> List[str]:
+        return sorted({call.handler for call in self.calls})
+
+
+class InvariantSuite(NamedTuple):
+    contract: str
+    path: Path
+    pragma: str
+    # handler contract => variable holding it
+    handlers: Dict[str, str]
+
+
+def parse_call(line: str) -> Optional[Call]:
+    match = CALL_PATTERN.search(line)
+    if match is None:
+        return None
+    args = ANNOTATION_PATTERN.sub("", match.group("args")).strip()
+    return Call(match.group("handler"), match.group("function"), args)
+
+
+def iter_failures(lines: Iterable[str]) -> Iterator[Failure]:
+    """
+    Yields failing call sequences of an invariant run output, in order, reading it one line at a time.
+
+    A sequence is a run of consecutive call lines. Reason of a `[FAIL...]` line and invariant name (`invariant_*()`)
+    of a line before the next sequence are attributed to the sequence they surround.
+    """
+
+    calls: List[Call] = []
+    reason = invariant = None
+    closed = False
+    for line in lines:
+        call = parse_call(line)
+        if call is not None:
+            if closed:
+                yield Failure(tuple(calls), reason, invariant)
+                calls, reason, invariant, closed = [], None, None, False
+            calls.append(call)
+            continue
+
+        fail = FAIL_PATTERN.search(line)
+        if fail is not None and calls:
+            yield Failure(tuple(calls), reason, invariant)
+            calls, reason, invariant = [], None, None
+        closed = bool(calls)
+
+        if fail is not None and fail.group("reason"):
+            reason = fail.group("reason").strip()
+        named = INVARIANT_PATTERN.search(line)
+        if named is not None and invariant is None:
+            invariant = named.group(1)
+
+    if calls:
+        yield Failure(tuple(calls), reason, invariant)
+
+
+def unique_failures(failures: Iterable[Failure]) -> List[Failure]:
+    """
+    Returns failures with distinct call sequences, in order of first occurrence, counting repeated ones.
+    """
+
+    unique: Dict[Tuple[Call, ...], Failure] = {}
+    for failure in failures:
+        known = unique.get(failure.calls)
+        if known is None:
+            unique[failure.calls] = failure
+            continue
+        known.count += 1
+        known.reason = known.reason or failure.reason
+        known.invariant = known.invariant or failure.invariant
+    return list(unique.values())
+
+
+def delta_debug(calls: Sequence[Call], fails: Callable[[List[Tuple[Call, ...]]], List[bool]]) -> Tuple[Call, ...]:
+    """
+    Reduces `calls` to a 1-minimal failing sequence (ddmin): no single call of the result can be removed.
+
+    Args:
+        calls: failing sequence
+        fails: returns whether each candidate sequence fails, all candidates of a round are given at once
+    """
+
+    calls = tuple(calls)
+    granularity = 2
+    while len(calls) >= 2:
+        chunks = _split(calls, granularity)
+        subsets = chunks
+        # with two chunks complements are the subsets themselves
+        complements = [] if granularity == 2 else [_without(chunks, position) for position in range(len(chunks))]
+        results = fails(subsets + complements)
+
+        failing = [position for position, failed in enumerate(results) if failed]
+        if failing and failing[0] < len(subsets):
+            calls, granularity = subsets[failing[0]], 2
+        elif failing:
+            calls, granularity = complements[failing[0] - len(subsets)], max(granularity - 1, 2)
+        elif granularity >= len(calls):
+            break
+        else:
+            granularity = min(granularity * 2, len(calls))
+    return calls
+
+
+def find_suites(root: Path) -> List[InvariantSuite]:
+    """
+    Returns invariant test contracts of `root` declaring handlers, with the variables holding them.
+    """
+
+    suites = []
+    for path in sorted((root / INVARIANTS_DIR).rglob("*.t.sol")):
+        source = path.read_text()
+        contract = CONTRACT_PATTERN.search(source)
+        handlers = dict(HANDLER_PATTERN.findall(source))
+        pragma = PRAGMA_PATTERN.search(source)
+        if contract is None or not handlers or pragma is None:
+            continue
+        suites.append(InvariantSuite(contract.group(1), path, pragma.group(0), handlers))
+    return suites
+
+
+def select_suite(suites: Sequence[InvariantSuite], handlers: Sequence[str], contract: Optional[str] = None) -> InvariantSuite:
+    """
+    Returns the suite named `contract`, or the one declaring every handler, preferring `<Name>Invariants` of a
+    single `<Name>Handler`.
+    """
+
+    if contract is not None:
+        for suite in suites:
+            if suite.contract == contract:
+                return suite
+        raise ValueError(f"invariant contract {contract} not found")
+
+    candidates = [suite for suite in suites if all(handler in suite.handlers for handler in handlers)]
+    if not candidates:
+        raise ValueError(f"no invariant contract declares handlers {', '.join(handlers)}")
+    preferred = {handler[: -len("Handler")] + "Invariants" for handler in handlers}
+    return sorted(candidates, key=lambda suite: (suite.contract not in preferred, suite.contract))[0]
+
+
+def render_test(name: str, calls: Sequence[Call], variables: Dict[str, str], invariant: Optional[str] = None) -> str:
+    lines = [f"    function {name}() external {{"]
+    lines += [f"        {call.solidity(variables)}" for call in calls]
+    if invariant is not None:
+        lines += ["", "        // check invariants hold true", f"        {invariant}();"]
+    lines.append("    }")
+    return "\n".join(lines)
+
+
+class Minimizer:
+    """
+    Replays candidate sequences of a failure with forge, in parallel, caching the result of every candidate.
+
+    Usage:
+        with Minimizer(root, workers=8) as minimizer:
+            calls = minimizer.minimize(failure)
+    """
+
+    def __init__(self, root: Path, workers: Optional[int] = None, contract: Optional[str] = None,
+                 any_failure: bool = False, keep: bool = False) -> None:
+        self.root = Path(root)
+        self.suites = find_suites(self.root)
+        self.contract = contract
+        self.any_failure = any_failure
+        self.keep = keep
+        # generated tests must be in the forge test directory to be compiled
+        self.directory = Path(tempfile.mkdtemp(prefix="minimize-", dir=self.root / "tests" / "forge"))
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        self.rounds = 0
+
+    def __enter__(self) -> "Minimizer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        if not self.keep:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def minimize(self, failure: Failure) -> Tuple[Call, ...]:
+        """
+        Returns the minimal sequence of `failure` calls reproducing it, all of them if the whole sequence
+        does not reproduce it.
+        """
+
+        suite = select_suite(self.suites, failure.handlers, self.contract)
+        cache: Dict[Tuple[Call, ...], bool] = {}
+
+        def fails(candidates: List[Tuple[Call, ...]]) -> List[bool]:
+            pending = list(dict.fromkeys(candidate for candidate in candidates if candidate not in cache))
+            if pending:
+                cache.update(zip(pending, self._replay(suite, failure, pending)))
+            return [cache[candidate] for candidate in candidates]
+
+        if not fails([failure.calls])[0]:
+            print(f"sequence of {len(failure.calls)} calls does not reproduce failure, left as is", file=sys.stderr)
+            return failure.calls
+        return delta_debug(failure.calls, fails)
+
+    def _replay(self, suite: InvariantSuite, failure: Failure, candidates: List[Tuple[Call, ...]]) -> List[bool]:
+        # a single candidates file at a time, forge drops artifacts of the previous one
+        for previous in self.directory.glob("*.t.sol"):
+            previous.unlink()
+        self.rounds += 1
+        path = self.directory / f"{CANDIDATE_CONTRACT}{self.rounds}.t.sol"
+        names = [f"test_candidate_{position:05d}" for position in range(len(candidates))]
+        tests = [
+            render_test(name, calls, suite.handlers, failure.invariant) for name, calls in zip(names, candidates)
+        ]
+        import_path = os.path.relpath(suite.path, path.parent)
+        path.write_text(
+            "// SPDX-License-Identifier: UNLICENSED\n\n"
+            f"{suite.pragma}\n\n"
+            f'import {{ {suite.contract} }} from "{import_path}";\n\n'
+            f"contract {CANDIDATE_CONTRACT}{self.rounds} is {suite.contract} {{\n\n"
+            + "\n\n".join(tests)
+            + "\n}\n"
+        )
+
+        # compile once, candidates then only run
+        build = subprocess.run(["forge", "build"], cwd=self.root, capture_output=True, text=True)
+        if build.returncode != 0:
+            raise RuntimeError(f"forge build failed:\n{build.stdout}{build.stderr}")
+
+        relative_path = str(path.relative_to(self.root))
+        results = self.executor.map(_run_candidate, [(str(self.root), relative_path, name) for name in names])
+        return [self._reproduces(failure, status, reason) for status, reason in results]
+
+    def _reproduces(self, failure: Failure, status: str, reason: Optional[str]) -> bool:
+        if status != "FAIL":
+            return False
+        return self.any_failure or failure.reason is None or reason == failure.reason
+
+
+def _run_candidate(args: Tuple[str, str, str]) -> Tuple[str, Optional[str]]:
+    root, path, name = args
+    result = subprocess.run(
+        ["forge", "test", "--match-path", path, "--mt", name], cwd=root, capture_output=True, text=True
+    )
+    for match in TEST_RESULT_PATTERN.finditer(result.stdout):
+        if match.group("test") == name:
+            reason = match.group("reason")
+            return match.group("status"), reason.strip() if reason else None
+    raise RuntimeError(f"no result of {name}:\n{result.stdout}{result.stderr}")
+
+
+def _split(calls: Tuple[Call, ...], count: int) -> List[Tuple[Call, ...]]:
+    size, extra = divmod(len(calls), count)
+    chunks, start = [], 0
+    for position in range(count):
+        stop = start + size + (position < extra)
+        chunks.append(calls[start:stop])
+        start = stop
+    return chunks
+
+
+def _without(chunks: List[Tuple[Call, ...]], position: int) -> Tuple[Call, ...]:
+    return tuple(call for index, chunk in enumerate(chunks) if index != position for call in chunk)
+
+
+def _handler_variable(handler: str) -> str:
+    return "_" + handler[:1].lower() + handler[1:]
+
+
+def _find_root(start: Path) -> Path:
+    for directory in [start, *start.parents]:
+        if (directory / "foundry.toml").exists():
+            return directory
+    raise FileNotFoundError(f"foundry.toml not found above {start}")
+
+
+def main(trace="trace.log", *args):
+    options = {"minimize": "0", "workers": None, "contract": None, "any_failure": "0", "out": None, "keep": "0"}
+    for arg in args:
+        name, value = arg.split("=", 1)
+        if name not in options:
+            raise ValueError(f"unknown option {name}, expected one of {', '.join(options)}")
+        options[name] = value
+
+    with (sys.stdin if trace == "-" else open(trace, errors="replace")) as lines:
+        failures = unique_failures(iter_failures(lines))
+    print(f"{len(failures)} distinct failing sequences in {trace}", file=sys.stderr)
+
+    root = _find_root(Path(__file__).resolve().parent)
+    suites = find_suites(root)
+    minimizer = None
+    if options["minimize"] == "1" and failures:
+        minimizer = Minimizer(
+            root,
+            workers=int(options["workers"]) if options["workers"] else None,
+            contract=options["contract"],
+            any_failure=options["any_failure"] == "1",
+            keep=options["keep"] == "1",
+        )
+
+    tests = []
+    try:
+        for position, failure in enumerate(failures, start=1):
+            calls = failure.calls
+            if minimizer is not None:
+                calls = minimizer.minimize(failure)
+            print(
+                f"sequence {position}: {failure.invariant or 'unknown invariant'}, {failure.reason or 'no reason'}, "
+                f"seen {failure.count} times, {len(failure.calls)} -> {len(calls)} calls",
+                file=sys.stderr,
+            )
+
+            name = failure.invariant[len("invariant_"):] if failure.invariant else "failure"
+            try:
+                variables = select_suite(suites, failure.handlers, options["contract"]).handlers
+            except ValueError:
+                variables = {}
+            tests.append(render_test(f"test_regression_{name}_{position}", calls, variables, failure.invariant))
+    finally:
+        if minimizer is not None:
+            minimizer.close()
+
+    output = "\n\n".join(tests) + "\n"
+    if options["out"]:
+        Path(options["out"]).write_text(output)
+    else:
+        print(output, end="")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+import invariant_matrix
+from invariant_matrix import InvariantMatrix, _failures, matrix_cells, read_env_names
+
+FORGE_OUTPUT = """\
+Running 3 tests for tests/forge/invariants/ERC20Pool/BasicERC20PoolInvariants.t.sol:BasicERC20PoolInvariants
+[PASS] invariant_buckets_B1() (runs: 10, calls: 200, reverts: 3)
+[FAIL. Reason: Incorrect pool debt]
+        [Sequence]
+                sender=0x0000000000000000000000000000000000000b4d addr=[BasicERC20PoolHandler]0x2e23 calldata=drawDebt(uint256,uint256,uint256), args=[1, 2, 3]
+
+ invariant_debt_calculated_A1() (runs: 1, calls: 12, reverts: 0)
+[FAIL: Incorrect pool debt] invariant_debt_calculated_A1() (runs: 1, calls: 12, reverts: 0)
+[FAIL. Reason: Assertion failed.] invariant_quote_Q1() (runs: 4, calls: 80, reverts: 1)
+[FAIL] invariant_fenwick_F1() (runs: 1, calls: 3, reverts: 0)
+Test result: FAILED. 1 passed; 3 failed; finished in 12.34s
+"""
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    (tmp_path / "foundry.toml").write_text("[profile.default]\nsrc = 'src'\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "Pool.sol").write_text("contract Pool {}\n")
+    tests = tmp_path / "tests" / "forge" / "invariants"
+    tests.mkdir(parents=True)
+    (tests / "Invariants.t.sol").write_text(
+        'uint256 quotePrecision = vm.envUint("QUOTE_PRECISION");\n'
+        'uint256 buckets = vm.envOr( "NO_OF_BUCKETS", uint256(3));\n'
+    )
+
+    monkeypatch.setattr(
+        invariant_matrix.subprocess, "run", lambda *args, **kwargs: SimpleNamespace(stdout="forge 0.2.0 (abc123)\n")
+    )
+    for name in ("QUOTE_PRECISION", "COLLATERAL_PRECISION", "NO_OF_BUCKETS", "FOUNDRY_FUZZ_SEED", "HOME_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+def test_env_names_are_read_from_tests(root):
+    assert read_env_names(root) == ["NO_OF_BUCKETS", "QUOTE_PRECISION"]
+
+
+def test_key_changes_with_sources_config_and_seed(root, monkeypatch):
+    cells = list(matrix_cells("erc721-precision"))
+    key = InvariantMatrix(root).key(cells[0])
+
+    # stable for the same inputs, distinct per cell
+    assert InvariantMatrix(root).key(cells[0]) == key
+    assert len({InvariantMatrix(root).key(cell) for cell in cells}) == len(cells)
+
+    # environment the tests do not read is left out
+    monkeypatch.setenv("HOME_DIR", "/elsewhere")
+    assert InvariantMatrix(root).key(cells[0]) == key
+
+    keys = {key}
+    (root / "src" / "Pool.sol").write_text("contract Pool { uint256 debt; }\n")
+    keys.add(InvariantMatrix(root).key(cells[0]))
+    (root / "foundry.toml").write_text("[profile.default]\nsrc = 'src'\n[fuzz]\nruns = 1000\n")
+    keys.add(InvariantMatrix(root).key(cells[0]))
+    monkeypatch.setenv("NO_OF_BUCKETS", "5")
+    keys.add(InvariantMatrix(root).key(cells[0]))
+    monkeypatch.setenv("FOUNDRY_FUZZ_SEED", "0x1")
+    keys.add(InvariantMatrix(root).key(cells[0]))
+    monkeypatch.setenv("FOUNDRY_FUZZ_SEED", "0x2")
+    keys.add(InvariantMatrix(root).key(cells[0]))
+    keys.add(InvariantMatrix(root, forge_args=["--fuzz-seed", "3"]).key(cells[0]))
+    assert len(keys) == 7
+
+    # candidates of regression_generator.py minimize=1 are not sources
+    minimize = root / "tests" / "forge" / "minimize-abc"
+    minimize.mkdir()
+    (minimize / "RegressionTestMinimize1.t.sol").write_text("contract RegressionTestMinimize1 {}\n")
+    assert InvariantMatrix(root, forge_args=["--fuzz-seed", "3"]).key(cells[0]) in keys
+
+
+def test_failures_parses_forge_output(tmp_path):
+    log = tmp_path / "forge.log"
+    log.write_text(FORGE_OUTPUT)
+
+    assert _failures(log) == [
+        "invariant_debt_calculated_A1: Incorrect pool debt",
+        "invariant_quote_Q1: Assertion failed.",
+        "invariant_fenwick_F1: no reason",
+    ]
+
+    log.write_text("[PASS] invariant_buckets_B1() (runs: 10, calls: 200, reverts: 3)\n")
+    assert _failures(log) == []
+
+
+def test_unknown_matrix():
+    with pytest.raises(ValueError):
+        list(matrix_cells("erc1155-precision"))
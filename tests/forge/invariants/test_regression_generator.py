@@ -0,0 +1,106 @@
+from regression_generator import Call, Failure, delta_debug, iter_failures, parse_call, render_test, unique_failures
+
+HANDLER = "addr=[tests/forge/invariants/ERC20Pool/handlers/BasicERC20PoolHandler.sol:BasicERC20PoolHandler]0x2e23"
+
+
+def _call(function: str, args: str) -> str:
+    return f"        sender=0x0000000000000000000000000000000000000b4d {HANDLER} calldata={function}(uint256,uint256,uint256), args=[{args}]\n"
+
+
+TRACE = [
+    "Running 2 tests for tests/forge/invariants/ERC20Pool/BasicERC20PoolInvariants.t.sol:BasicERC20PoolInvariants\n",
+    "[FAIL. Reason: Incorrect pool debt]\n",
+    "        [Sequence]\n",
+    _call("addQuoteToken", "3600000000000000000000 [3.6e21], 2, 3"),
+    _call("drawDebt", "1, 20000000000000000000 [2e19], 0"),
+    "\n",
+    " invariant_debt_calculated_A1() (runs: 10, calls: 200, reverts: 12)\n",
+    "[FAIL. Reason: Incorrect pool debt]\n",
+    "        [Sequence]\n",
+    _call("addQuoteToken", "3600000000000000000000 [3.6e21], 2, 3"),
+    _call("drawDebt", "1, 20000000000000000000 [2e19], 0"),
+    "\n",
+    " invariant_debt_calculated_A1() (runs: 10, calls: 200, reverts: 12)\n",
+    "[FAIL. Reason: Incorrect bucket LP]\n",
+    "        [Sequence]\n",
+    _call("removeQuoteToken", "1, 2, 3"),
+    "\n",
+    " invariant_buckets_B1() (runs: 10, calls: 200, reverts: 3)\n",
+]
+
+ADD = Call("BasicERC20PoolHandler", "addQuoteToken", "3600000000000000000000, 2, 3")
+DRAW = Call("BasicERC20PoolHandler", "drawDebt", "1, 20000000000000000000, 0")
+REMOVE = Call("BasicERC20PoolHandler", "removeQuoteToken", "1, 2, 3")
+
+
+def test_parse_call_drops_annotations():
+    assert parse_call(TRACE[3]) == ADD
+    assert parse_call("[Sequence]") is None
+
+
+def test_iter_failures_attributes_reason_and_invariant():
+    failures = list(iter_failures(iter(TRACE)))
+
+    assert [failure.calls for failure in failures] == [(ADD, DRAW), (ADD, DRAW), (REMOVE,)]
+    assert [failure.reason for failure in failures] == ["Incorrect pool debt"] * 2 + ["Incorrect bucket LP"]
+    assert [failure.invariant for failure in failures] == [
+        "invariant_debt_calculated_A1",
+        "invariant_debt_calculated_A1",
+        "invariant_buckets_B1",
+    ]
+
+
+def test_unique_failures_counts_repeated_sequences():
+    failures = unique_failures(iter_failures(TRACE))
+
+    assert [(failure.calls, failure.count) for failure in failures] == [((ADD, DRAW), 2), ((REMOVE,), 1)]
+    assert failures[0].handlers == ["BasicERC20PoolHandler"]
+
+    # reason and invariant missing on the first occurrence are taken from later ones
+    merged = unique_failures([Failure((REMOVE,)), Failure((REMOVE,), "Incorrect bucket LP", "invariant_buckets_B1")])
+    assert len(merged) == 1
+    assert (merged[0].reason, merged[0].invariant, merged[0].count) == ("Incorrect bucket LP", "invariant_buckets_B1", 2)
+
+
+def test_delta_debug_finds_minimal_sequence():
+    calls = tuple(Call("BasicERC20PoolHandler", "drawDebt", str(position)) for position in range(16))
+    # fails whenever calls 3 and 11 are both made, in order
+    culprits = [calls[3], calls[11]]
+    rounds = []
+
+    def fails(candidates):
+        rounds.append(len(candidates))
+        return [[call for call in candidate if call in culprits] == culprits for candidate in candidates]
+
+    assert delta_debug(calls, fails) == (calls[3], calls[11])
+    # candidates of a round are checked together
+    assert max(rounds) > 2
+
+    assert delta_debug(calls[:1], fails) == calls[:1]
+    # a sequence no subset of which fails is left as is
+    assert delta_debug(calls[:4], lambda candidates: [False] * len(candidates)) == calls[:4]
+
+
+def test_render_test():
+    test = render_test(
+        "test_regression_debt_calculated_A1_1",
+        (ADD, DRAW),
+        {"BasicERC20PoolHandler": "_basicERC20PoolHandler"},
+        "invariant_debt_calculated_A1",
+    )
+    assert test == (
+        "    function test_regression_debt_calculated_A1_1() external {\n"
+        "        _basicERC20PoolHandler.addQuoteToken(3600000000000000000000, 2, 3);\n"
+        "        _basicERC20PoolHandler.drawDebt(1, 20000000000000000000, 0);\n"
+        "\n"
+        "        // check invariants hold true\n"
+        "        invariant_debt_calculated_A1();\n"
+        "    }"
+    )
+
+    # without a suite declaring the handler, the variable is named after it
+    assert render_test("test_regression_failure_1", (REMOVE,), {}) == (
+        "    function test_regression_failure_1() external {\n"
+        "        _basicERC20PoolHandler.removeQuoteToken(1, 2, 3);\n"
+        "    }"
+    )
@@ -205,6 +205,41 @@ contract ERC20PoolInfoUtilsTest is ERC20HelperContract {
         assertEq(npTpRatio,  243.051341028061451209 * 1e18);
     }
 
+    function testPoolInfoUtilsBorrowersInfo() external {
+        address[] memory borrowers = new address[](3);
+        borrowers[0] = _borrower;
+        borrowers[1] = _borrower2;
+        borrowers[2] = _borrower;
+
+        skip(10 days);
+
+        (
+            uint256[] memory debts,
+            uint256[] memory collaterals,
+            uint256[] memory t0Nps,
+            uint256[] memory thresholdPrices
+        ) = _poolUtils.borrowersInfo(address(_pool), borrowers);
+
+        assertEq(debts.length, 3);
+
+        // each borrower matches borrowerInfo
+        for (uint256 i = 0; i < borrowers.length; ++i) {
+            (uint256 debt, uint256 collateral, uint256 t0Np, uint256 thresholdPrice) = _poolUtils.borrowerInfo(address(_pool), borrowers[i]);
+
+            assertEq(debts[i],           debt);
+            assertEq(collaterals[i],     collateral);
+            assertEq(t0Nps[i],           t0Np);
+            assertEq(thresholdPrices[i], thresholdPrice);
+        }
+        assertGt(debts[0],       21_020.192307692307702000 * 1e18);
+        assertEq(collaterals[0], 100 * 1e18);
+        assertEq(debts[1],       0);
+        assertEq(collaterals[1], 0);
+
+        (debts, , , ) = _poolUtils.borrowersInfo(address(_pool), new address[](0));
+        assertEq(debts.length, 0);
+    }
+
     function testPoolInfoUtilsBucketInfo() external {
         (
             uint256 price,
@@ -238,6 +273,143 @@ contract ERC20PoolInfoUtilsTest is ERC20HelperContract {
         assertEq(exchangeRate, 1 * 1e18);
     }
 
+    function testPoolInfoUtilsBucketsInfo() external {
+        (PoolInfoUtils.BucketInfo[] memory buckets, uint256 nextIndex) = _poolUtils.bucketsInfo(address(_pool), highest - 1, lowest + 1, 3);
+
+        assertEq(buckets.length, 3);
+        assertEq(nextIndex,      med);
+
+        assertEq(buckets[0].index,       highest - 1);
+        assertEq(buckets[0].quoteTokens, 0);
+        assertEq(buckets[0].bucketLP,    0);
+
+        // each bucket matches bucketInfo
+        for (uint256 i = 1; i < buckets.length; ++i) {
+            (
+                uint256 price,
+                uint256 quoteTokens,
+                uint256 collateral,
+                uint256 bucketLP,
+                uint256 scale,
+                uint256 exchangeRate
+            ) = _poolUtils.bucketInfo(address(_pool), buckets[i].index);
+
+            assertEq(buckets[i].index,        highest - 1 + i);
+            assertEq(buckets[i].price,        price);
+            assertEq(buckets[i].quoteTokens,  quoteTokens);
+            assertEq(buckets[i].collateral,   collateral);
+            assertEq(buckets[i].bucketLP,     bucketLP);
+            assertEq(buckets[i].scale,        scale);
+            assertEq(buckets[i].exchangeRate, exchangeRate);
+        }
+        assertEq(buckets[2].price,       2_995.912459898389633881 * 1e18);
+        assertEq(buckets[2].quoteTokens, 9_999.54337899543379 * 1e18);
+
+        (buckets, nextIndex) = _poolUtils.bucketsInfo(address(_pool), nextIndex, lowest + 1, 3);
+        assertEq(buckets.length,   3);
+        assertEq(buckets[2].index, lowest);
+        assertEq(nextIndex,        lowest + 1);
+
+        // last page is cut at the end of the range
+        (buckets, nextIndex) = _poolUtils.bucketsInfo(address(_pool), nextIndex, lowest + 1, 3);
+        assertEq(buckets.length,   1);
+        assertEq(buckets[0].index, lowest + 1);
+        assertEq(nextIndex,        lowest + 2);
+
+        (buckets, nextIndex) = _poolUtils.bucketsInfo(address(_pool), nextIndex, lowest + 1, 3);
+        assertEq(buckets.length, 0);
+        assertEq(nextIndex,      lowest + 2);
+
+        // range is capped at MAX_FENWICK_INDEX
+        (buckets, nextIndex) = _poolUtils.bucketsInfo(address(_pool), MAX_FENWICK_INDEX - 1, type(uint256).max, 10);
+        assertEq(buckets.length,   2);
+        assertEq(buckets[1].index, MAX_FENWICK_INDEX);
+        assertEq(buckets[1].price, MIN_PRICE);
+        assertEq(nextIndex,        MAX_FENWICK_INDEX + 1);
+    }
+
+    function testPoolInfoUtilsLendersInfo() external {
+        address[] memory lenders = new address[](2);
+        lenders[0] = _lender;
+        lenders[1] = _lender1;
+
+        uint256[] memory indexes = new uint256[](3);
+        indexes[0] = highest;
+        indexes[1] = lowest;
+        indexes[2] = 5000;
+
+        (uint256[] memory lps, uint256[] memory quoteTokens) = _poolUtils.lendersInfo(address(_pool), lenders, indexes);
+        assertEq(lps.length,         6);
+        assertEq(quoteTokens.length, 6);
+
+        // each cell matches lenderInfo and lpToQuoteTokens
+        for (uint256 i; i < lenders.length; ++i) {
+            for (uint256 j; j < indexes.length; ++j) {
+                (uint256 lpBalance, ) = _pool.lenderInfo(indexes[j], lenders[i]);
+
+                assertEq(lps[i * indexes.length + j],         lpBalance);
+                assertEq(quoteTokens[i * indexes.length + j], _poolUtils.lpToQuoteTokens(address(_pool), lpBalance, indexes[j]));
+            }
+        }
+        assertEq(lps[0],         9_999.54337899543379 * 1e18);
+        assertEq(quoteTokens[0], 9_999.54337899543379 * 1e18);
+        assertEq(lps[2],         0);
+        assertEq(lps[3],         0);
+    }
+
+    function testPoolInfoUtilsLoansHeapInfo() external {
+        _drawDebtNoLupCheck({
+            from:               _borrower2,
+            borrower:           _borrower2,
+            amountToBorrow:     1_000 * 1e18,
+            limitIndex:         3_000,
+            collateralToPledge: 100 * 1e18
+        });
+
+        // index 0 is the dummy loan and starts at root
+        (PoolInfoUtils.HeapLoanInfo[] memory loans, uint256 nextIndex) = _poolUtils.loansHeapInfo(address(_pool), 0, 1);
+        assertEq(loans.length, 1);
+        assertEq(nextIndex,    2);
+
+        (, , uint256 htp, , , ) = _poolUtils.poolPricesInfo(address(_pool));
+        (address maxBorrower, uint256 maxT0DebtToCollateral, ) = _pool.loansInfo();
+        assertEq(loans[0].index,              1);
+        assertEq(loans[0].borrower,           maxBorrower);
+        assertEq(loans[0].borrower,           _borrower);
+        assertEq(loans[0].t0DebtToCollateral, maxT0DebtToCollateral);
+        assertEq(loans[0].thresholdPrice,     htp);
+
+        (, uint256 t0DebtToCollateral) = _pool.loanInfo(2);
+        (loans, nextIndex) = _poolUtils.loansHeapInfo(address(_pool), nextIndex, 10);
+        assertEq(loans.length,                1);
+        assertEq(loans[0].index,              2);
+        assertEq(loans[0].borrower,           _borrower2);
+        assertEq(loans[0].t0DebtToCollateral, t0DebtToCollateral);
+        assertLt(loans[0].thresholdPrice,     htp);
+        assertEq(nextIndex,                   3);
+
+        (loans, nextIndex) = _poolUtils.loansHeapInfo(address(_pool), nextIndex, 10);
+        assertEq(loans.length, 0);
+        assertEq(nextIndex,    3);
+    }
+
+    function testPoolDepositUpToIndexes() external {
+        uint256[] memory indexes = new uint256[](7);
+        for (uint256 i; i < 6; ++i) {
+            indexes[i] = highest - 1 + i;
+        }
+        indexes[6] = MAX_FENWICK_INDEX;
+
+        uint256[] memory depth = _pool.depositUpToIndexes(indexes);
+
+        assertEq(depth.length, indexes.length);
+        for (uint256 i; i < indexes.length; ++i) {
+            assertEq(depth[i], _pool.depositUpToIndex(indexes[i]));
+        }
+        assertEq(depth[0], 0);
+        assertEq(depth[6], _pool.depositSize());
+    }
+
     function testPoolInfoUtilsLoansInfo() external {
         (
             uint256 poolSize,
@@ -152,6 +152,33 @@ contract FenwickTreeTest is DSTestPlus {
         assertEq(_tree.valueAt(3_700), 0);
     }
 
+    /**
+     *  @notice Fuzz tests prefix sums of many indexes against single prefix sums, in ascending and random order.
+     */
+    function testFenwickFuzzyScalingPrefixSums(
+        uint256 insertions_,
+        uint256 totalAmount_,
+        uint256 seed_,
+        uint256 scaleIndex_,
+        uint256 factor_
+    ) external {
+        _tree.fuzzyFill(insertions_, totalAmount_, seed_, false);
+        _tree.mult(bound(scaleIndex_, 2, MAX_INDEX), bound(factor_, 1 * 1e18, 5 * 1e18));
+
+        uint256[] memory indexes = new uint256[](100);
+        for (uint256 i; i < 50; ++i) {
+            indexes[i] = i * 150;
+        }
+        for (uint256 i = 50; i < 100; ++i) {
+            indexes[i] = randomInRange(0, MAX_INDEX);
+        }
+
+        uint256[] memory sums = _tree.prefixSums(indexes);
+        for (uint256 i; i < indexes.length; ++i) {
+            assertEq(sums[i], _tree.prefixSum(indexes[i]));
+        }
+    }
+
     function testFenwickOutOfBoundsBehavior() external {
         uint depositAmount = 3 * 1e18;
 
@@ -168,6 +195,16 @@ contract FenwickTreeTest is DSTestPlus {
         assertEq(_tree.prefixSum(MAX_INDEX + 1), depositAmount * MAX_FENWICK_INDEX);
         // CAUTION: this will cause infinite loop
         // assertEq(_tree.prefixSum(8192 + 1), depositAmount * MAX_FENWICK_INDEX);
+
+        // prefixSums caps indexes at tree size
+        uint256[] memory indexes = new uint256[](3);
+        indexes[0] = 0;
+        indexes[1] = 8192 + 1;
+        indexes[2] = type(uint256).max;
+        uint256[] memory sums = _tree.prefixSums(indexes);
+        assertEq(sums[0], depositAmount);
+        assertEq(sums[1], depositAmount * MAX_FENWICK_INDEX);
+        assertEq(sums[2], depositAmount * MAX_FENWICK_INDEX);
     }
 
     /**
@@ -288,6 +325,18 @@ contract FenwickTreeGasLoadTest is DSTestPlus {
         }
     }
 
+    function testLoadFenwickTreeGasExerciseFindPrefixSumsOnAllDeposits() public {
+        uint256[] memory indexes = new uint256[](MAX_FENWICK_INDEX);
+        for (uint256 i; i < MAX_FENWICK_INDEX; i++) {
+            indexes[i] = i;
+        }
+
+        uint256[] memory sums = _tree.prefixSums(indexes);
+        for (uint256 i; i < MAX_FENWICK_INDEX; i++) {
+            assertEq(sums[i], 100 * 1e18 + i * 100 * 1e18);
+        }
+    }
+
     function testLoadFenwickTreeGasExerciseGetOnAllIndexes() public {
         for (uint256 i; i < MAX_FENWICK_INDEX; i++) {
             assertEq(_tree.get(i), 100 * 1e18);
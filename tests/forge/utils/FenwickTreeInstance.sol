@@ -55,6 +55,10 @@ contract FenwickTreeInstance is DSTestPlus {
         return deposits.prefixSum(i_);
     }
 
+    function prefixSums(uint256[] memory i_) external view returns (uint256[] memory s_) {
+        return deposits.prefixSums(i_);
+    }
+
     function obliterate(uint256 i_) public {
         uint256 deposit = deposits.unscaledValueAt(i_);
         deposits.unscaledRemove(i_, deposit);